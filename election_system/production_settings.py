@@ -13,6 +13,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'voting.middleware.ElectionClockMiddleware',
 ]
 DEBUG = False
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-9elfa#$5$9hlf0vu112ag)r$3f5q7^zq4-ttoswil+5reak=jb')
@@ -45,6 +46,26 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL)
 }
 
+# Shared cache, so every worker sees settings changes immediately (the
+# ``redis`` package is in requirements.txt). Without it each worker uses its own memory cache
+# and picks up changes within ELECTION_SETTINGS_CACHE_TTL seconds.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Group-commit ballot ingestion (see settings.BALLOT_GROUP_COMMIT)
+BALLOT_GROUP_COMMIT = os.environ.get('BALLOT_GROUP_COMMIT', 'False').lower() == 'true'
+
+# Write-ahead ballot journal (see settings.BALLOT_JOURNAL)
+BALLOT_JOURNAL = os.environ.get('BALLOT_JOURNAL', 'False').lower() == 'true'
+if os.environ.get('BALLOT_JOURNAL_PATH'):
+    BALLOT_JOURNAL_PATH = os.environ['BALLOT_JOURNAL_PATH']
+
 # Static files configuration for production
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -60,6 +81,21 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 WHITENOISE_USE_FINDERS = True
 WHITENOISE_AUTOREFRESH = True
 
+# Published results snapshots (``manage.py publish_results``) are served from
+# WHITENOISE_ROOT. Autorefresh makes WhiteNoise pick up each new snapshot.
+WHITENOISE_ROOT = RESULTS_SNAPSHOT_ROOT.parent
+os.makedirs(RESULTS_SNAPSHOT_ROOT, exist_ok=True)
+RESULTS_SNAPSHOT_POLLING = os.environ.get('RESULTS_SNAPSHOT_POLLING', 'False').lower() == 'true'
+
+
+def add_results_snapshot_headers(headers, path, url):
+    """Give published results snapshots a short cache lifetime."""
+    if url.startswith(RESULTS_SNAPSHOT_URL):
+        headers['Cache-Control'] = f'public, max-age={RESULTS_SNAPSHOT_MAX_AGE}'
+
+
+WHITENOISE_ADD_HEADERS_FUNCTION = add_results_snapshot_headers
+
 # Media files configuration for production
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'voting.middleware.ElectionClockMiddleware',
 ]
 
 ROOT_URLCONF = 'election_system.urls'
@@ -62,6 +63,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'voting.context_processors.election_clock',
             ],
         },
     },
@@ -77,6 +79,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Tests run against a file rather than an in-memory database, so the
+        # threaded tests (test_concurrency and the retry stress test) see
+        # SQLite's real locking and fsync behaviour. The file is gitignored.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -128,3 +134,83 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Election performance settings
+
+# Number of counter slots per candidate in the materialized vote tally.
+# More shards let concurrent ballots for the same candidate avoid row contention.
+VOTE_TALLY_SHARDS = 4
+
+# Live results Server-Sent Events stream (served by the ASGI application).
+# Each worker checks for new results once per tick and pushes to all clients.
+LIVE_RESULTS_STREAM_TICK = 2  # seconds
+LIVE_RESULTS_STREAM_HEARTBEAT = 15  # seconds
+
+# Delta-encoded live results (``?since=<version>`` on the live results API).
+# Each worker remembers this many recent versions; clients further behind
+# than the maximum gap get a full snapshot instead.
+LIVE_RESULTS_DELTA_HISTORY = 64
+LIVE_RESULTS_DELTA_MAX_GAP = 200
+
+# Static results snapshots written by ``manage.py publish_results``.
+# In production WhiteNoise serves them from WHITENOISE_ROOT with a short
+# cache lifetime; set RESULTS_SNAPSHOT_POLLING to make the live results
+# page poll the published JSON instead of the API.
+RESULTS_SNAPSHOT_ROOT = BASE_DIR / 'public' / 'snapshots'
+RESULTS_SNAPSHOT_URL = '/snapshots/'
+RESULTS_SNAPSHOT_MAX_AGE = 5  # seconds
+RESULTS_SNAPSHOT_POLLING = False
+
+# Once the election closes, the final results page and API are rendered once
+# (``manage.py finalize_results`` or the first request after the close). The
+# URLs naming the artifact's content hash are served with ``Cache-Control:
+# public, immutable`` for FINAL_RESULTS_MAX_AGE; the canonical URLs, whose
+# artifact an admin change can replace, only for FINAL_RESULTS_CANONICAL_MAX_AGE.
+FINAL_RESULTS_MAX_AGE = 365 * 24 * 60 * 60  # seconds
+FINAL_RESULTS_CANONICAL_MAX_AGE = 5  # seconds
+
+# Election settings are cached per process for this many seconds. Saving the
+# settings changes a version stamp in the default cache, so processes sharing
+# that cache reload immediately.
+ELECTION_SETTINGS_CACHE_TTL = 30  # seconds
+
+# The compiled ballot schema (positions and their candidates) is cached the
+# same way and recompiled when positions or candidates change.
+BALLOT_SCHEMA_CACHE_TTL = 30  # seconds
+
+# Group commit: ballots submitted within BALLOT_GROUP_COMMIT_WINDOW seconds of
+# each other are written in one transaction (at most BALLOT_GROUP_COMMIT_MAX_BATCH
+# per transaction). Raises throughput when voting opens and every voter
+# submits at once, at the cost of a few milliseconds of latency per ballot.
+# Measure with: python manage.py benchmark_group_commit
+BALLOT_GROUP_COMMIT = False
+BALLOT_GROUP_COMMIT_WINDOW = 0.005  # seconds
+BALLOT_GROUP_COMMIT_MAX_BATCH = 64
+
+# Write-ahead ballot journal: when enabled, the voting view only appends each
+# ballot to a local WAL-mode SQLite file and acknowledges once it is synced.
+# ``python manage.py apply_ballot_journal`` must run on the same host to move
+# the ballots into the main database (BALLOT_JOURNAL_BATCH_SIZE per
+# transaction, checking every BALLOT_JOURNAL_APPLY_INTERVAL seconds when idle).
+BALLOT_JOURNAL = False
+BALLOT_JOURNAL_PATH = BASE_DIR / 'journal' / 'ballots.sqlite3'
+BALLOT_JOURNAL_BATCH_SIZE = 500
+BALLOT_JOURNAL_APPLY_INTERVAL = 0.5  # seconds
+
+# A successful vote submission is remembered per (voter, idempotency key) for
+# this long, so a retried request gets the original response back. Workers
+# only see each other's submissions through a shared cache (REDIS_URL).
+SUBMIT_IDEMPOTENCY_TTL = 600  # seconds
+
+# Ballot transactions that fail with a transient database error ("database is
+# locked", serialization failures, deadlocks) are retried up to
+# DB_RETRY_ATTEMPTS times in total, with a random backoff of up to
+# DB_RETRY_BASE_DELAY * 2^attempt seconds, capped at DB_RETRY_MAX_DELAY.
+DB_RETRY_ATTEMPTS = 5
+DB_RETRY_BASE_DELAY = 0.01  # seconds
+DB_RETRY_MAX_DELAY = 0.5  # seconds
+
+# Admin changelists of large tables (voters, votes) show PostgreSQL's row
+# estimate instead of running an exact COUNT(*) on every page view once the
+# estimate exceeds this many rows. Filtered lists are always counted exactly.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
@@ -30,6 +30,8 @@ urlpatterns = [
 if settings.DEBUG:
     # Development: serve media files normally
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Production serves published results snapshots through WhiteNoise
+    urlpatterns += static(settings.RESULTS_SNAPSHOT_URL, document_root=settings.RESULTS_SNAPSHOT_ROOT)
 else:
     # Production: serve media files via Django (not ideal, but works for small deployments)
     urlpatterns += [
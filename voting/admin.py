@@ -5,13 +5,60 @@ This module configures the admin interface for managing elections,
 voters, candidates, and viewing results.
 """
 
+from django.conf import settings as django_settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMinute
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from .models import ElectionSettings, Voter, Position, Candidate, Vote
+from .models import (
+    ElectionSettings, ElectionStats, FinalResult, TurnoutRollup, Voter, Position, Candidate, Vote
+)
+from .ballot import invalidate_ballot_schema_on_commit
+from .results import annotate_candidate_vote_totals, annotate_position_vote_totals
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the database's row estimate for large tables.
+
+    An exact ``COUNT(*)`` scans the whole table on PostgreSQL. When the
+    changelist is unfiltered and the planner's estimate is above
+    ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows, the estimate is used instead;
+    otherwise (small tables, filtered lists, other databases) the count is
+    exact.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        threshold = getattr(django_settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000)
+        if estimate is not None and estimate > threshold:
+            return estimate
+        return super().count
+
+    def estimated_count(self):
+        """The planner's row estimate for an unfiltered table, or None."""
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [query.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0) until the table has been analyzed
+        return row[0] if row and row[0] > 0 else None
 
 
 @admin.register(ElectionSettings)
@@ -58,6 +105,8 @@ class VoterAdmin(admin.ModelAdmin):
     search_fields = ['name', 'reg_no']
     readonly_fields = ['token', 'voted_at', 'created_at', 'updated_at']
     ordering = ['name']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Voter Information', {
@@ -92,7 +141,16 @@ class VoterAdmin(admin.ModelAdmin):
 
     def reset_voting_status(self, request, queryset):
         """Reset voting status for selected voters."""
-        count = queryset.update(has_voted=False, voted_at=None)
+        with transaction.atomic():
+            voted = queryset.filter(has_voted=True)
+            # Take the ballots out of the turnout rollups before voted_at is cleared
+            minutes = voted.annotate(minute=TruncMinute('voted_at')).order_by().values_list(
+                'minute'
+            ).annotate(ballots=Count('id'))
+            for minute, ballots in minutes:
+                TurnoutRollup.remove_ballots(minute, ballots)
+            count = voted.update(has_voted=False, voted_at=None)
+            ElectionStats.bump_results_version(voted=-count)
         self.message_user(request, f'Reset voting status for {count} voters.')
     reset_voting_status.short_description = 'Reset voting status'
 
@@ -140,13 +198,22 @@ class PositionAdmin(admin.ModelAdmin):
 
     def candidate_count(self, obj):
         """Display number of candidates for this position."""
-        return obj.candidates.count()
+        return obj.candidate_total
     candidate_count.short_description = 'Candidates'
+    candidate_count.admin_order_field = 'candidate_total'
+
+    def get_queryset(self, request):
+        """Annotate candidate counts and vote totals in the changelist query."""
+        queryset = super().get_queryset(request).annotate(
+            candidate_total=Count('candidates', distinct=True)
+        )
+        return annotate_position_vote_totals(queryset)
 
     def vote_count(self, obj):
         """Display number of votes for this position."""
-        return Vote.objects.filter(position=obj).count()
+        return obj.vote_total
     vote_count.short_description = 'Total Votes'
+    vote_count.admin_order_field = 'vote_total'
 
     def get_status(self, obj):
         """Display voting status with color coding."""
@@ -214,19 +281,29 @@ class CandidateAdmin(admin.ModelAdmin):
     def activate_candidates(self, request, queryset):
         """Activate selected candidates."""
         count = queryset.update(is_active=True)
+        ElectionStats.bump_results_version()
+        invalidate_ballot_schema_on_commit()
         self.message_user(request, f'Activated {count} candidates.')
     activate_candidates.short_description = 'Activate selected candidates'
 
     def deactivate_candidates(self, request, queryset):
         """Deactivate selected candidates."""
         count = queryset.update(is_active=False)
+        ElectionStats.bump_results_version()
+        invalidate_ballot_schema_on_commit()
         self.message_user(request, f'Deactivated {count} candidates.')
     deactivate_candidates.short_description = 'Deactivate selected candidates'
 
+    def get_queryset(self, request):
+        """Annotate vote totals and prefetch positions for the changelist."""
+        queryset = super().get_queryset(request).prefetch_related('positions')
+        return annotate_candidate_vote_totals(queryset)
+
     def vote_count(self, obj):
         """Display total votes received by this candidate."""
-        return Vote.objects.filter(candidate=obj).count()
+        return obj.vote_total
     vote_count.short_description = 'Total Votes'
+    vote_count.admin_order_field = 'vote_total'
 
     def get_positions_list(self, obj):
         """Display positions as a formatted list."""
@@ -282,17 +359,25 @@ class VoteAdmin(admin.ModelAdmin):
         'voted_at', 
         'ip_address'
     ]
-    ordering = ['-voted_at']
+    ordering = ['-voted_at', 'id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Load each vote's voter, position and candidate in the changelist query."""
+        return super().get_queryset(request).select_related('voter', 'position', 'candidate')
 
     def voter_name(self, obj):
         """Display voter name."""
         return obj.voter.name
     voter_name.short_description = 'Voter Name'
+    voter_name.admin_order_field = 'voter__name'
 
     def voter_reg_no(self, obj):
         """Display voter registration number."""
         return obj.voter.reg_no
     voter_reg_no.short_description = 'Voter Reg No'
+    voter_reg_no.admin_order_field = 'voter__reg_no'
 
     def has_add_permission(self, request):
         """Prevent manual vote creation through admin."""
@@ -307,6 +392,24 @@ class VoteAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(FinalResult)
+class FinalResultAdmin(admin.ModelAdmin):
+    """Admin interface for viewing the frozen final results."""
+    
+    list_display = ['results_version', 'finalized_at', 'total_voted', 'total_voters', 'content_hash']
+    fields = ['results_version', 'finalized_at', 'total_voters', 'total_voted', 'content_hash', 'payload']
+    readonly_fields = fields
+    ordering = ['-results_version']
+
+    def has_add_permission(self, request):
+        """Final results are only created by finalization."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Final results are immutable."""
+        return False
+
+
 # Customize admin site headers
 admin.site.site_header = "Election Voting System Admin"
 admin.site.site_title = "Election Admin"
@@ -0,0 +1,299 @@
+"""
+Ballot parsing and validation for the Django Election Voting System.
+
+The ballot layout (which active candidates stand for which active
+positions, plus what the voting page displays for them) only changes when
+an admin edits positions or candidates. It is compiled once into a
+``BallotSchema`` and cached per process, keyed by a version stamp in the
+shared cache that signal handlers replace on every such edit. Validating
+a ballot is then a set of dictionary lookups with no queries at all.
+
+Valid ballots are recorded by ``record_ballot``, one transaction per
+ballot, through the group-commit coordinator (``voting.group_commit``)
+when ``BALLOT_GROUP_COMMIT`` is enabled, or appended to the write-ahead
+ballot journal (``voting.journal``) when ``BALLOT_JOURNAL`` is enabled.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import FrozenSet, Mapping, Optional, Tuple
+
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .clock import get_clock
+from .models import Candidate, ElectionStats, Position, Vote, VoteTally
+from .retry import is_transient_error, retry_transient
+from .rollups import record_ballot_rollups
+
+# Shared-cache key whose value changes whenever the ballot layout changes
+SCHEMA_VERSION_KEY = 'voting:ballot_schema:version'
+# Per-process compiled schema: (version stamp, loaded at, schema)
+_schema_cache = None
+
+
+class BallotError(Exception):
+    """A ballot was rejected; the message is shown to the voter."""
+
+
+def parse_selections(data):
+    """
+    Parse ``position_<id>=<candidate id>`` fields into ``{position_id: candidate_id}``.
+
+    Raises BallotError if a field is malformed or nothing was selected.
+    """
+    selections = {}
+    errors = []
+
+    for key, value in data.items():
+        if key.startswith('position_') and value:
+            try:
+                position_id = int(key.split('_')[1])
+                candidate_id = int(value)
+                selections[position_id] = candidate_id
+            except (ValueError, IndexError):
+                errors.append(f"Invalid vote data: {key}")
+
+    if not selections:
+        raise BallotError('No votes selected')
+
+    if errors:
+        raise BallotError('; '.join(errors))
+
+    return selections
+
+
+@dataclass(frozen=True)
+class BallotCandidate:
+    """Display data for a candidate on the ballot."""
+    id: int
+    name: str
+    reg_no: str
+    bio: str
+    photo_url: Optional[str]
+
+    @property
+    def has_photo(self):
+        return bool(self.photo_url)
+
+
+@dataclass(frozen=True)
+class BallotPosition:
+    """An active position and its active candidates, ordered by name."""
+    id: int
+    title: str
+    description: str
+    end_time: object
+    candidates: Tuple[BallotCandidate, ...]
+    candidate_ids: FrozenSet[int]
+
+
+@dataclass(frozen=True)
+class BallotSchema:
+    """Compiled layout of the ballot at one version."""
+    version: object
+    positions: Tuple[BallotPosition, ...]
+    positions_by_id: Mapping[int, BallotPosition]
+    candidates_by_id: Mapping[int, BallotCandidate]
+
+
+def compile_ballot_schema(version=None):
+    """Build the ballot schema from the database (two queries)."""
+    positions = list(Position.objects.filter(is_active=True))
+    memberships = Candidate.positions.through.objects.filter(
+        position__is_active=True,
+        candidate__is_active=True
+    ).select_related('candidate').order_by('candidate__name')
+
+    candidates_by_id = {}
+    candidates_by_position = {}
+    for membership in memberships:
+        candidate = candidates_by_id.get(membership.candidate_id)
+        if candidate is None:
+            candidate = candidates_by_id[membership.candidate_id] = BallotCandidate(
+                id=membership.candidate.id,
+                name=membership.candidate.name,
+                reg_no=membership.candidate.reg_no,
+                bio=membership.candidate.bio,
+                photo_url=membership.candidate.get_photo_url(),
+            )
+        candidates_by_position.setdefault(membership.position_id, []).append(candidate)
+
+    ballot_positions = []
+    for position in positions:
+        candidates = tuple(candidates_by_position.get(position.id, ()))
+        ballot_positions.append(BallotPosition(
+            id=position.id,
+            title=position.title,
+            description=position.description,
+            end_time=position.end_time,
+            candidates=candidates,
+            candidate_ids=frozenset(c.id for c in candidates),
+        ))
+
+    return BallotSchema(
+        version=version,
+        positions=tuple(ballot_positions),
+        positions_by_id={p.id: p for p in ballot_positions},
+        candidates_by_id=candidates_by_id,
+    )
+
+
+def get_ballot_schema():
+    """
+    Get the compiled ballot schema from the per-process cache.
+
+    It is recompiled as soon as the version stamp in the shared cache
+    changes, and at least every ``BALLOT_SCHEMA_CACHE_TTL`` seconds for
+    processes that do not share a cache.
+    """
+    global _schema_cache
+    ttl = getattr(django_settings, 'BALLOT_SCHEMA_CACHE_TTL', 30)
+
+    version = cache.get(SCHEMA_VERSION_KEY)
+    cached = _schema_cache
+    if cached is None or cached[0] != version or time.monotonic() - cached[1] >= ttl:
+        cached = _schema_cache = (version, time.monotonic(), compile_ballot_schema(version))
+    return cached[2]
+
+
+def invalidate_ballot_schema():
+    """Make every process recompile the ballot schema on next use."""
+    global _schema_cache
+    _schema_cache = None
+    cache.set(SCHEMA_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_ballot_schema_on_commit():
+    """Invalidate now and again once the current transaction commits."""
+    invalidate_ballot_schema()
+    # A process may compile the old layout between the change and the commit
+    transaction.on_commit(invalidate_ballot_schema)
+
+
+def validate_ballot(voter, selections, ip_address=None, schema=None):
+    """
+    Validate a voter's selections and build the (unsaved) votes.
+
+    Uses only the compiled ballot schema and the request's election clock,
+    so it runs no queries. Raises BallotError with the first problem found,
+    checking positions in ballot order. Positions the voter has already
+    voted for are caught by the database's unique (voter, position)
+    constraint when the votes are saved.
+    """
+    if schema is None:
+        schema = get_ballot_schema()
+    clock = get_clock()
+
+    votes = []
+    for position_id, candidate_id in selections.items():
+        position = schema.positions_by_id.get(position_id)
+        candidate = schema.candidates_by_id.get(candidate_id)
+        if position is None or candidate is None:
+            raise BallotError('Invalid position or candidate')
+
+        # Check if voting is still open for this position
+        if not clock.is_voting_open:
+            raise BallotError(f'Voting for {position.title} is not open')
+
+        # Check if candidate is contesting for this position
+        if candidate_id not in position.candidate_ids:
+            raise BallotError(f'{candidate.name} is not contesting for {position.title}')
+
+        votes.append(Vote(
+            voter=voter,
+            position_id=position_id,
+            candidate_id=candidate_id,
+            ip_address=ip_address
+        ))
+
+    return votes
+
+
+def record_ballot(voter, votes, now=None):
+    """
+    Record a validated ballot in its own transaction.
+
+    Claims the voter first with a conditional UPDATE, so a concurrent
+    ballot for the same voter fails fast. Raises BallotError if the voter
+    has already voted; nothing is written in that case. Safe to retry
+    with the same votes after a rolled back attempt.
+    """
+    try:
+        with transaction.atomic():
+            if not voter.claim_ballot(now):
+                raise BallotError('You have already voted')
+
+            # Save all votes and add them to the materialized tally
+            Vote.objects.bulk_create(unsaved_votes(votes))
+            VoteTally.record_votes(votes)
+            record_ballot_rollups([(voter.pk, voter.voted_at, votes)])
+            ElectionStats.bump_results_version(voted=1)
+    except IntegrityError:
+        # Only a vote that already exists for one of these positions means
+        # the voter has voted; any other constraint failure is a real error
+        position_ids = [vote.position_id for vote in votes]
+        if Vote.objects.filter(voter_id=voter.pk, position_id__in=position_ids).exists():
+            raise BallotError('You have already voted')
+        raise
+
+
+def unsaved_votes(votes):
+    """
+    Make votes insertable again after a rolled back attempt to save them.
+
+    ``bulk_create`` sets the primary keys even if the transaction later
+    rolls back; inserting those ids again could collide with the votes of
+    a ballot committed in the meantime.
+    """
+    for vote in votes:
+        vote.pk = None
+        vote._state.adding = True
+    return votes
+
+
+def has_cast_ballot(voter):
+    """
+    Check whether the voter has voted, including ballots still in the journal.
+
+    Fills in ``voted_at`` for a journaled ballot that has not been applied.
+    """
+    from .journal import get_journal, is_journal_enabled
+
+    if voter.has_voted:
+        return True
+    if not is_journal_enabled():
+        return False
+    voted_at = get_journal().voted_at(voter.pk)
+    if voted_at is None:
+        return False
+    voter.voted_at = voted_at
+    return True
+
+
+def submit_ballot(voter, selections, ip_address=None, now=None):
+    """
+    Validate and record a ballot, using the journal or group commit if enabled.
+
+    Raises BallotError if the ballot is rejected.
+    """
+    from .group_commit import get_coordinator, is_group_commit_enabled
+    from .journal import AlreadyJournaled, get_journal, is_journal_enabled
+
+    votes = validate_ballot(voter, selections, ip_address)
+    try:
+        if is_journal_enabled():
+            get_journal().append(voter, votes, now)
+        elif is_group_commit_enabled():
+            get_coordinator().submit(voter, votes, now)
+        else:
+            retry_transient(record_ballot, voter, votes, now)
+    except AlreadyJournaled:
+        raise BallotError('You have already voted')
+    except DatabaseError as e:
+        if not is_transient_error(e):
+            raise
+        # Still contended after every retry; nothing was saved
+        raise BallotError('The server is busy. Please submit your vote again.')
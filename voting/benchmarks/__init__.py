@@ -0,0 +1,8 @@
+"""
+Benchmark suite for the Django Election Voting System.
+
+Builds fixture elections at several scales (``fixtures``), times the
+results pages, the audit trail and the admin changelists against them,
+and compares saved runs between commits (``suite``). Run it with
+``python manage.py benchmark_results``.
+"""
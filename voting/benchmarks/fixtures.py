@@ -0,0 +1,100 @@
+"""
+Fixture elections for the benchmark suite.
+
+``build_results_fixture`` creates a finished-looking election with a given
+number of votes. Votes are written with ``executemany`` on a raw cursor
+rather than model instances, and the materialized tallies and per-minute
+rollups are computed in Python alongside them, so a million votes take
+seconds rather than minutes.
+"""
+
+import random
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import (
+    ElectionStats, TurnoutRollup, Vote, Voter, VoteRollup, VoteTally, truncate_to_minute
+)
+from ..synthetic import create_synthetic_election
+
+# Benchmark scales: name -> number of votes
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+POSITIONS = 10
+CANDIDATES_PER_POSITION = 5
+BATCH_SIZE = 10_000
+
+
+def build_results_fixture(votes, positions=POSITIONS,
+                          candidates_per_position=CANDIDATES_PER_POSITION, seed=0):
+    """
+    Create an election in which every voter has voted for every position.
+
+    There are ``votes // positions`` voters. Each position's candidates get
+    deliberately uneven shares, and the votes are spread over the first
+    hours of voting.
+    """
+    rng = random.Random(seed)
+    voter_count = max(1, votes // positions)
+    election = create_synthetic_election(voter_count, positions, candidates_per_position)
+    start = timezone.now() - timedelta(hours=1)
+
+    with transaction.atomic():
+        Voter.objects.update(has_voted=True, voted_at=start)
+        voter_ids = list(election.voters().values_list('id', flat=True))
+
+        weights = [candidates_per_position - c for c in range(candidates_per_position)]
+        tallies = {}
+        turnout_rollups = {}
+        vote_rollups = {}
+        rows = []
+        table = connection.ops.quote_name(Vote._meta.db_table)
+        sql = (
+            f'INSERT INTO {table} (voter_id, position_id, candidate_id, voted_at, ip_address) '
+            'VALUES (%s, %s, %s, %s, %s)'
+        )
+        with connection.cursor() as cursor:
+            for voter_id in voter_ids:
+                cast_at = start + timedelta(seconds=rng.randrange(3600))
+                voted_at = connection.ops.adapt_datetimefield_value(cast_at)
+                minute = truncate_to_minute(cast_at)
+                shard = VoteTally.shard_for(voter_id)
+                turnout_rollups[(minute, shard)] = turnout_rollups.get((minute, shard), 0) + 1
+                for position_id, candidate_ids in election.candidates_by_position.items():
+                    candidate_id = rng.choices(candidate_ids, weights)[0]
+                    rows.append((voter_id, position_id, candidate_id, voted_at, '10.0.0.1'))
+                    key = (position_id, candidate_id, shard)
+                    tallies[key] = tallies.get(key, 0) + 1
+                    key = (minute, position_id, candidate_id, shard)
+                    vote_rollups[key] = vote_rollups.get(key, 0) + 1
+                if len(rows) >= BATCH_SIZE:
+                    cursor.executemany(sql, rows)
+                    rows = []
+            if rows:
+                cursor.executemany(sql, rows)
+
+        VoteTally.objects.bulk_create([
+            VoteTally(position_id=position_id, candidate_id=candidate_id, shard=shard, votes=count)
+            for (position_id, candidate_id, shard), count in tallies.items()
+        ])
+        TurnoutRollup.objects.bulk_create([
+            TurnoutRollup(minute=minute, shard=shard, ballots=count)
+            for (minute, shard), count in turnout_rollups.items()
+        ])
+        VoteRollup.objects.bulk_create([
+            VoteRollup(
+                minute=minute, position_id=position_id, candidate_id=candidate_id,
+                shard=shard, votes=count
+            )
+            for (minute, position_id, candidate_id, shard), count in vote_rollups.items()
+        ])
+        ElectionStats.recount_turnout()
+        ElectionStats.bump_results_version()
+
+    return election
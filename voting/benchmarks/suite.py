@@ -0,0 +1,141 @@
+"""
+Timing and comparison for the benchmark suite.
+
+``run_scale`` times every page in ``ENDPOINTS`` against the current
+database. ``run_suite`` builds a fresh fixture election per scale in a
+throwaway database and collects the timings into a JSON-serializable
+report, and ``compare_reports`` lists the endpoints that got slower
+between two reports.
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.conf import settings as django_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..synthetic import local_client, scratch_database
+from .fixtures import SCALES, build_results_fixture
+
+# Endpoints to time: name -> URL name (all are GET requests as a superuser)
+ENDPOINTS = {
+    'live_results': 'live_results',
+    'live_results_api': 'live_results_api',
+    'turnout_api': 'turnout_api',
+    'final_results': 'final_results',
+    'audit_trail': 'audit_trail',
+    'admin_voters': 'admin:voting_voter_changelist',
+    'admin_positions': 'admin:voting_position_changelist',
+    'admin_candidates': 'admin:voting_candidate_changelist',
+    'admin_votes': 'admin:voting_vote_changelist',
+}
+
+# A run slower than this is not repeated, so the largest scales stay practical
+SLOW_RUN_SECONDS = 10
+
+
+def time_endpoint(client, url, repeat):
+    """
+    Time ``repeat`` requests to ``url`` after a cold first one.
+
+    The first request (which also fills per-process caches) is reported
+    separately as ``cold_ms``. If it takes longer than ``SLOW_RUN_SECONDS``
+    it is the only one, and the other figures are taken from it.
+    """
+    timings = []
+    for _ in range(repeat + 1):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        timings.append(elapsed * 1000)
+        if elapsed > SLOW_RUN_SECONDS:
+            break
+    warm = timings[1:] or timings
+    return {
+        'median_ms': round(statistics.median(warm), 2),
+        'min_ms': round(min(warm), 2),
+        'max_ms': round(max(warm), 2),
+        'cold_ms': round(timings[0], 2),
+        'runs': len(warm),
+        'queries': len(queries),
+        'status': response.status_code,
+    }
+
+
+def run_scale(repeat=5, endpoints=None):
+    """Time the endpoints against the election in the current database."""
+    user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+    client = local_client()
+    client.force_login(user)
+
+    results = {}
+    for name in endpoints or ENDPOINTS:
+        results[name] = time_endpoint(client, reverse(ENDPOINTS[name]), repeat)
+    return results
+
+
+def run_suite(scales, repeat=5, endpoints=None, log=print, clobber=False):
+    """Build each scale's fixture in a throwaway database and time it."""
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'commit': current_commit(),
+        'database': connection.vendor,
+        'django': django.get_version(),
+        'python': platform.python_version(),
+        'scales': {},
+    }
+    for scale in scales:
+        with scratch_database(clobber=clobber):
+            started = time.perf_counter()
+            build_results_fixture(SCALES[scale])
+            log(f'Built {scale} fixture in {time.perf_counter() - started:.1f}s')
+            report['scales'][scale] = {
+                'votes': SCALES[scale],
+                'endpoints': run_scale(repeat, endpoints),
+            }
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.2, min_delta_ms=5):
+    """
+    Compare the median timings of two reports.
+
+    Returns ``(scale, endpoint, baseline ms, current ms, change)`` for every
+    endpoint measured in both, where ``change`` is the relative slowdown, and
+    the subset of those rows that slowed down by more than ``threshold``
+    (and by at least ``min_delta_ms``, to ignore noise on fast pages).
+    """
+    rows = []
+    regressions = []
+    for scale, current_scale in current['scales'].items():
+        baseline_endpoints = baseline['scales'].get(scale, {}).get('endpoints', {})
+        for endpoint, timing in current_scale['endpoints'].items():
+            if endpoint not in baseline_endpoints:
+                continue
+            before = baseline_endpoints[endpoint]['median_ms']
+            after = timing['median_ms']
+            change = (after - before) / before if before else 0
+            row = (scale, endpoint, before, after, change)
+            rows.append(row)
+            if change > threshold and after - before >= min_delta_ms:
+                regressions.append(row)
+    return rows, regressions
+
+
+def current_commit():
+    """The git commit being benchmarked, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=django_settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,74 @@
+"""
+Request-scoped election clock for the Django Election Voting System.
+
+An ``ElectionClock`` freezes the current time, the election settings and
+the voting phase derived from them once. ``ElectionClockMiddleware``
+attaches one to every request, so everything a request does (views,
+``Position`` status checks, templates) agrees on the phase even when the
+request straddles the start or end of voting.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils import timezone
+
+_current_clock = ContextVar('election_clock', default=None)
+
+
+class ElectionClock:
+    """The election's settings and voting phase at one frozen instant."""
+
+    def __init__(self, settings=None, now=None):
+        from .models import ElectionSettings
+
+        self.settings = settings if settings is not None else ElectionSettings.get_cached_settings()
+        self.now = now or timezone.now()
+        self.status = self.settings.get_voting_status(self.now)
+        self.is_voting_open = self.settings.is_voting_open(self.now)
+        self.is_voting_ended = self.settings.is_voting_ended(self.now)
+
+    def __repr__(self):
+        return f"<ElectionClock {self.now.isoformat()} {self.status}>"
+
+
+class _ClockSlot:
+    """Holds a scope's clock, creating it on first use."""
+    __slots__ = ('clock',)
+
+    def __init__(self, clock=None):
+        self.clock = clock
+
+    def get(self):
+        if self.clock is None:
+            self.clock = ElectionClock()
+        return self.clock
+
+
+def get_clock():
+    """
+    Get the clock of the current request.
+
+    Outside a request (management commands, background tasks) every call
+    returns a fresh clock.
+    """
+    slot = _current_clock.get()
+    if slot is None:
+        return ElectionClock()
+    return slot.get()
+
+
+@contextmanager
+def use_clock(clock=None):
+    """
+    Make ``clock`` the current clock for the enclosed block.
+
+    Without a clock, one is created the first time the block asks for it.
+    Yields the getter for the block's clock.
+    """
+    slot = _ClockSlot(clock)
+    token = _current_clock.set(slot)
+    try:
+        yield slot.get
+    finally:
+        _current_clock.reset(token)
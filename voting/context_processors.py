@@ -0,0 +1,11 @@
+"""
+Template context processors for the Django Election Voting System.
+"""
+
+from .clock import get_clock
+
+
+def election_clock(request):
+    """Expose the request's ``ElectionClock`` to templates as ``election_clock``."""
+    clock = getattr(request, 'election_clock', None)
+    return {'election_clock': clock if clock is not None else get_clock()}
@@ -0,0 +1,76 @@
+"""
+Final results finalization for the Django Election Voting System.
+
+Once voting has ended (or every voter has voted) the results can no longer
+change, so ``finalize_results`` computes them one last time, renders the
+final results page and JSON, and stores both as a ``FinalResult``. The
+final results views then serve that artifact as is. Finalization runs on
+the first request after the close, from ``manage.py finalize_results``
+(scheduled at the end of voting), or from the ``publish_results`` watcher.
+"""
+
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+
+from .clock import get_clock
+from .journal import get_journal, is_journal_enabled
+from .models import FinalResult
+from .results import compute_results, get_turnout
+
+
+def is_election_closed(clock, total_voters, total_voted):
+    """Whether the results are final: voting has ended or everyone has voted."""
+    return clock.is_voting_ended or (total_voters > 0 and total_voted == total_voters)
+
+
+def finalize_results(clock=None, turnout=None):
+    """
+    Get the frozen final results, creating them if the election has closed.
+
+    Returns None while the election is still running, or while ballots
+    accepted through the journal have not been applied yet. ``turnout`` is
+    an already read ``(total_voters, total_voted)``, to save a query.
+    """
+    # Imported here because the views use this module
+    from .views import final_results_page
+
+    if clock is None:
+        clock = get_clock()
+    if turnout is None:
+        turnout = get_turnout()
+    if not is_election_closed(clock, *turnout):
+        return None
+    if is_journal_enabled() and get_journal().pending_count():
+        # The results would leave out ballots that were already accepted
+        return None
+
+    existing = FinalResult.current()
+    if existing is not None:
+        return existing
+
+    results = compute_results(clock)
+    if not results.election_ended:
+        # A voter was added between reading the turnout and the results
+        return None
+
+    template_name, context = final_results_page(clock, results)
+    html = render_to_string(template_name, context)
+    payload = json.dumps(results.to_dict(), separators=(',', ':'))
+    content_hash = hashlib.sha256(f'{html}\0{payload}'.encode('utf-8')).hexdigest()
+
+    try:
+        with transaction.atomic():
+            return FinalResult.objects.create(
+                results_version=results.version,
+                content_hash=content_hash,
+                html=html,
+                payload=payload,
+                total_voters=results.total_voters,
+                total_voted=results.total_voted,
+            )
+    except IntegrityError:
+        # Another request finalized the same version first
+        return FinalResult.objects.get(results_version=results.version)
@@ -0,0 +1,181 @@
+"""
+Group-commit ballot ingestion for the Django Election Voting System.
+
+When voting opens, many ballots arrive within milliseconds of each other,
+and with one transaction per ballot the commit (and its fsync) is what
+limits throughput. With ``BALLOT_GROUP_COMMIT`` enabled, ballots are
+handed to a per-process ``GroupCommitCoordinator`` instead.
+
+The first ballot to arrive makes its request thread the leader: it waits
+up to ``BALLOT_GROUP_COMMIT_WINDOW`` seconds (or until
+``BALLOT_GROUP_COMMIT_MAX_BATCH`` ballots are waiting), then writes the
+whole batch in one transaction with one bulk voter update, one
+``bulk_create`` and one tally update. Ballots arriving meanwhile queue up
+for the next batch, which the first of them leads. Each caller still gets
+its own result: if any ballot in the batch conflicts (the voter has
+already voted, or a vote already exists), the batch is rolled back and
+its ballots are recorded one by one so only the offending ones fail.
+"""
+
+import threading
+
+from django.conf import settings as django_settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .ballot import BallotError, record_ballot, unsaved_votes
+from .models import ElectionStats, Vote, Voter, VoteTally
+from .retry import retry_transient
+from .rollups import record_ballot_rollups
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+class _BatchConflict(Exception):
+    """Raised inside the batch transaction to roll it back."""
+
+
+class _PendingBallot:
+    """A validated ballot waiting to be committed."""
+
+    def __init__(self, voter, votes, now):
+        self.voter = voter
+        self.votes = votes
+        self.now = now
+        self.error = None
+        self.is_leader = False
+        self.wakeup = threading.Event()
+
+
+class GroupCommitCoordinator:
+    """Collects concurrent ballots and commits them in batches."""
+
+    def __init__(self, window=None, max_batch=None):
+        if window is None:
+            window = getattr(django_settings, 'BALLOT_GROUP_COMMIT_WINDOW', 0.005)
+        if max_batch is None:
+            max_batch = getattr(django_settings, 'BALLOT_GROUP_COMMIT_MAX_BATCH', 64)
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._has_leader = False
+        self._batch_full = threading.Event()
+
+    def submit(self, voter, votes, now=None):
+        """
+        Record a validated ballot as part of the next batch.
+
+        Blocks until the batch holding it is committed. Raises BallotError
+        if this ballot was rejected, or the database error that failed the
+        batch.
+        """
+        entry = _PendingBallot(voter, votes, now or timezone.now())
+        with self._lock:
+            self._pending.append(entry)
+            if not self._has_leader:
+                self._has_leader = True
+                entry.is_leader = True
+            elif len(self._pending) >= self.max_batch:
+                self._batch_full.set()
+
+        if not entry.is_leader:
+            entry.wakeup.wait()
+        # A waiting ballot may have been woken to lead the next batch
+        if entry.is_leader:
+            self._lead()
+
+        if entry.error is not None:
+            raise entry.error
+
+    def _lead(self):
+        """Collect the next batch, commit it and hand leadership on."""
+        self._batch_full.wait(self.window)
+        with self._lock:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            self._batch_full.clear()
+
+        try:
+            self.commit_batch(batch)
+        except Exception as e:
+            for entry in batch:
+                if entry.error is None:
+                    entry.error = e
+        finally:
+            with self._lock:
+                successor = self._pending[0] if self._pending else None
+                if successor is None:
+                    self._has_leader = False
+                else:
+                    successor.is_leader = True
+                    if len(self._pending) >= self.max_batch:
+                        self._batch_full.set()
+            for entry in batch:
+                entry.wakeup.set()
+            if successor is not None:
+                successor.wakeup.set()
+
+    def commit_batch(self, batch):
+        """
+        Write a batch of ballots, setting ``error`` on each rejected one.
+
+        Called by the leader of each batch; duplicate ballots from the same
+        voter within the batch are rejected without touching the database.
+        """
+        ballots = {}
+        for entry in batch:
+            if entry.voter.pk in ballots:
+                entry.error = BallotError('You have already voted')
+            else:
+                ballots[entry.voter.pk] = entry
+        if not ballots:
+            return
+
+        # One timestamp for the batch; ballots in it are milliseconds apart
+        now = max(entry.now for entry in ballots.values())
+        try:
+            retry_transient(self._write_batch, ballots, now)
+        except (_BatchConflict, IntegrityError):
+            # Record the ballots one by one so only the conflicting ones fail
+            for entry in ballots.values():
+                try:
+                    retry_transient(record_ballot, entry.voter, entry.votes, entry.now)
+                except Exception as e:
+                    entry.error = e
+            return
+
+        for entry in ballots.values():
+            entry.voter.has_voted = entry.voter._stored_has_voted = True
+            entry.voter.voted_at = now
+
+    def _write_batch(self, ballots, now):
+        """Claim the voters and save all votes in one transaction."""
+        with transaction.atomic():
+            claimed = Voter.objects.filter(pk__in=ballots, has_voted=False).update(
+                has_voted=True, voted_at=now, updated_at=now
+            )
+            if claimed != len(ballots):
+                raise _BatchConflict()
+
+            votes = [vote for entry in ballots.values() for vote in entry.votes]
+            Vote.objects.bulk_create(unsaved_votes(votes))
+            VoteTally.record_votes(votes)
+            record_ballot_rollups((voter_id, now, entry.votes) for voter_id, entry in ballots.items())
+            ElectionStats.bump_results_version(voted=claimed)
+
+
+def is_group_commit_enabled():
+    """Whether ballots are committed in batches."""
+    return getattr(django_settings, 'BALLOT_GROUP_COMMIT', False)
+
+
+def get_coordinator():
+    """Get this process's group-commit coordinator."""
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = GroupCommitCoordinator()
+    return _coordinator
@@ -0,0 +1,214 @@
+"""
+Write-ahead ballot journal for the Django Election Voting System.
+
+With ``BALLOT_JOURNAL`` enabled, ``submit_vote`` does not write to the main
+database at all. A validated ballot is appended to a local SQLite side
+database in WAL mode with ``synchronous=FULL``, and the voter is told
+their vote is recorded as soon as that commit is on disk. A slow primary
+database then only delays the results, never the voters.
+
+The journal's unique index on the voter is the has-voted index. Because a
+voter can be journaled only once, a voter counts as having voted as soon
+as their ballot is journaled, even before it reaches the main tables.
+
+``apply_journal`` (run by ``manage.py apply_ballot_journal``) drains
+journaled ballots into the main ``Voter``/``Vote``/``VoteTally`` tables in
+batches and records the last applied sequence number in the journal.
+Applying a batch is idempotent, since a voter who is already marked as
+voted in the main database is skipped. After a crash between the main-database
+commit and the offset update, the applier simply replays from the last
+recorded offset.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import ElectionStats, Vote, Voter, VoteTally
+from .rollups import record_ballot_rollups
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ballot (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    voter_id INTEGER NOT NULL UNIQUE,
+    votes TEXT NOT NULL,
+    ip_address TEXT,
+    submitted_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS applier_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    applied_seq INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO applier_state (id, applied_seq) VALUES (1, 0);
+"""
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+class AlreadyJournaled(Exception):
+    """The voter already has a ballot in the journal."""
+
+
+class BallotJournal:
+    """An append-only ballot journal in a WAL-mode SQLite file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        # Sync the WAL on every commit, so an acknowledged ballot survives a crash
+        db.execute('PRAGMA synchronous=FULL')
+        return db
+
+    @property
+    def db(self):
+        """This thread's connection to the journal."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def close(self):
+        """Close this thread's connection."""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def append(self, voter, votes, now=None):
+        """
+        Durably append a validated ballot; returns its sequence number.
+
+        Raises AlreadyJournaled if the voter already has a ballot in the
+        journal.
+        """
+        now = now or timezone.now()
+        try:
+            cursor = self.db.execute(
+                'INSERT INTO ballot (voter_id, votes, ip_address, submitted_at) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    voter.pk,
+                    json.dumps([[vote.position_id, vote.candidate_id] for vote in votes]),
+                    votes[0].ip_address if votes else None,
+                    now.isoformat(),
+                )
+            )
+        except sqlite3.IntegrityError:
+            raise AlreadyJournaled(voter.pk)
+        return cursor.lastrowid
+
+    def voted_at(self, voter_id):
+        """When the voter's ballot was journaled, or None if it wasn't."""
+        row = self.db.execute(
+            'SELECT submitted_at FROM ballot WHERE voter_id = ?', (voter_id,)
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def applied_seq(self):
+        """Sequence number of the last ballot applied to the main database."""
+        return self.db.execute('SELECT applied_seq FROM applier_state').fetchone()[0]
+
+    def pending(self, limit):
+        """Up to ``limit`` ballots not yet applied, oldest first."""
+        rows = self.db.execute(
+            'SELECT seq, voter_id, votes, ip_address, submitted_at FROM ballot '
+            'WHERE seq > (SELECT applied_seq FROM applier_state) ORDER BY seq LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [
+            (seq, voter_id, json.loads(votes), ip_address, datetime.fromisoformat(submitted_at))
+            for seq, voter_id, votes, ip_address, submitted_at in rows
+        ]
+
+    def pending_count(self):
+        """Number of ballots not yet applied."""
+        return self.db.execute(
+            'SELECT COUNT(*) FROM ballot WHERE seq > (SELECT applied_seq FROM applier_state)'
+        ).fetchone()[0]
+
+    def mark_applied(self, seq):
+        """Record that every ballot up to ``seq`` is in the main database."""
+        self.db.execute(
+            'UPDATE applier_state SET applied_seq = ? WHERE applied_seq < ?', (seq, seq)
+        )
+
+
+def apply_journal(journal, batch_size=None):
+    """
+    Apply the next batch of journaled ballots to the main database.
+
+    Returns ``(applied, skipped)``: ballots written, and ballots skipped
+    because the voter had already voted in the main database (including
+    ballots replayed after a crash).
+    """
+    if batch_size is None:
+        batch_size = getattr(django_settings, 'BALLOT_JOURNAL_BATCH_SIZE', 500)
+    ballots = journal.pending(batch_size)
+    if not ballots:
+        return 0, 0
+    last_seq = ballots[-1][0]
+    journaled = len(ballots)
+
+    with transaction.atomic():
+        # Ballots whose voter is already marked (applied before a crash, or
+        # voted some other way) are skipped, which makes replay safe
+        claimable = set(Voter.objects.select_for_update().filter(
+            pk__in=[voter_id for _, voter_id, _, _, _ in ballots], has_voted=False
+        ).values_list('pk', flat=True))
+        ballots = [ballot for ballot in ballots if ballot[1] in claimable]
+
+        if ballots:
+            Voter.objects.filter(pk__in=claimable).update(
+                has_voted=True,
+                voted_at=Case(*[
+                    When(pk=voter_id, then=Value(submitted_at))
+                    for _, voter_id, _, _, submitted_at in ballots
+                ], output_field=DateTimeField()),
+                updated_at=timezone.now()
+            )
+            ballot_votes = [
+                (voter_id, submitted_at, [
+                    Vote(voter_id=voter_id, position_id=position_id,
+                         candidate_id=candidate_id, ip_address=ip_address)
+                    for position_id, candidate_id in selections
+                ])
+                for _, voter_id, selections, ip_address, submitted_at in ballots
+            ]
+            votes = [vote for _, _, ballot in ballot_votes for vote in ballot]
+            Vote.objects.bulk_create(votes)
+            VoteTally.record_votes(votes)
+            record_ballot_rollups(ballot_votes)
+            ElectionStats.bump_results_version(voted=len(ballots))
+
+    journal.mark_applied(last_seq)
+    return len(ballots), journaled - len(ballots)
+
+
+def is_journal_enabled():
+    """Whether ballots are accepted through the journal."""
+    return getattr(django_settings, 'BALLOT_JOURNAL', False)
+
+
+def get_journal():
+    """Get this process's ballot journal."""
+    global _journal
+    path = Path(django_settings.BALLOT_JOURNAL_PATH)
+    if _journal is None or _journal.path != path:
+        with _journal_lock:
+            if _journal is None or _journal.path != path:
+                _journal = BallotJournal(path)
+    return _journal
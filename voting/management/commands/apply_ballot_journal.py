@@ -0,0 +1,73 @@
+"""
+Django management command to apply journaled ballots to the database.
+
+Usage:
+    python manage.py apply_ballot_journal [--once] [--interval SECONDS] [--batch-size N]
+
+With BALLOT_JOURNAL enabled, the voting view only appends ballots to the
+local journal at BALLOT_JOURNAL_PATH. This command drains them into the
+main database in batches, starting from the last applied offset, so it
+also replays anything left over after a crash. Run one applier on the
+same host as the web workers; without --once it keeps running.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from voting.journal import apply_journal, get_journal
+from voting.retry import retry_transient
+
+
+class Command(BaseCommand):
+    help = 'Apply journaled ballots to the main database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Apply everything pending, then exit'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.BALLOT_JOURNAL_APPLY_INTERVAL,
+            help='Seconds to wait when the journal is empty '
+                 f'(default: {settings.BALLOT_JOURNAL_APPLY_INTERVAL})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BALLOT_JOURNAL_BATCH_SIZE,
+            help=f'Ballots per transaction (default: {settings.BALLOT_JOURNAL_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        journal = get_journal()
+        self.stdout.write(
+            f'Applying {journal.pending_count()} pending ballots from {journal.path} '
+            f'(last applied: #{journal.applied_seq()})'
+        )
+
+        try:
+            while True:
+                close_old_connections()
+                applied, skipped = retry_transient(
+                    apply_journal, journal, options['batch_size']
+                )
+                if applied or skipped:
+                    self.stdout.write(
+                        f'Applied {applied} ballots, skipped {skipped} '
+                        f'(up to #{journal.applied_seq()})'
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped applying.')
+            return
+
+        self.stdout.write(self.style.SUCCESS('Journal fully applied'))
@@ -0,0 +1,140 @@
+"""
+Django management command to benchmark group-commit ballot ingestion.
+
+Usage:
+    python manage.py benchmark_group_commit [--voters N] [--threads N] [--positions N] [--clobber]
+
+Builds a synthetic election in a throwaway database (see voting.synthetic)
+and submits one ballot per voter from concurrent threads: once with one
+transaction per ballot and once through the group-commit coordinator.
+Reports ballots per second for both modes. The configured database is
+never touched.
+"""
+
+import queue
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from voting.ballot import compile_ballot_schema, record_ballot, validate_ballot
+from voting.group_commit import GroupCommitCoordinator
+from voting.synthetic import create_synthetic_election, scratch_database
+
+
+class Command(BaseCommand):
+    help = 'Measure ballots per second with group commit off and on'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--voters',
+            type=int,
+            default=2000,
+            help='Ballots to submit in each mode (default: 2000)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Concurrent submitting threads (default: 16)'
+        )
+        parser.add_argument(
+            '--positions',
+            type=int,
+            default=5,
+            help='Positions on the ballot (default: 5)'
+        )
+        parser.add_argument(
+            '--window',
+            type=float,
+            help='Group-commit window in seconds (default: BALLOT_GROUP_COMMIT_WINDOW)'
+        )
+        parser.add_argument(
+            '--clobber',
+            action='store_true',
+            help='Drop a leftover scratch database without asking'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            # Let writers queue for the lock instead of failing immediately
+            connection.settings_dict['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+            connection.settings_dict['OPTIONS'].setdefault('timeout', 60)
+
+        self.stdout.write('Creating benchmark database...')
+        with scratch_database(clobber=options['clobber']):
+            election = create_synthetic_election(
+                options['voters'] * 2, options['positions'], candidates_per_position=3
+            )
+            voters = list(election.voters())
+            selections = {
+                position_id: candidate_ids[0]
+                for position_id, candidate_ids in election.candidates_by_position.items()
+            }
+            schema = compile_ballot_schema()
+
+            off = self.run(voters[:options['voters']], selections, schema,
+                           options['threads'], record_ballot)
+            coordinator = GroupCommitCoordinator(window=options['window'])
+            on = self.run(voters[options['voters']:], selections, schema,
+                          options['threads'], coordinator.submit)
+
+        self.stdout.write(
+            f'{options["voters"]} ballots, {options["threads"]} threads, '
+            f'{options["positions"]} positions, {connection.vendor}'
+        )
+        self.report('Group commit off', off)
+        self.report(f'Group commit on ({coordinator.window * 1000:g} ms window)', on)
+        if off['rate']:
+            self.stdout.write(
+                self.style.SUCCESS(f'Speedup: {on["rate"] / off["rate"]:.2f}x')
+            )
+
+    def run(self, voters, selections, schema, thread_count, record):
+        """Submit one ballot per voter from ``thread_count`` threads."""
+        pending = queue.Queue()
+        for voter in voters:
+            pending.put(voter)
+        failures = []
+
+        def submit_ballots():
+            try:
+                while True:
+                    try:
+                        voter = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        record(voter, validate_ballot(voter, selections, schema=schema))
+                    except Exception as e:
+                        failures.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit_ballots) for _ in range(thread_count)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        succeeded = len(voters) - len(failures)
+        return {
+            'seconds': elapsed,
+            'succeeded': succeeded,
+            'failed': len(failures),
+            'first_error': failures[0] if failures else None,
+            'rate': succeeded / elapsed if elapsed else 0,
+        }
+
+    def report(self, label, result):
+        self.stdout.write(
+            f'{label}: {result["rate"]:.0f} ballots/s '
+            f'({result["succeeded"]} in {result["seconds"]:.2f}s)'
+        )
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(
+                f'  {result["failed"]} failed, first error: {result["first_error"]}'
+            ))
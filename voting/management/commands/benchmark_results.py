@@ -0,0 +1,120 @@
+"""
+Django management command to benchmark the results and admin pages.
+
+Usage:
+    python manage.py benchmark_results [--scales 10k,100k,1m] [--repeat N] [--output FILE] [--clobber]
+    python manage.py benchmark_results --compare BASELINE.json CURRENT.json [--threshold 0.2]
+
+Builds a fixture election of each scale (number of votes) in a throwaway
+database, times the live and final results pages, the results API, the
+audit trail and the admin changelists, and writes the timings as JSON.
+With --compare it reads two such files and fails if any endpoint slowed
+down by more than the threshold, so it can gate a CI job.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voting.benchmarks.fixtures import SCALES
+from voting.benchmarks.suite import ENDPOINTS, compare_reports, run_suite
+
+
+class Command(BaseCommand):
+    help = 'Time the results, audit and admin pages at several election sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default=','.join(SCALES),
+            help=f'Comma-separated scales to run (default: {",".join(SCALES)})'
+        )
+        parser.add_argument(
+            '--endpoints',
+            help=f'Comma-separated endpoints to time (default: all of {",".join(ENDPOINTS)})'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed requests per endpoint (default: 5)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file (default: print it)'
+        )
+        parser.add_argument(
+            '--compare',
+            nargs=2,
+            metavar=('BASELINE', 'CURRENT'),
+            help='Compare two JSON reports instead of running the benchmarks'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Relative slowdown flagged by --compare (default: 0.2 = 20%%)'
+        )
+        parser.add_argument(
+            '--clobber',
+            action='store_true',
+            help='Drop a leftover scratch database without asking'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options['threshold'])
+
+        scales = self.parse_list(options['scales'], SCALES, 'scale')
+        endpoints = self.parse_list(options['endpoints'] or ','.join(ENDPOINTS), ENDPOINTS, 'endpoint')
+
+        report = run_suite(
+            scales, options['repeat'], endpoints, log=self.stdout.write, clobber=options['clobber']
+        )
+        for scale, results in report['scales'].items():
+            self.stdout.write(f'\n{scale} votes')
+            for endpoint, timing in results['endpoints'].items():
+                self.stdout.write(
+                    f'  {endpoint:<18}{timing["median_ms"]:>10.1f} ms median'
+                    f'{timing["queries"]:>6} queries  (HTTP {timing["status"]})'
+                )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'\nWrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def parse_list(self, value, choices, kind):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in choices]
+        if unknown:
+            raise CommandError(f'Unknown {kind}: {", ".join(unknown)} (choose from {", ".join(choices)})')
+        return names
+
+    def compare(self, baseline_path, current_path, threshold):
+        try:
+            with open(baseline_path, encoding='utf-8') as file:
+                baseline = json.load(file)
+            with open(current_path, encoding='utf-8') as file:
+                current = json.load(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read benchmark report: {e}')
+
+        rows, regressions = compare_reports(baseline, current, threshold)
+        self.stdout.write(
+            f'{baseline.get("commit") or baseline_path} -> {current.get("commit") or current_path}'
+        )
+        for scale, endpoint, before, after, change in rows:
+            line = f'  {scale:<5}{endpoint:<18}{before:>10.1f} ->{after:>10.1f} ms  {change:+.0%}'
+            if (scale, endpoint, before, after, change) in regressions:
+                line = self.style.ERROR(line + '  SLOWER')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} endpoint(s) slowed down by more than {threshold:.0%}'
+            )
+        self.stdout.write(self.style.SUCCESS('No endpoint slowed down beyond the threshold'))
@@ -0,0 +1,36 @@
+"""
+Django management command to freeze the final results.
+
+Usage:
+    python manage.py finalize_results
+
+Schedule it for just after voting_end_time. If the election has closed
+(voting has ended or every voter has voted) it computes the results once
+and stores the rendered final results page and JSON, which the final
+results views serve from then on without reading the votes. Running it
+again is harmless; otherwise the first request after the close does it.
+Nothing is frozen while the ballot journal holds ballots not yet applied.
+"""
+
+from django.core.management.base import BaseCommand
+
+from voting.finalize import finalize_results
+
+
+class Command(BaseCommand):
+    help = 'Freeze the final results once the election has closed'
+
+    def handle(self, *args, **options):
+        final = finalize_results()
+        if final is None:
+            self.stdout.write(self.style.WARNING(
+                'The election is still running or journaled ballots are not applied yet; '
+                'nothing to finalize.'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Final results at version {final.results_version} '
+            f'({final.total_voted}/{final.total_voters} voted), '
+            f'finalized {final.finalized_at:%Y-%m-%d %H:%M:%S}, sha256 {final.content_hash}'
+        ))
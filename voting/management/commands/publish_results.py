@@ -0,0 +1,66 @@
+"""
+Django management command to publish static results snapshots.
+
+Usage:
+    python manage.py publish_results [--output DIR] [--watch] [--interval SECONDS]
+
+Writes the live results JSON and the rendered final results page into
+RESULTS_SNAPSHOT_ROOT (served by WhiteNoise in production). With --watch
+it keeps running and republishes whenever the results change.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from voting.clock import ElectionClock
+from voting.publish import get_snapshot_root, publish_results
+from voting.results import results_etag
+
+
+class Command(BaseCommand):
+    help = 'Publish the current results as static JSON and HTML snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Directory to publish to (default: RESULTS_SNAPSHOT_ROOT)'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running and republish whenever the results change'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.RESULTS_SNAPSHOT_MAX_AGE,
+            help='Seconds between change checks in watch mode '
+                 f'(default: {settings.RESULTS_SNAPSHOT_MAX_AGE})'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or get_snapshot_root()
+
+        etag = publish_results(output)
+        self.stdout.write(
+            self.style.SUCCESS(f'Published results snapshot to {output}')
+        )
+
+        if not options['watch']:
+            return
+
+        self.stdout.write(f'Watching for changes every {options["interval"]}s (Ctrl+C to stop)')
+        try:
+            while True:
+                time.sleep(options['interval'])
+                close_old_connections()
+                clock = ElectionClock()
+                if results_etag(clock) == etag:
+                    continue
+                etag = publish_results(output, clock)
+                self.stdout.write(f'Published results snapshot {etag or "(disabled)"}')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped watching.')
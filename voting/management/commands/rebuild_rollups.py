@@ -0,0 +1,26 @@
+"""
+Django management command to rebuild the per-minute turnout rollups.
+
+Usage:
+    python manage.py rebuild_rollups
+
+The turnout chart and the historical "results as of" queries read the
+per-minute rollups, which the ballot paths, voter and vote deletes and the
+admin keep up to date. Votes or voters loaded in bulk (or edited in a
+shell or SQL) bypass them; this command recomputes every bucket from the
+voters and votes.
+"""
+
+from django.core.management.base import BaseCommand
+
+from voting.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-minute turnout and vote rollups from the voters and votes'
+
+    def handle(self, *args, **options):
+        turnout_buckets, vote_buckets = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {turnout_buckets} turnout buckets and {vote_buckets} vote buckets'
+        ))
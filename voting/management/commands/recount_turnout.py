@@ -0,0 +1,46 @@
+"""
+Django management command to recount the turnout counters.
+
+Usage:
+    python manage.py recount_turnout [--check]
+
+The turnout shown on the home and results pages comes from counters on
+ElectionStats, which the ballot paths, voter imports, voter deletes and
+the admin keep up to date. Changes that bypass them (bulk updates in a
+shell or SQL, restored backups) leave them drifted; this command counts
+the voters table and resets the counters. With --check it only reports,
+and fails if the counters have drifted, so it can run as a monitor.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voting.models import ElectionStats
+
+
+class Command(BaseCommand):
+    help = 'Recount the registered and voted turnout counters from the voters table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift (exit with an error if there is any)'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stats = ElectionStats.get_stats()
+            before = (stats.total_voters, stats.total_voted)
+            after = ElectionStats.count_turnout()
+        else:
+            before, after = ElectionStats.recount_turnout()
+
+        self.stdout.write(f'Registered voters: {before[0]} -> {after[0]}')
+        self.stdout.write(f'Voted: {before[1]} -> {after[1]}')
+
+        if before == after:
+            self.stdout.write(self.style.SUCCESS('Turnout counters are exact'))
+        elif options['check']:
+            raise CommandError('Turnout counters have drifted; run recount_turnout to repair them')
+        else:
+            self.stdout.write(self.style.SUCCESS('Turnout counters repaired'))
@@ -0,0 +1,194 @@
+"""
+Django management command to rehearse election day under load.
+
+Usage:
+    python manage.py simulate_election [--voters 20000] [--positions 12]
+        [--candidates-per-position 6] [--concurrency 64] [--polls 1] [--clobber]
+
+Creates a synthetic electorate in a throwaway database (see
+voting.synthetic), then sends every voter through the real URL stack from
+a pool of threads: log in, load the ballot, submit it and poll the live
+results. Prints throughput and, per endpoint, latency percentiles and
+database queries per request. The configured database is never touched.
+"""
+
+import logging
+import queue
+import random
+import re
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from voting.models import ElectionStats, Vote, Voter
+from voting.synthetic import create_synthetic_election, local_client, scratch_database
+
+IDEMPOTENCY_KEY = re.compile(r'name="idempotency_key" value="([0-9a-f]+)"')
+
+
+class Command(BaseCommand):
+    help = 'Simulate an election through the real URL stack and report capacity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=20000,
+                            help='Voters to create and send through (default: 20000)')
+        parser.add_argument('--positions', type=int, default=12,
+                            help='Positions on the ballot (default: 12)')
+        parser.add_argument('--candidates-per-position', type=int, default=6,
+                            help='Candidates standing for each position (default: 6)')
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='Concurrent simulated voters (default: 64)')
+        parser.add_argument('--polls', type=int, default=1,
+                            help='Live results polls per voter after voting (default: 1)')
+        parser.add_argument('--seed', type=int,
+                            help='Random seed for reproducible ballots')
+        parser.add_argument('--clobber', action='store_true',
+                            help='Drop a leftover scratch database without asking')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+
+        with scratch_database(clobber=options['clobber']):
+            started = time.perf_counter()
+            election = create_synthetic_election(
+                options['voters'], options['positions'], options['candidates_per_position']
+            )
+            self.stdout.write(
+                f'Created {options["voters"]} voters, {options["positions"]} positions and '
+                f'{options["positions"] * options["candidates_per_position"]} candidates '
+                f'in {time.perf_counter() - started:.1f}s'
+            )
+
+            tokens = list(election.voters().values_list('token', flat=True))
+            # Failed requests are counted per endpoint instead of logged one by one
+            request_logger = logging.getLogger('django.request')
+            previous_level = request_logger.level
+            request_logger.setLevel(logging.CRITICAL)
+            try:
+                samples, failures, elapsed = self.run(
+                    tokens, election, options['concurrency'], options['polls']
+                )
+            finally:
+                request_logger.setLevel(previous_level)
+
+            voted = Voter.objects.filter(has_voted=True).count()
+            votes = Vote.objects.count()
+            counted = ElectionStats.get_stats().total_voted
+
+        self.report(samples, failures, elapsed, options['concurrency'], voted)
+        if counted != voted:
+            self.stdout.write(self.style.ERROR(
+                f'Inconsistent: turnout counter says {counted} voted, {voted} voters are marked'
+            ))
+        elif votes == voted * options['positions']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Consistent: {voted} of {len(tokens)} voters voted, {votes} votes recorded'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'Inconsistent: {voted} voters marked as voted but {votes} votes recorded '
+                f'(expected {voted * options["positions"]})'
+            ))
+
+    def run(self, tokens, election, concurrency, polls):
+        """Send every voter through the site from ``concurrency`` threads."""
+        pending = queue.Queue()
+        for token in tokens:
+            pending.put(str(token))
+        samples = {}
+        failures = []
+        lock = threading.Lock()
+
+        def simulate_voters():
+            local_samples = {}
+            try:
+                while True:
+                    try:
+                        token = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        self.vote(token, election, polls, local_samples)
+                    except Exception as e:
+                        with lock:
+                            failures.append(e)
+            finally:
+                connection.close()
+                with lock:
+                    for endpoint, measurements in local_samples.items():
+                        samples.setdefault(endpoint, []).extend(measurements)
+
+        threads = [threading.Thread(target=simulate_voters) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, failures, time.perf_counter() - started
+
+    def vote(self, token, election, polls, samples):
+        """One voter's visit: log in, load the ballot, vote, watch the results."""
+        client = local_client(raise_request_exception=False)
+
+        def request(endpoint, method, url, data=None):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                latency = time.perf_counter() - started
+            failed = response.status_code >= 400
+            samples.setdefault(endpoint, []).append((latency, len(queries), failed))
+            if failed:
+                raise RuntimeError(f'{endpoint} returned {response.status_code}')
+            return response
+
+        request('login', 'post', reverse('login_voter'), {'token': token})
+        page = request('vote', 'get', reverse('vote'))
+        key = IDEMPOTENCY_KEY.search(page.content.decode())
+
+        ballot = {
+            f'position_{position_id}': self.random.choice(candidate_ids)
+            for position_id, candidate_ids in election.candidates_by_position.items()
+        }
+        if key:
+            ballot['idempotency_key'] = key.group(1)
+        outcome = request('submit_vote', 'post', reverse('submit_vote'), ballot).json()
+        if not outcome['success']:
+            raise RuntimeError(f'submit_vote failed: {outcome["error"]}')
+
+        for _ in range(polls):
+            request('live_results_api', 'get', reverse('live_results_api'))
+
+    def report(self, samples, failures, elapsed, concurrency, ballots):
+        total = sum(len(measurements) for measurements in samples.values())
+        self.stdout.write(
+            f'\n{total} requests in {elapsed:.1f}s with {concurrency} concurrent voters: '
+            f'{total / elapsed:.0f} requests/s, {ballots / elapsed:.0f} ballots/s'
+        )
+        self.stdout.write(
+            f'{"endpoint":<18}{"requests":>9}{"errors":>8}{"p50 ms":>9}{"p95 ms":>9}'
+            f'{"p99 ms":>9}{"max ms":>9}{"queries":>9}'
+        )
+        for endpoint, measurements in samples.items():
+            latencies = sorted(latency * 1000 for latency, _, _ in measurements)
+            errors = sum(failed for _, _, failed in measurements)
+            queries = statistics.mean(count for _, count, _ in measurements)
+            self.stdout.write(
+                f'{endpoint:<18}{len(latencies):>9}{errors:>8}{percentile(latencies, 50):>9.1f}'
+                f'{percentile(latencies, 95):>9.1f}{percentile(latencies, 99):>9.1f}'
+                f'{latencies[-1]:>9.1f}{queries:>9.1f}'
+            )
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f'{len(failures)} voters failed, first error: {failures[0]}'
+            ))
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[int(index)]
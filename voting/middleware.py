@@ -0,0 +1,36 @@
+"""
+Middleware for the Django Election Voting System.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .clock import use_clock
+
+
+class ElectionClockMiddleware:
+    """
+    Attach a frozen ``ElectionClock`` to each request as ``request.election_clock``.
+
+    The clock is created on first use, so requests that never look at the
+    election (static files, most admin pages) do not load the settings.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_clock() as get_clock:
+            request.election_clock = SimpleLazyObject(get_clock)
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with use_clock() as get_clock:
+            request.election_clock = SimpleLazyObject(get_clock)
+            return await self.get_response(request)
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tallies(apps, schema_editor):
+    """Build tallies for votes cast before the tally table existed."""
+    Vote = apps.get_model('voting', 'Vote')
+    VoteTally = apps.get_model('voting', 'VoteTally')
+    counts = Vote.objects.values('position_id', 'candidate_id').annotate(
+        total=models.Count('id')
+    ).order_by()
+    VoteTally.objects.bulk_create([
+        VoteTally(
+            position_id=row['position_id'],
+            candidate_id=row['candidate_id'],
+            shard=0,
+            votes=row['total']
+        )
+        for row in counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0004_candidate_photo_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0, help_text='Counter slot used to spread concurrent writes')),
+                ('votes', models.PositiveIntegerField(default=0, help_text='Number of votes recorded in this counter slot')),
+                ('candidate', models.ForeignKey(help_text='The candidate this tally counts votes for', on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='voting.candidate')),
+                ('position', models.ForeignKey(help_text='The position this tally is for', on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='voting.position')),
+            ],
+            options={
+                'verbose_name': 'Vote Tally',
+                'verbose_name_plural': 'Vote Tallies',
+                'db_table': 'voting_vote_tally',
+                'unique_together': {('position', 'candidate', 'shard')},
+            },
+        ),
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
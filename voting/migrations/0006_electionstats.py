@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0005_votetally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElectionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('results_version', models.PositiveBigIntegerField(default=0, help_text='Increases every time the published results change')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Election Statistics',
+                'verbose_name_plural': 'Election Statistics',
+                'db_table': 'voting_election_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0006_electionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinalResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('results_version', models.PositiveBigIntegerField(help_text='Results version the artifact was computed from', unique=True)),
+                ('content_hash', models.CharField(help_text='SHA-256 of the HTML page and JSON payload', max_length=64)),
+                ('html', models.TextField(help_text='Rendered final results page')),
+                ('payload', models.TextField(help_text='Final results as JSON')),
+                ('total_voters', models.PositiveIntegerField()),
+                ('total_voted', models.PositiveIntegerField()),
+                ('finalized_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Final Result',
+                'verbose_name_plural': 'Final Results',
+                'db_table': 'voting_final_result',
+                'ordering': ['-results_version'],
+            },
+        ),
+    ]
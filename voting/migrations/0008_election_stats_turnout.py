@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+def count_turnout(apps, schema_editor):
+    """Fill the turnout counters from the voters registered so far."""
+    ElectionStats = apps.get_model('voting', 'ElectionStats')
+    Voter = apps.get_model('voting', 'Voter')
+    counts = Voter.objects.aggregate(
+        total=models.Count('id'),
+        voted=models.Count('id', filter=models.Q(has_voted=True))
+    )
+    stats, created = ElectionStats.objects.get_or_create(id=1)
+    stats.total_voters = counts['total']
+    stats.total_voted = counts['voted']
+    stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0007_finalresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electionstats',
+            name='total_voted',
+            field=models.PositiveIntegerField(default=0, help_text='Number of voters who have voted'),
+        ),
+        migrations.AddField(
+            model_name='electionstats',
+            name='total_voters',
+            field=models.PositiveIntegerField(default=0, help_text='Number of registered voters'),
+        ),
+        migrations.RunPython(count_turnout, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncMinute
+
+
+def fill_rollups(apps, schema_editor):
+    """Bucket the ballots cast so far by the minute their voter voted."""
+    TurnoutRollup = apps.get_model('voting', 'TurnoutRollup')
+    VoteRollup = apps.get_model('voting', 'VoteRollup')
+    Voter = apps.get_model('voting', 'Voter')
+    Vote = apps.get_model('voting', 'Vote')
+    turnout = Voter.objects.filter(has_voted=True, voted_at__isnull=False).annotate(
+        minute=TruncMinute('voted_at')
+    ).order_by().values('minute').annotate(ballots=models.Count('id'))
+    TurnoutRollup.objects.bulk_create(
+        TurnoutRollup(minute=row['minute'], ballots=row['ballots']) for row in turnout
+    )
+    votes = Vote.objects.annotate(
+        minute=TruncMinute(Coalesce('voter__voted_at', 'voted_at'))
+    ).order_by().values('minute', 'position_id', 'candidate_id').annotate(votes=models.Count('id'))
+    VoteRollup.objects.bulk_create(
+        VoteRollup(
+            minute=row['minute'], position_id=row['position_id'],
+            candidate_id=row['candidate_id'], votes=row['votes']
+        )
+        for row in votes
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0008_election_stats_turnout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoutRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField(help_text='Start of the minute the ballots were cast in')),
+                ('shard', models.PositiveSmallIntegerField(default=0, help_text='Counter slot used to spread concurrent writes')),
+                ('ballots', models.PositiveIntegerField(default=0, help_text='Number of ballots cast in this minute and counter slot')),
+            ],
+            options={
+                'verbose_name': 'Turnout Rollup',
+                'verbose_name_plural': 'Turnout Rollups',
+                'db_table': 'voting_turnout_rollup',
+                'unique_together': {('minute', 'shard')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField(help_text='Start of the minute the votes were cast in')),
+                ('shard', models.PositiveSmallIntegerField(default=0, help_text='Counter slot used to spread concurrent writes')),
+                ('votes', models.PositiveIntegerField(default=0, help_text='Number of votes cast in this minute and counter slot')),
+                ('candidate', models.ForeignKey(help_text='The candidate the votes are for', on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='voting.candidate')),
+                ('position', models.ForeignKey(help_text='The position the votes are for', on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='voting.position')),
+            ],
+            options={
+                'verbose_name': 'Vote Rollup',
+                'verbose_name_plural': 'Vote Rollups',
+                'db_table': 'voting_vote_rollup',
+                'unique_together': {('minute', 'position', 'candidate', 'shard')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0009_turnout_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='vote',
+            options={'ordering': ['-voted_at', 'id'], 'verbose_name': 'Vote', 'verbose_name_plural': 'Votes'},
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['position', 'candidate'], name='vote_position_candidate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['-voted_at', 'id'], name='vote_voted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(condition=models.Q(('has_voted', True)), fields=['voted_at'], name='voter_voted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voterollup',
+            index=models.Index(fields=['position', 'candidate', 'minute'], name='vote_rollup_candidate_idx'),
+        ),
+    ]
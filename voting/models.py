@@ -11,8 +11,11 @@ voters, candidates, and votes with proper relati    photo = models.ImageField(
     )s and constraints.
 """
 
+import copy
+import time
 import uuid
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
@@ -76,16 +79,47 @@ class Voter(models.Model):
         verbose_name = 'Voter'
         verbose_name_plural = 'Voters'
         ordering = ['name']
+        indexes = [
+            # Only voters who have voted; not created on databases without
+            # partial indexes
+            models.Index(
+                fields=['voted_at'], name='voter_voted_idx', condition=models.Q(has_voted=True)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.reg_no})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status, so saves can adjust the turnout counters
+        instance._stored_has_voted = instance.__dict__.get('has_voted')
+        return instance
+
     def mark_as_voted(self):
         """Mark this voter as having voted and set the timestamp."""
         self.has_voted = True
         self.voted_at = timezone.now()
         self.save()
 
+    def claim_ballot(self, now=None):
+        """
+        Atomically mark this voter as having voted, unless they already have.
+
+        A single conditional UPDATE, so of several concurrent requests for
+        the same voter exactly one gets True. Call it inside the ballot's
+        transaction so a rejected ballot releases the claim again.
+        """
+        now = now or timezone.now()
+        claimed = Voter.objects.filter(pk=self.pk, has_voted=False).update(
+            has_voted=True, voted_at=now, updated_at=now
+        )
+        if claimed:
+            self.has_voted = self._stored_has_voted = True
+            self.voted_at = now
+        return bool(claimed)
+
 
 class Position(models.Model):
     """
@@ -135,23 +169,23 @@ class Position(models.Model):
             raise ValidationError("End time must be after start time.")
 
     def is_voting_open(self):
-        """Check if voting is currently open (uses global election timing)."""
+        """Check if voting is currently open (uses the request's election clock)."""
+        from .clock import get_clock
         if not self.is_active:
             return False
-        settings = ElectionSettings.get_settings()
-        return settings.is_voting_open()
+        return get_clock().is_voting_open
 
     def is_voting_ended(self):
-        """Check if voting has ended (uses global election timing)."""
-        settings = ElectionSettings.get_settings()
-        return settings.is_voting_ended()
+        """Check if voting has ended (uses the request's election clock)."""
+        from .clock import get_clock
+        return get_clock().is_voting_ended
 
     def get_status(self):
-        """Get the current status of voting (uses global election timing)."""
+        """Get the current status of voting (uses the request's election clock)."""
+        from .clock import get_clock
         if not self.is_active:
             return "Inactive"
-        settings = ElectionSettings.get_settings()
-        return settings.get_voting_status()
+        return get_clock().status
 
 
 class Candidate(models.Model):
@@ -360,7 +394,12 @@ class Vote(models.Model):
         verbose_name = 'Vote'
         verbose_name_plural = 'Votes'
         unique_together = ['voter', 'position']  # One vote per voter per position
-        ordering = ['-voted_at']
+        ordering = ['-voted_at', 'id']
+        indexes = [
+            models.Index(fields=['position', 'candidate'], name='vote_position_candidate_idx'),
+            # Newest first, as the audit trail and the admin list them
+            models.Index(fields=['-voted_at', 'id'], name='vote_voted_at_idx'),
+        ]
 
     def __str__(self):
         return f"Vote by {self.voter.name} for {self.candidate.name} ({self.position.title})"
@@ -374,10 +413,274 @@ class Vote(models.Model):
                 )
 
 
+def add_to_counters(model, key_fields, count_field, increments):
+    """
+    Atomically add ``{key: count}`` to the counter rows of ``model``.
+
+    Each key holds the values of ``key_fields``, which must be unique
+    together. Existing rows are incremented in place; missing rows are
+    created at zero and incremented afterwards, so a row created
+    concurrently by another transaction is never overwritten.
+    """
+    missing = []
+    for key, count in increments.items():
+        lookup = dict(zip(key_fields, key))
+        updated = model.objects.filter(**lookup).update(
+            **{count_field: models.F(count_field) + count}
+        )
+        if not updated:
+            missing.append((lookup, count))
+
+    if missing:
+        model.objects.bulk_create(
+            [model(**lookup) for lookup, _ in missing], ignore_conflicts=True
+        )
+        for lookup, count in missing:
+            model.objects.filter(**lookup).update(
+                **{count_field: models.F(count_field) + count}
+            )
+
+
+def take_from_counters(rows, count_field, count):
+    """
+    Subtract ``count`` from the counter rows in ``rows``, spread over its shards.
+
+    Never takes a row below zero. Returns how much could not be taken.
+    """
+    for pk, value in rows.filter(**{f'{count_field}__gt': 0}).values_list('pk', count_field):
+        take = min(value, count)
+        updated = rows.filter(pk=pk, **{f'{count_field}__gte': take}).update(
+            **{count_field: models.F(count_field) - take}
+        )
+        if updated:
+            count -= take
+        if not count:
+            break
+    return count
+
+
+def truncate_to_minute(moment):
+    """Get the start of the minute ``moment`` falls in (its rollup bucket)."""
+    return moment.replace(second=0, microsecond=0)
+
+
+class VoteTally(models.Model):
+    """
+    Materialized vote count for a candidate in a specific position.
+
+    Counts are spread over ``VOTE_TALLY_SHARDS`` counter slots so that
+    concurrent ballots for the same candidate update different rows.
+    The candidate's total is the sum of all of its shards.
+    """
+    position = models.ForeignKey(
+        Position,
+        on_delete=models.CASCADE,
+        related_name='tallies',
+        help_text="The position this tally is for"
+    )
+    candidate = models.ForeignKey(
+        Candidate,
+        on_delete=models.CASCADE,
+        related_name='tallies',
+        help_text="The candidate this tally counts votes for"
+    )
+    shard = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Counter slot used to spread concurrent writes"
+    )
+    votes = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of votes recorded in this counter slot"
+    )
+
+    class Meta:
+        db_table = 'voting_vote_tally'
+        verbose_name = 'Vote Tally'
+        verbose_name_plural = 'Vote Tallies'
+        unique_together = ['position', 'candidate', 'shard']
+
+    def __str__(self):
+        return f"{self.candidate_id} in {self.position_id} [shard {self.shard}]: {self.votes}"
+
+    @staticmethod
+    def shard_for(voter_id):
+        """Get the counter slot a voter's votes are recorded in."""
+        from django.conf import settings
+        shards = max(1, getattr(settings, 'VOTE_TALLY_SHARDS', 1))
+        return voter_id % shards
+
+    @classmethod
+    def record_votes(cls, votes):
+        """
+        Atomically add votes to the tally.
+
+        Must be called inside the transaction that creates the votes so the
+        tally never disagrees with the vote table.
+        """
+        increments = {}
+        for vote in votes:
+            key = (vote.position_id, vote.candidate_id, cls.shard_for(vote.voter_id))
+            increments[key] = increments.get(key, 0) + 1
+        add_to_counters(cls, ('position_id', 'candidate_id', 'shard'), 'votes', increments)
+
+    @classmethod
+    def remove_vote(cls, vote):
+        """Take a deleted vote back out of the tally."""
+        tallies = cls.objects.filter(
+            position_id=vote.position_id, candidate_id=vote.candidate_id, votes__gt=0
+        )
+        updated = tallies.filter(shard=cls.shard_for(vote.voter_id)).update(
+            votes=models.F('votes') - 1
+        )
+        if not updated:
+            # The shard count may have changed since the vote was recorded
+            tally = tallies.order_by('-votes').first()
+            if tally:
+                tallies.filter(pk=tally.pk).update(votes=models.F('votes') - 1)
+
+    @classmethod
+    def totals(cls):
+        """Get the total votes per ``(position_id, candidate_id)``."""
+        rows = cls.objects.values('position_id', 'candidate_id').annotate(
+            total=models.Sum('votes')
+        )
+        return {(row['position_id'], row['candidate_id']): row['total'] for row in rows}
+
+
+class TurnoutRollup(models.Model):
+    """
+    Number of ballots cast in one minute.
+
+    Written in the ballot's own transaction, so the cumulative sum of the
+    buckets up to a minute is the turnout at the end of that minute without
+    reading the voters table. Counts are spread over the same counter slots
+    as ``VoteTally``.
+    """
+    minute = models.DateTimeField(help_text="Start of the minute the ballots were cast in")
+    shard = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Counter slot used to spread concurrent writes"
+    )
+    ballots = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of ballots cast in this minute and counter slot"
+    )
+
+    class Meta:
+        db_table = 'voting_turnout_rollup'
+        verbose_name = 'Turnout Rollup'
+        verbose_name_plural = 'Turnout Rollups'
+        unique_together = ['minute', 'shard']
+
+    def __str__(self):
+        return f"{self.minute:%Y-%m-%d %H:%M} [shard {self.shard}]: {self.ballots}"
+
+    @classmethod
+    def record_ballots(cls, ballots):
+        """
+        Add ballots, given as ``(voter_id, voted_at)``, to their minutes.
+
+        Must be called inside the transaction that records the ballots.
+        """
+        increments = {}
+        for voter_id, voted_at in ballots:
+            key = (truncate_to_minute(voted_at), VoteTally.shard_for(voter_id))
+            increments[key] = increments.get(key, 0) + 1
+        add_to_counters(cls, ('minute', 'shard'), 'ballots', increments)
+
+    @classmethod
+    def remove_ballots(cls, voted_at, count=1):
+        """Take withdrawn ballots back out, from the minute they were cast in if possible."""
+        if voted_at is not None:
+            count = take_from_counters(
+                cls.objects.filter(minute=truncate_to_minute(voted_at)), 'ballots', count
+            )
+        if count:
+            # The ballot's minute is unknown or already empty
+            take_from_counters(cls.objects.order_by('-minute'), 'ballots', count)
+
+
+class VoteRollup(models.Model):
+    """
+    Votes for a candidate in a position cast in one minute.
+
+    The per-position, per-minute companion of ``TurnoutRollup``: summing the
+    buckets up to a minute gives the standings as of that minute.
+    """
+    minute = models.DateTimeField(help_text="Start of the minute the votes were cast in")
+    position = models.ForeignKey(
+        Position,
+        on_delete=models.CASCADE,
+        related_name='rollups',
+        help_text="The position the votes are for"
+    )
+    candidate = models.ForeignKey(
+        Candidate,
+        on_delete=models.CASCADE,
+        related_name='rollups',
+        help_text="The candidate the votes are for"
+    )
+    shard = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Counter slot used to spread concurrent writes"
+    )
+    votes = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of votes cast in this minute and counter slot"
+    )
+
+    class Meta:
+        db_table = 'voting_vote_rollup'
+        verbose_name = 'Vote Rollup'
+        verbose_name_plural = 'Vote Rollups'
+        unique_together = ['minute', 'position', 'candidate', 'shard']
+        indexes = [
+            # The results as of a minute sum one candidacy's buckets up to it
+            models.Index(fields=['position', 'candidate', 'minute'], name='vote_rollup_candidate_idx'),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.candidate_id} in {self.position_id} at {self.minute:%Y-%m-%d %H:%M} "
+            f"[shard {self.shard}]: {self.votes}"
+        )
+
+    @classmethod
+    def record_ballots(cls, ballots):
+        """
+        Add ballots, given as ``(voted_at, votes)``, to their minutes.
+
+        Must be called inside the transaction that creates the votes.
+        """
+        increments = {}
+        for voted_at, votes in ballots:
+            minute = truncate_to_minute(voted_at)
+            for vote in votes:
+                key = (minute, vote.position_id, vote.candidate_id, VoteTally.shard_for(vote.voter_id))
+                increments[key] = increments.get(key, 0) + 1
+        add_to_counters(cls, ('minute', 'position_id', 'candidate_id', 'shard'), 'votes', increments)
+
+    @classmethod
+    def remove_vote(cls, vote):
+        """Take a deleted vote back out, from the minute it was cast in if possible."""
+        rollups = cls.objects.filter(position_id=vote.position_id, candidate_id=vote.candidate_id)
+        count = take_from_counters(
+            rollups.filter(minute=truncate_to_minute(vote.voted_at)), 'votes', 1
+        )
+        if count:
+            # Journaled votes are saved later than their ballot was cast
+            take_from_counters(rollups.order_by('-minute'), 'votes', count)
+
+
 class ElectionSettings(models.Model):
     """
     Model for storing global election settings and configurations.
     """
+    # Shared-cache key whose value changes whenever the settings are saved
+    CACHE_VERSION_KEY = 'voting:election_settings:version'
+    # Per-process copy of the settings: (version stamp, loaded at, instance)
+    _cached = None
+
     election_title = models.CharField(
         max_length=200,
         default="Class Election 2025",
@@ -451,7 +754,12 @@ class ElectionSettings(models.Model):
             existing.voting_end_time = self.voting_end_time
             existing.save()
             return existing
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        self.invalidate_cache()
+        # Bump again once committed, so no worker keeps a row it read
+        # between the save and the commit
+        transaction.on_commit(ElectionSettings.invalidate_cache)
+        return result
 
     @classmethod
     def get_settings(cls):
@@ -467,24 +775,49 @@ class ElectionSettings(models.Model):
         )
         return settings
 
-    def is_voting_open(self):
-        """Check if voting is currently open globally."""
+    @classmethod
+    def get_cached_settings(cls):
+        """
+        Get the election settings from the per-process cache.
+
+        The row is loaded at most once per ``ELECTION_SETTINGS_CACHE_TTL``
+        seconds, and again as soon as the version stamp in the shared cache
+        changes (every save changes it). Returns a copy, so callers cannot
+        alter the cached instance.
+        """
+        from django.conf import settings as django_settings
+        ttl = getattr(django_settings, 'ELECTION_SETTINGS_CACHE_TTL', 30)
+
+        version = cache.get(cls.CACHE_VERSION_KEY)
+        cached = cls._cached
+        if cached is None or cached[0] != version or time.monotonic() - cached[1] >= ttl:
+            cached = cls._cached = (version, time.monotonic(), cls.get_settings())
+        return copy.copy(cached[2])
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Make every process reload the settings on next access."""
+        cls._cached = None
+        cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    def is_voting_open(self, now=None):
+        """Check if voting is open globally (at ``now``, default the current time)."""
         if not self.voting_start_time or not self.voting_end_time:
             return False
-        now = timezone.now()
+        now = now or timezone.now()
         return self.voting_start_time <= now <= self.voting_end_time
 
-    def is_voting_ended(self):
-        """Check if voting has ended globally."""
+    def is_voting_ended(self, now=None):
+        """Check if voting has ended globally (at ``now``, default the current time)."""
         if not self.voting_end_time:
             return False
-        return timezone.now() > self.voting_end_time
+        return (now or timezone.now()) > self.voting_end_time
 
-    def get_voting_status(self):
-        """Get the current global voting status."""
+    def get_voting_status(self, now=None):
+        """Get the global voting status (at ``now``, default the current time)."""
         if not self.voting_start_time or not self.voting_end_time:
             return "Not Configured"
-        now = timezone.now()
+        now = now or timezone.now()
         if now < self.voting_start_time:
             return "Not Started"
         elif self.voting_start_time <= now <= self.voting_end_time:
@@ -497,3 +830,158 @@ class ElectionSettings(models.Model):
         if self.voting_start_time and self.voting_end_time:
             if self.voting_end_time <= self.voting_start_time:
                 raise ValidationError("Voting end time must be after start time.")
+
+
+class ElectionStats(models.Model):
+    """
+    Singleton row of election-wide counters maintained alongside ballots.
+
+    ``results_version`` increases whenever anything shown in the results
+    changes (a ballot commits, voters or candidates are added or removed),
+    so clients can tell whether their copy of the results is current.
+
+    ``total_voters`` and ``total_voted`` are the turnout, kept up to date in
+    the same UPDATE that bumps the version so the turnout never needs a
+    count over the voters table. ``recount_turnout`` repairs any drift.
+    """
+    results_version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Increases every time the published results change"
+    )
+    total_voters = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of registered voters"
+    )
+    total_voted = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of voters who have voted"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'voting_election_stats'
+        verbose_name = 'Election Statistics'
+        verbose_name_plural = 'Election Statistics'
+
+    def __str__(self):
+        return f"Results version {self.results_version}"
+
+    @classmethod
+    def get_stats(cls):
+        """Get the election statistics row, creating it (with the turnout counted) if needed."""
+        stats = cls.objects.filter(id=1).first()
+        if stats is None:
+            total_voters, total_voted = cls.count_turnout()
+            stats, created = cls.objects.get_or_create(id=1, defaults={
+                'total_voters': total_voters,
+                'total_voted': total_voted,
+            })
+        return stats
+
+    @classmethod
+    def get_results_version(cls):
+        """Get the current results version with a single primary-key lookup."""
+        version = cls.objects.filter(id=1).values_list('results_version', flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump_results_version(cls, voters=0, voted=0):
+        """
+        Atomically increase the results version.
+
+        ``voters`` and ``voted`` are added to the turnout counters in the
+        same UPDATE. Call it after the change to the voters, inside the same
+        transaction: if the row has to be created, the turnout is counted
+        then and already includes the change.
+        """
+        changes = {
+            'results_version': models.F('results_version') + 1,
+            'updated_at': timezone.now(),
+        }
+        if voters:
+            changes['total_voters'] = models.F('total_voters') + voters
+        if voted:
+            changes['total_voted'] = models.F('total_voted') + voted
+        updated = cls.objects.filter(id=1).update(**changes)
+        if not updated:
+            cls.get_stats()
+            cls.objects.filter(id=1).update(
+                results_version=models.F('results_version') + 1,
+                updated_at=timezone.now()
+            )
+
+    @staticmethod
+    def count_turnout():
+        """Count ``(total_voters, total_voted)`` from the voters table."""
+        counts = Voter.objects.aggregate(
+            total=models.Count('id'),
+            voted=models.Count('id', filter=models.Q(has_voted=True))
+        )
+        return counts['total'], counts['voted']
+
+    @classmethod
+    def recount_turnout(cls):
+        """
+        Reset the turnout counters to an exact count of the voters.
+
+        Holds the statistics row's lock while counting, so ballots that
+        commit meanwhile are added on top of the count rather than lost.
+        Returns the ``(total_voters, total_voted)`` before and after.
+        """
+        cls.get_stats()
+        with transaction.atomic():
+            stats = cls.objects.select_for_update().get(id=1)
+            before = (stats.total_voters, stats.total_voted)
+            after = cls.count_turnout()
+            if after != before:
+                cls.objects.filter(id=1).update(
+                    total_voters=after[0],
+                    total_voted=after[1],
+                    results_version=models.F('results_version') + 1,
+                    updated_at=timezone.now()
+                )
+        return before, after
+
+
+class FinalResult(models.Model):
+    """
+    Frozen final results, rendered once when the election closes.
+
+    Holds the final results page and JSON exactly as served, so the final
+    results view never reads the vote tables again. A record belongs to the
+    results version it was computed from; anything that changes the results
+    afterwards (an admin resetting voters, say) bumps the version, and the
+    record is no longer current.
+    """
+    results_version = models.PositiveBigIntegerField(
+        unique=True,
+        help_text="Results version the artifact was computed from"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the HTML page and JSON payload"
+    )
+    html = models.TextField(help_text="Rendered final results page")
+    payload = models.TextField(help_text="Final results as JSON")
+    total_voters = models.PositiveIntegerField()
+    total_voted = models.PositiveIntegerField()
+    finalized_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'voting_final_result'
+        verbose_name = 'Final Result'
+        verbose_name_plural = 'Final Results'
+        ordering = ['-results_version']
+
+    def __str__(self):
+        return f"Final results at version {self.results_version} ({self.content_hash[:12]})"
+
+    @classmethod
+    def current(cls):
+        """
+        Get the artifact for the current results version, or None.
+
+        Reads only the election statistics row and this table, in one query.
+        """
+        version = ElectionStats.objects.filter(id=1).values('results_version')
+        return cls.objects.filter(results_version=models.Subquery(version)).first()
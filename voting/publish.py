@@ -0,0 +1,94 @@
+"""
+Static results snapshots for the Django Election Voting System.
+
+The publisher writes the live results JSON and the rendered final results
+page into ``RESULTS_SNAPSHOT_ROOT``, which WhiteNoise serves directly in
+production. Public viewers polling the snapshot never reach a view
+function or the database; one publisher process does that for everyone.
+
+Files are written to a temporary file in the same directory and renamed
+into place, so readers always see either the old or the new snapshot and
+never a partially written one.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings as django_settings
+from django.template.loader import render_to_string
+
+from .clock import ElectionClock
+from .finalize import finalize_results
+from .results import compute_results, results_etag
+
+RESULTS_JSON = 'results.json'
+FINAL_RESULTS_HTML = 'final_results.html'
+
+
+def get_snapshot_root():
+    """Directory the snapshots are published to."""
+    return Path(django_settings.RESULTS_SNAPSHOT_ROOT)
+
+
+def get_snapshot_url(name=RESULTS_JSON):
+    """Public URL of a published snapshot file."""
+    return django_settings.RESULTS_SNAPSHOT_URL + name
+
+
+def write_atomic(path, content):
+    """Replace ``path`` with ``content`` (bytes) in a single rename."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        # mkstemp creates the file owner-only; the web server must read it
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def publish_results(root=None, clock=None):
+    """
+    Publish the current results JSON and final results page.
+
+    Once the election has closed this also finalizes the results (see
+    ``voting.finalize``) and publishes the frozen page.
+
+    Returns the ETag of the published results (None while live results are
+    disabled, in which case the JSON carries the same error as the API).
+    """
+    # Imported here because the views link to the published snapshot
+    from .views import final_results_page
+
+    root = Path(root) if root else get_snapshot_root()
+    if clock is None:
+        clock = ElectionClock()
+
+    etag = results_etag(clock)
+    results = compute_results(clock)
+    if clock.settings.show_live_results:
+        payload = results.to_dict()
+    else:
+        payload = {'error': 'Live results are disabled'}
+    write_atomic(
+        root / RESULTS_JSON,
+        json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    )
+
+    final = finalize_results(clock, (results.total_voters, results.total_voted))
+    if final is not None:
+        html = final.html
+    else:
+        template_name, context = final_results_page(clock, results)
+        html = render_to_string(template_name, context)
+    write_atomic(root / FINAL_RESULTS_HTML, html.encode('utf-8'))
+    return etag
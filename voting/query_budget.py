@@ -0,0 +1,101 @@
+"""
+Query budgets for the views and admin pages.
+
+A page's query count should depend on what kind of page it is, never on
+how many voters, positions, candidates or votes exist. ``query_budget``
+records the queries run inside a block (or a decorated function) and
+fails when there are more than allowed. ``QueryBudgetMixin`` adds
+``assertConstantQueries`` to test cases: it requests a page, grows the
+data, requests it again and fails if the second request needed more
+queries, naming the statements that repeated.
+"""
+
+import re
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Literals stripped from SQL so the same statement for different rows groups together
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more queries than its budget."""
+
+
+def statement_shape(sql):
+    """The SQL with its literal values replaced by ``?``."""
+    return _LITERALS.sub('?', sql)
+
+
+def describe_queries(queries, limit=10):
+    """Summarize captured queries, most repeated statements first."""
+    shapes = Counter(statement_shape(query['sql']) for query in queries)
+    lines = [f'{count}x {sql}' for sql, count in shapes.most_common(limit)]
+    if len(shapes) > limit:
+        lines.append(f'... and {len(shapes) - limit} more distinct statements')
+    return '\n'.join(lines)
+
+
+class query_budget(CaptureQueriesContext, ContextDecorator):
+    """
+    Fail if the enclosed block runs more than ``max_queries`` queries.
+
+    Works as a context manager (which also exposes the captured queries,
+    like ``CaptureQueriesContext``) and as a decorator.
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+        self.max_queries = max_queries
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self) > self.max_queries:
+            raise QueryBudgetExceeded(
+                f'{len(self)} queries run, budget is {self.max_queries}:\n'
+                f'{describe_queries(self.captured_queries)}'
+            )
+
+
+class QueryBudgetMixin:
+    """TestCase mixin asserting that a page's query count does not grow with the data."""
+
+    def capture_request_queries(self, request, using=DEFAULT_DB_ALIAS):
+        """
+        Run ``request()`` twice and return the queries of the second run.
+
+        The first run fills the per-process caches (settings, ballot
+        schema, sessions), so both data sizes are measured warm.
+        """
+        self.assertLess(request().status_code, 400)
+        with CaptureQueriesContext(connections[using]) as queries:
+            response = request()
+        self.assertLess(response.status_code, 400)
+        return queries.captured_queries
+
+    def assertConstantQueries(self, request, grow, max_queries=None, using=DEFAULT_DB_ALIAS):
+        """
+        Assert that ``request()`` runs as many queries after ``grow()`` as before.
+
+        ``request`` makes one request and returns the response; ``grow``
+        adds data. With ``max_queries``, the count must also stay within
+        that budget.
+        """
+        small = self.capture_request_queries(request, using)
+        grow()
+        large = self.capture_request_queries(request, using)
+
+        if len(large) > len(small):
+            extra = Counter(statement_shape(q['sql']) for q in large)
+            extra.subtract(statement_shape(q['sql']) for q in small)
+            self.fail(
+                f'Query count grew with the data from {len(small)} to {len(large)}:\n'
+                + '\n'.join(f'+{count}x {sql}' for sql, count in extra.most_common() if count > 0)
+            )
+        if max_queries is not None and len(large) > max_queries:
+            raise QueryBudgetExceeded(
+                f'{len(large)} queries run, budget is {max_queries}:\n{describe_queries(large)}'
+            )
@@ -0,0 +1,71 @@
+"""
+Query plan checks for the hot queries.
+
+``explain`` gets the database's plan for a queryset or a captured SQL
+statement, and ``QueryPlanMixin.assertUsesIndex`` fails when a query no
+longer uses the index meant for it, so a change to a query or to the
+indexes cannot silently turn an index lookup into a full table scan.
+
+Works on SQLite and PostgreSQL. PostgreSQL's planner rightly prefers
+sequential scans on the tiny tables of a test database, so they are
+disabled while explaining: the plan then shows whether a usable index
+exists for the query, which is what the tests are about.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import QuerySet
+
+# Tables read row by row without any index: "SCAN <table>" on SQLite, "Seq Scan on
+# <table>" on PostgreSQL. Walking a whole index for its order is not counted.
+_FULL_SCANS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def explain(query, using=DEFAULT_DB_ALIAS):
+    """Get the plan for a queryset or an SQL statement (with its parameters inlined) as text."""
+    if isinstance(query, QuerySet):
+        using = query.db
+    connection = connections[using]
+    if connection.vendor not in _FULL_SCANS:
+        raise NotImplementedError(f'Query plans are not supported on {connection.vendor}')
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            if isinstance(query, QuerySet):
+                return query.explain()
+            prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+            cursor.execute(prefix + query)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def full_scans(plan, vendor):
+    """Get the tables a plan reads in full."""
+    return _FULL_SCANS[vendor].findall(plan)
+
+
+class QueryPlanMixin:
+    """TestCase mixin asserting which indexes a query's plan uses."""
+
+    def assertUsesIndex(self, query, index_name, using=DEFAULT_DB_ALIAS):
+        """Assert that the plan for ``query`` (a queryset or SQL) uses ``index_name``."""
+        plan = explain(query, using)
+        if not re.search(rf'\b{re.escape(index_name)}\b', plan):
+            self.fail(self._plan_message(f'Query does not use {index_name}', query, plan))
+
+    def assertNoFullScan(self, query, table, using=DEFAULT_DB_ALIAS):
+        """Assert that the plan for ``query`` does not read all of ``table``."""
+        if isinstance(query, QuerySet):
+            using = query.db
+        plan = explain(query, using)
+        if table in full_scans(plan, connections[using].vendor):
+            self.fail(self._plan_message(f'Query reads all of {table}', query, plan))
+
+    def _plan_message(self, problem, query, plan):
+        sql = query if isinstance(query, str) else query.query
+        return f'{problem}:\n{sql}\n\nPlan:\n{plan}'
@@ -0,0 +1,483 @@
+"""
+Results engine for the Django Election Voting System.
+
+This module computes the standings of every active position in a fixed
+number of queries (one standings query that ranks candidates and totals
+each position with window functions, one read of the results version and
+turnout counters, and the position lookup) and returns an immutable
+snapshot that the results views, the JSON API and the admin all render
+from.
+
+Each snapshot is read from a single database snapshot and labelled with
+the results version it reflects, so the live results API can answer
+``?since=<version>`` with just the counts that changed since then.
+
+``compute_results(as_of=...)`` gives the standings at an earlier time from
+the cumulative per-minute rollups (see ``voting.rollups``) instead of the
+tally, with one more query for the turnout at that time.
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import FrozenSet, Mapping, Optional, Tuple
+
+from django.conf import settings as django_settings
+from django.db import connection, transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, Rank
+
+from .clock import get_clock
+from .models import (
+    Candidate, ElectionStats, Position, TurnoutRollup, VoteRollup, VoteTally, truncate_to_minute
+)
+
+
+@dataclass(frozen=True)
+class CandidateResult:
+    """A candidate's standing within a single position."""
+    id: int
+    name: str
+    reg_no: str
+    photo_url: Optional[str]
+    votes: int
+    percentage: float
+    rank: int
+
+    def to_dict(self):
+        """Serialize for the JSON API."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'votes': self.votes,
+            'percentage': self.percentage,
+            'rank': self.rank,
+        }
+
+
+@dataclass(frozen=True)
+class PositionResult:
+    """Standings for one position, ordered by votes (highest first)."""
+    id: int
+    title: str
+    status: str
+    total_votes: int
+    candidates: Tuple[CandidateResult, ...]
+
+    @property
+    def winners(self):
+        """Candidates sharing first place (empty if nobody has votes)."""
+        if not self.total_votes:
+            return ()
+        return tuple(c for c in self.candidates if c.rank == 1 and c.votes > 0)
+
+    @property
+    def winner(self):
+        """The leading candidate, or None if no votes have been cast."""
+        winners = self.winners
+        return winners[0] if winners else None
+
+    @property
+    def is_tie(self):
+        """Whether more than one candidate shares first place."""
+        return len(self.winners) > 1
+
+    @property
+    def runners_up(self):
+        """Candidates sharing the best rank after first place (empty if none have votes)."""
+        ranks = [c.rank for c in self.candidates if c.rank > 1 and c.votes > 0]
+        return tuple(c for c in self.candidates if ranks and c.rank == ranks[0])
+
+    @property
+    def voted_candidates(self):
+        """Candidates that received at least one vote."""
+        return tuple(c for c in self.candidates if c.votes > 0)
+
+    def to_dict(self):
+        """Serialize for the JSON API."""
+        return {
+            'id': self.id,
+            'position': self.title,
+            'candidates': [c.to_dict() for c in self.candidates],
+            'total_votes': self.total_votes,
+            'status': self.status,
+            'winners': [c.id for c in self.winners],
+            'tie': self.is_tie,
+            'runners_up': [c.id for c in self.runners_up],
+        }
+
+
+@dataclass(frozen=True)
+class ElectionResults:
+    """Immutable snapshot of the whole election's results and turnout."""
+    positions: Tuple[PositionResult, ...]
+    total_voters: int
+    total_voted: int
+    voting_ended_by_time: bool
+    generated_at: object
+    version: int = 0
+
+    @property
+    def pending_voters(self):
+        return self.total_voters - self.total_voted
+
+    @property
+    def turnout_percentage(self):
+        if not self.total_voters:
+            return 0
+        return round((self.total_voted / self.total_voters) * 100, 1)
+
+    @property
+    def all_voters_voted(self):
+        return self.total_voters > 0 and self.total_voted == self.total_voters
+
+    @property
+    def election_ended(self):
+        return self.voting_ended_by_time or self.all_voters_voted
+
+    @property
+    def end_reason(self):
+        """Human readable reason the election ended, or None while running."""
+        if self.all_voters_voted:
+            return "All eligible voters have cast their votes"
+        if self.voting_ended_by_time:
+            return "Voting time period has ended"
+        return None
+
+    def position(self, position_id):
+        """Get the result for a position by id, or None."""
+        for position in self.positions:
+            if position.id == position_id:
+                return position
+        return None
+
+    def to_dict(self):
+        """Serialize for the JSON API."""
+        return {
+            'results': [p.to_dict() for p in self.positions],
+            **self.summary_dict(),
+        }
+
+    def summary_dict(self):
+        """Serialize the turnout and status fields shared with delta payloads."""
+        return {
+            'version': self.version,
+            'total_voters': self.total_voters,
+            'total_voted': self.total_voted,
+            'election_ended': self.election_ended,
+            'end_reason': self.end_reason,
+            'voting_ended_by_time': self.voting_ended_by_time,
+            'all_voters_voted': self.all_voters_voted,
+            'timestamp': self.generated_at.isoformat(),
+        }
+
+
+@dataclass(frozen=True)
+class TallySnapshot:
+    """Vote counts and turnout as of one results version."""
+    version: int
+    tallies: Mapping = field(repr=False)
+    layout: FrozenSet = field(repr=False)
+    total_voters: int
+    total_voted: int
+
+
+class ResultsHistory:
+    """
+    Bounded, per-process record of recent tally snapshots by version.
+
+    Delta payloads are computed against these. A version that has fallen
+    out of the history (or was never seen by this process) simply gets a
+    full snapshot instead.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, snapshot):
+        with self._lock:
+            self._snapshots[snapshot.version] = snapshot
+            self._snapshots.move_to_end(snapshot.version)
+            while len(self._snapshots) > self.size:
+                self._snapshots.popitem(last=False)
+
+    def get(self, version):
+        with self._lock:
+            return self._snapshots.get(version)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+results_history = ResultsHistory(getattr(django_settings, 'LIVE_RESULTS_DELTA_HISTORY', 64))
+
+
+@contextmanager
+def consistent_read():
+    """
+    Run the enclosed reads against a single database snapshot.
+
+    SQLite already gives a read transaction one snapshot; PostgreSQL needs
+    REPEATABLE READ for that, which can only be set by the outermost block.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def get_turnout():
+    """Get ``(total_voters, total_voted)`` from the turnout counters (one primary-key lookup)."""
+    return _read_stats()[1:]
+
+
+def _read_stats():
+    """Get ``(results_version, total_voters, total_voted)`` in a single query."""
+    row = ElectionStats.objects.filter(id=1).values_list(
+        'results_version', 'total_voters', 'total_voted'
+    ).first()
+    return row or (0, 0, 0)
+
+
+def results_etag(clock=None):
+    """
+    Get a strong ETag value for the current live results.
+
+    Combines the results version, which changes whenever a ballot commits,
+    with the global voting status, which changes with the clock. Reading it
+    never touches the vote tables. Returns None while live results are
+    disabled.
+    """
+    if clock is None:
+        clock = get_clock()
+    if not clock.settings.show_live_results:
+        return None
+    status = clock.status.lower().replace(' ', '-')
+    return f"r{ElectionStats.get_results_version()}-{status}"
+
+
+def compute_results(clock=None, as_of=None):
+    """
+    Compute the standings of every active position.
+
+    Status and timestamps come from ``clock`` (default: the current
+    request's ``ElectionClock``).
+
+    With ``as_of`` (a datetime), the votes and turnout are those cast up to
+    the end of that minute, summed from the per-minute rollups; the voters,
+    positions and candidates are the current ones. Such historical results
+    are not recorded in the delta history.
+
+    The number of queries is constant regardless of how many positions,
+    candidates or votes exist.
+    """
+    if clock is None:
+        clock = get_clock()
+
+    with consistent_read():
+        version, total_voters, total_voted = _read_stats()
+        if as_of is not None:
+            total_voted = _turnout_as_of(as_of)
+        positions = list(Position.objects.filter(is_active=True).values_list('id', 'title'))
+        standings = list(_standings(as_of).select_related('candidate'))
+
+    standings_by_position = {}
+    position_totals = {}
+    for standing in standings:
+        standings_by_position.setdefault(standing.position_id, []).append(standing)
+        position_totals[standing.position_id] = standing.position_total
+    if as_of is None:
+        results_history.record(TallySnapshot(
+            version=version,
+            tallies={(s.position_id, s.candidate_id): s.votes for s in standings},
+            layout=frozenset((s.position_id, s.candidate_id) for s in standings),
+            total_voters=total_voters,
+            total_voted=total_voted,
+        ))
+
+    status = clock.status if as_of is None else clock.settings.get_voting_status(as_of)
+
+    position_results = []
+    for position_id, title in positions:
+        total_votes = position_totals.get(position_id, 0)
+        candidate_results = []
+        for standing in standings_by_position.get(position_id, []):
+            candidate = standing.candidate
+            percentage = round((standing.votes / total_votes) * 100, 1) if total_votes else 0
+            candidate_results.append(CandidateResult(
+                id=candidate.id,
+                name=candidate.name,
+                reg_no=candidate.reg_no,
+                photo_url=candidate.get_photo_url(),
+                votes=standing.votes,
+                percentage=percentage,
+                rank=standing.rank,
+            ))
+        position_results.append(PositionResult(
+            id=position_id,
+            title=title,
+            status=status,
+            total_votes=total_votes,
+            candidates=tuple(candidate_results),
+        ))
+
+    return ElectionResults(
+        positions=tuple(position_results),
+        total_voters=total_voters,
+        total_voted=total_voted,
+        voting_ended_by_time=(
+            clock.is_voting_ended if as_of is None else clock.settings.is_voting_ended(as_of)
+        ),
+        generated_at=clock.now if as_of is None else as_of,
+        version=version,
+    )
+
+
+def _turnout_as_of(as_of):
+    """Ballots cast up to the end of ``as_of``'s minute, from the turnout rollups."""
+    return TurnoutRollup.objects.filter(minute__lte=truncate_to_minute(as_of)).aggregate(
+        total=Sum('ballots')
+    )['total'] or 0
+
+
+def _active_memberships():
+    return Candidate.positions.through.objects.filter(
+        position__is_active=True,
+        candidate__is_active=True
+    )
+
+
+def _standings(as_of=None):
+    """
+    Active candidacies with their votes, rank and position total, in one query.
+
+    ``votes`` sums the candidate's tally shards (or, with ``as_of``, its
+    rollup buckets up to that minute); ``rank`` is
+    ``RANK() OVER (PARTITION BY position ORDER BY votes DESC)``, so tied
+    candidates share a rank and the next rank is skipped (1, 1, 3); and
+    ``position_total`` is the windowed ``SUM`` of votes in the position.
+    Rows come in ballot order: by position, then rank, then name.
+    """
+    counters = VoteTally.objects.all()
+    if as_of is not None:
+        counters = VoteRollup.objects.filter(minute__lte=truncate_to_minute(as_of))
+    return _active_memberships().annotate(
+        votes=_counter_total(
+            counters, position=OuterRef('position_id'), candidate=OuterRef('candidate_id')
+        ),
+        rank=Window(Rank(), partition_by=F('position_id'), order_by=F('votes').desc()),
+        position_total=Window(Sum('votes'), partition_by=F('position_id')),
+    ).order_by('position_id', 'rank', 'candidate__name')
+
+
+def _position_totals(tallies):
+    totals = {}
+    for (position_id, _), votes in tallies.items():
+        totals[position_id] = totals.get(position_id, 0) + votes
+    return totals
+
+
+def read_tally_snapshot():
+    """Read the current vote counts, ballot layout and turnout (2 queries)."""
+    with consistent_read():
+        version, total_voters, total_voted = _read_stats()
+        tallies = {
+            (position_id, candidate_id): votes
+            for position_id, candidate_id, votes in _standings().values_list(
+                'position_id', 'candidate_id', 'votes'
+            )
+        }
+    snapshot = TallySnapshot(
+        version=version,
+        tallies=tallies,
+        layout=frozenset(tallies),
+        total_voters=total_voters,
+        total_voted=total_voted,
+    )
+    results_history.record(snapshot)
+    return snapshot
+
+
+def get_delta_max_gap():
+    """Largest version gap still answered with a delta payload."""
+    return getattr(django_settings, 'LIVE_RESULTS_DELTA_MAX_GAP', 200)
+
+
+def compute_results_delta(since, clock=None):
+    """
+    Compute the changes to the live results since version ``since``.
+
+    Returns only the candidates whose counts changed (with absolute counts
+    and their position's new total) plus the turnout fields, or None when
+    the client needs a full snapshot instead: the base version is unknown
+    to this process, too far behind, or positions/candidates were added,
+    removed or (de)activated since.
+    """
+    base = results_history.get(since)
+    if base is None:
+        return None
+    if clock is None:
+        clock = get_clock()
+
+    current = read_tally_snapshot()
+    if current.version - since > get_delta_max_gap() or current.layout != base.layout:
+        return None
+
+    changes = {}
+    for key in current.layout:
+        votes = current.tallies.get(key, 0)
+        if votes != base.tallies.get(key, 0):
+            changes.setdefault(key[0], []).append({'id': key[1], 'votes': votes})
+
+    position_totals = _position_totals(current.tallies)
+    summary = ElectionResults(
+        positions=(),
+        total_voters=current.total_voters,
+        total_voted=current.total_voted,
+        voting_ended_by_time=clock.is_voting_ended,
+        generated_at=clock.now,
+        version=current.version,
+    ).summary_dict()
+    return {
+        'delta': True,
+        'since': since,
+        'changes': [
+            {
+                'id': position_id,
+                'total_votes': position_totals.get(position_id, 0),
+                'candidates': candidates,
+            }
+            for position_id, candidates in sorted(changes.items())
+        ],
+        'status': clock.status,
+        **summary,
+    }
+
+
+def _tally_total(**filters):
+    """Subquery summing tallied votes for the outer row."""
+    return _counter_total(VoteTally.objects.all(), **filters)
+
+
+def _counter_total(counters, **filters):
+    """Subquery summing the ``votes`` of the counter rows matching the outer row."""
+    totals = counters.filter(**filters).order_by().values(
+        next(iter(filters))
+    ).annotate(total=Sum('votes')).values('total')
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+def annotate_position_vote_totals(queryset):
+    """Annotate a Position queryset with ``vote_total`` from the tally."""
+    return queryset.annotate(vote_total=_tally_total(position=OuterRef('pk')))
+
+
+def annotate_candidate_vote_totals(queryset):
+    """Annotate a Candidate queryset with ``vote_total`` from the tally."""
+    return queryset.annotate(vote_total=_tally_total(candidate=OuterRef('pk')))
@@ -0,0 +1,99 @@
+"""
+Retrying transient database errors for the Django Election Voting System.
+
+Under concurrent ballot submissions SQLite reports "database is locked",
+and Postgres aborts transactions with serialization failures and
+deadlocks. These errors say nothing about the ballot itself: running the
+same transaction again a moment later usually succeeds. ``retry_transient``
+does that with a bounded number of attempts and jittered exponential
+backoff, so colliding requests spread out instead of colliding again.
+
+It must wrap the outermost transaction, never code inside one; after an
+error Postgres refuses further statements in the surrounding transaction.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.db import DatabaseError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# SQLite messages for a lock held by another connection
+SQLITE_TRANSIENT_MESSAGES = ('database is locked', 'database table is locked')
+# Postgres SQLSTATEs: serialization_failure, deadlock_detected, lock_not_available
+POSTGRES_TRANSIENT_CODES = {'40001', '40P01', '55P03'}
+
+
+class RetryCounters:
+    """Process-wide counts of retried and abandoned transactions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.retries = 0
+            self.give_ups = 0
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_give_up(self):
+        with self._lock:
+            self.give_ups += 1
+
+    def snapshot(self):
+        """Current counts as a dictionary."""
+        with self._lock:
+            return {'retries': self.retries, 'give_ups': self.give_ups}
+
+
+retry_counters = RetryCounters()
+
+
+def is_transient_error(error):
+    """Whether a database error is worth retrying."""
+    if not isinstance(error, DatabaseError):
+        return False
+    # Django keeps the driver's exception as the cause; psycopg sets SQLSTATE
+    cause = error.__cause__
+    code = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    if code is not None:
+        return code in POSTGRES_TRANSIENT_CODES
+    message = str(error).lower()
+    return isinstance(error, OperationalError) and any(
+        text in message for text in SQLITE_TRANSIENT_MESSAGES
+    )
+
+
+def retry_transient(func, *args, **kwargs):
+    """
+    Call ``func(*args, **kwargs)``, retrying it on transient database errors.
+
+    Makes up to ``DB_RETRY_ATTEMPTS`` attempts, sleeping a random time of up
+    to ``DB_RETRY_BASE_DELAY * 2 ** attempt`` (capped at
+    ``DB_RETRY_MAX_DELAY``) seconds in between. Other errors, and the last
+    transient one, are raised unchanged.
+    """
+    attempts = getattr(django_settings, 'DB_RETRY_ATTEMPTS', 5)
+    base_delay = getattr(django_settings, 'DB_RETRY_BASE_DELAY', 0.01)
+    max_delay = getattr(django_settings, 'DB_RETRY_MAX_DELAY', 0.5)
+
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            if attempt == attempts - 1:
+                retry_counters.record_give_up()
+                logger.warning(f"Giving up after {attempts} attempts: {e}")
+                raise
+            retry_counters.record_retry()
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
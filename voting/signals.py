@@ -0,0 +1,72 @@
+"""
+Signal handlers for the Django Election Voting System.
+
+These keep derived data (such as the materialized vote tallies, the
+per-minute rollups and the results version) in step with changes made
+outside the normal voting flow.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .ballot import invalidate_ballot_schema_on_commit
+from .models import (
+    Candidate, ElectionStats, Position, TurnoutRollup, Vote, Voter, VoteRollup, VoteTally
+)
+
+
+@receiver(post_delete, sender=Vote)
+def remove_deleted_vote_from_tally(sender, instance, **kwargs):
+    """Keep the vote tally in sync when votes are deleted (e.g. voter removal)."""
+    VoteTally.remove_vote(instance)
+    VoteRollup.remove_vote(instance)
+    ElectionStats.bump_results_version()
+
+
+@receiver(post_save, sender=Voter)
+def count_saved_voter(sender, instance, created, **kwargs):
+    """Keep the turnout counters and rollups in step with new voters and voting status edits."""
+    stored = getattr(instance, '_stored_has_voted', None)
+    instance._stored_has_voted = instance.has_voted
+    if created:
+        ElectionStats.bump_results_version(voters=1, voted=int(instance.has_voted))
+    elif stored is not None and stored != instance.has_voted:
+        ElectionStats.bump_results_version(voted=1 if instance.has_voted else -1)
+    else:
+        return
+
+    if instance.has_voted:
+        TurnoutRollup.record_ballots([(instance.pk, instance.voted_at or timezone.now())])
+    elif not created:
+        TurnoutRollup.remove_ballots(instance.voted_at)
+
+
+@receiver(post_delete, sender=Voter)
+def count_deleted_voter(sender, instance, **kwargs):
+    """Take a deleted voter out of the turnout counters and rollups."""
+    ElectionStats.bump_results_version(voters=-1, voted=-int(instance.has_voted))
+    if instance.has_voted:
+        TurnoutRollup.remove_ballots(instance.voted_at)
+
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+@receiver(m2m_changed, sender=Candidate.positions.through)
+def bump_results_version_on_change(sender, **kwargs):
+    """Any change to voters, positions or candidates changes the results."""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        ElectionStats.bump_results_version()
+
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+@receiver(m2m_changed, sender=Candidate.positions.through)
+def invalidate_ballot_schema_on_change(sender, **kwargs):
+    """Positions and candidates make up the compiled ballot schema."""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_ballot_schema_on_commit()
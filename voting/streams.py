@@ -0,0 +1,134 @@
+"""
+Server-Sent Events streaming of live results for the Django Election Voting System.
+
+Each worker process runs a single change detector per event loop. The
+detector checks the results ETag once per tick and, when it changes,
+builds one results frame that is fanned out to every connected client.
+Hundreds of open results screens therefore cost one cheap query per tick
+instead of one per client.
+
+Streaming requires the ASGI entry point (``election_system.asgi``).
+"""
+
+import asyncio
+import json
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+
+from .clock import ElectionClock
+from .results import compute_results, results_etag
+
+
+def get_stream_tick():
+    """Seconds between change checks of the shared detector."""
+    return getattr(django_settings, 'LIVE_RESULTS_STREAM_TICK', 2)
+
+
+def get_stream_heartbeat():
+    """Seconds of silence after which a keep-alive comment is sent."""
+    return getattr(django_settings, 'LIVE_RESULTS_STREAM_HEARTBEAT', 15)
+
+
+def format_event(data, event='results', event_id=None):
+    """Encode a payload as a Server-Sent Events frame."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+
+def _load_frame(known_etag):
+    """Load the current ETag and, if it changed, a freshly encoded frame."""
+    # A fresh clock per tick; the detector outlives the request that started it
+    clock = ElectionClock()
+    etag = results_etag(clock)
+    if etag == known_etag:
+        return etag, None
+    if etag is None:
+        return etag, format_event({'error': 'Live results are disabled'}, event='disabled')
+    return etag, format_event(compute_results(clock).to_dict(), event_id=etag)
+
+
+class ResultsBroadcaster:
+    """
+    Shared change detector that fans results frames out to subscribers.
+
+    The detector task only runs while at least one client is subscribed.
+    Each subscriber gets a single-slot queue that always holds the newest
+    frame, so a slow client skips intermediate frames instead of building
+    up a backlog.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.etag = None
+        self.frame = None
+        self.checks = 0
+        self._task = None
+
+    def subscribe(self, last_event_id=None):
+        """Register a client and return the queue its frames arrive on."""
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        if self.frame is not None and self.etag != last_event_id:
+            queue.put_nowait(self.frame)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Remove a client; the detector stops once nobody is listening."""
+        self.subscribers.discard(queue)
+
+    def publish(self, frame):
+        """Hand the newest frame to every subscriber."""
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    async def _run(self):
+        while self.subscribers:
+            etag, frame = await sync_to_async(_load_frame)(self.etag)
+            self.checks += 1
+            if frame is not None:
+                self.etag = etag
+                self.frame = frame
+                self.publish(frame)
+            await asyncio.sleep(get_stream_tick())
+        # Forget the last frame so a later first subscriber gets fresh data
+        self.etag = None
+        self.frame = None
+
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster():
+    """Get the broadcaster for the running event loop."""
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None:
+        broadcaster = _broadcasters[loop] = ResultsBroadcaster()
+    return broadcaster
+
+
+async def stream_results(last_event_id=None):
+    """Yield SSE frames for one client until it disconnects."""
+    broadcaster = get_broadcaster()
+    queue = broadcaster.subscribe(last_event_id)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout=get_stream_heartbeat())
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield frame
+    finally:
+        broadcaster.unsubscribe(queue)
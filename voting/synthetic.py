@@ -0,0 +1,126 @@
+"""
+Synthetic elections for load tests and benchmarks.
+
+``scratch_database`` runs code against a throwaway database with the
+project's schema (a temporary file for SQLite, ``test_<name>`` otherwise),
+so rehearsals never touch real election data. ``create_synthetic_election``
+fills it with an open election of any size using bulk inserts, and
+``local_client`` drives the site in-process through the real URL stack.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings as django_settings
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+
+from .ballot import invalidate_ballot_schema
+from .models import Candidate, ElectionSettings, ElectionStats, Position, Voter
+
+# Registration number prefix of synthetic voters and candidates
+REG_NO_PREFIX = 'SIM-'
+
+
+@dataclass
+class SyntheticElection:
+    """Ids of a synthetic election's ballot: candidate ids per position id."""
+    candidates_by_position: Dict[int, List[int]]
+    voter_count: int
+
+    def voters(self):
+        """Queryset of the synthetic voters."""
+        return Voter.objects.filter(reg_no__startswith=REG_NO_PREFIX).order_by('id')
+
+
+@contextmanager
+def scratch_database(clobber=False):
+    """
+    Create a fresh database with all migrations applied, and drop it afterwards.
+
+    If the scratch database already exists (``test_<name>`` on a database
+    server), Django asks before dropping it unless ``clobber`` is set. The
+    connection's test settings are restored on the way out.
+    """
+    settings_dict = connection.settings_dict
+    test_settings = dict(settings_dict['TEST'])
+    temp_dir = None
+    try:
+        if connection.vendor == 'sqlite':
+            # A file rather than memory, so every commit pays its real fsync
+            temp_dir = tempfile.mkdtemp(prefix='eesa-vote-')
+            settings_dict['TEST']['NAME'] = os.path.join(temp_dir, 'scratch.sqlite3')
+
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=clobber, serialize=False
+        )
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        settings_dict['TEST'].clear()
+        settings_dict['TEST'].update(test_settings)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def local_client(**defaults):
+    """A test Client whose requests carry a host the settings allow."""
+    host = next(
+        (host.lstrip('.') for host in django_settings.ALLOWED_HOSTS if host != '*'),
+        'localhost'  # allowed by default while DEBUG is on
+    )
+    return Client(SERVER_NAME=host, **defaults)
+
+
+def create_synthetic_election(voters, positions, candidates_per_position, batch_size=2000):
+    """Create an open election with bulk inserts; signals are not sent."""
+    now = timezone.now()
+    election = ElectionSettings.get_settings()
+    election.voting_start_time = now - timedelta(hours=1)
+    election.voting_end_time = now + timedelta(hours=12)
+    election.show_live_results = True
+    election.save()
+
+    created_positions = Position.objects.bulk_create([
+        Position(
+            title=f'Position {p + 1}',
+            start_time=election.voting_start_time,
+            end_time=election.voting_end_time,
+        )
+        for p in range(positions)
+    ])
+    candidates = Candidate.objects.bulk_create([
+        Candidate(name=f'Candidate {p + 1}.{c + 1}', reg_no=f'{REG_NO_PREFIX}C{p + 1}-{c + 1}')
+        for p in range(positions)
+        for c in range(candidates_per_position)
+    ])
+
+    candidates_by_position = {}
+    memberships = []
+    for index, candidate in enumerate(candidates):
+        position = created_positions[index // candidates_per_position]
+        candidates_by_position.setdefault(position.id, []).append(candidate.id)
+        memberships.append(
+            Candidate.positions.through(candidate_id=candidate.id, position_id=position.id)
+        )
+    Candidate.positions.through.objects.bulk_create(memberships)
+
+    Voter.objects.bulk_create(
+        [Voter(name=f'Voter {i + 1}', reg_no=f'{REG_NO_PREFIX}{i + 1:07d}') for i in range(voters)],
+        batch_size=batch_size
+    )
+
+    # Bulk inserts skip the signal handlers that normally do this
+    invalidate_ballot_schema()
+    ElectionStats.recount_turnout()
+    ElectionStats.bump_results_version()
+    return SyntheticElection(candidates_by_position, voters)
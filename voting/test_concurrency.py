@@ -0,0 +1,161 @@
+"""
+Concurrency tests for the EESA Election Voting System.
+
+These tests fire real parallel ``submit_vote`` requests from threads
+against the file-backed test database and check that the double-vote
+guard holds:
+- Exactly one ballot is accepted per voter, however many requests race
+- Vote tallies match the Vote rows
+- No voter is marked as voted without votes, or the other way round
+
+They also report p50/p95 request latency, to make regressions in the
+ballot write path visible.
+"""
+
+import statistics
+import sys
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import Client
+from django.urls import reverse
+
+from .models import (
+    ElectionStats, Position, Candidate, TurnoutRollup, Voter, Vote, VoteRollup, VoteTally
+)
+from .tests import ElectionTransactionTestCase
+
+
+class ConcurrentVotingTest(ElectionTransactionTestCase):
+    """Test the double-vote guard under parallel submissions."""
+
+    # Parallel requests for one voter, and voters submitting once each
+    SAME_VOTER_REQUESTS = 10
+    OTHER_VOTERS = 20
+
+    def setUp(self):
+        """Set up an open election with three positions of two candidates."""
+        self.open_election()
+
+        self.ballot = {}
+        for i in range(3):
+            position = Position.objects.create(title=f"Position {i}")
+            for j in range(2):
+                candidate = Candidate.objects.create(name=f"Candidate {i}-{j}", reg_no=f"C{i}{j}")
+                candidate.positions.add(position)
+            self.ballot[f'position_{position.id}'] = candidate.id
+
+        self.voters = [
+            Voter.objects.create(name=f"Voter {i}", reg_no=f"VOTER{i:03d}")
+            for i in range(self.OTHER_VOTERS + 1)
+        ]
+
+    def login(self, voter):
+        """Create a session for ``voter`` and return its key."""
+        session = SessionStore()
+        session['voter_token'] = str(voter.token)
+        session.create()
+        return session.session_key
+
+    def submit_in_parallel(self, session_keys):
+        """POST the ballot once per session key, all threads starting together."""
+        start = threading.Barrier(len(session_keys))
+        results = [None] * len(session_keys)
+
+        def submit(index, session_key):
+            client = Client()
+            client.cookies[django_settings.SESSION_COOKIE_NAME] = session_key
+            try:
+                start.wait()
+                started = time.perf_counter()
+                response = client.post(reverse('submit_vote'), self.ballot)
+                results[index] = (response.json(), time.perf_counter() - started)
+            except Exception as e:
+                results[index] = (e, None)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=submit, args=(index, session_key))
+            for index, session_key in enumerate(session_keys)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report_latency(self, label, latencies):
+        """Write p50/p95 latency to stderr alongside the test output."""
+        latencies = sorted(latencies)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        sys.stderr.write(
+            f"\n{label}: {len(latencies)} requests, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms\n"
+        )
+
+    def assert_consistent(self):
+        """Check votes, has_voted flags, tallies and rollups agree with each other."""
+        positions = len(self.ballot)
+        votes_per_voter = dict(
+            Vote.objects.values_list('voter').annotate(count=Count('id'))
+        )
+
+        self.assertTrue(all(count == positions for count in votes_per_voter.values()))
+        self.assertEqual(
+            set(Voter.objects.filter(has_voted=True).values_list('id', flat=True)),
+            set(votes_per_voter)
+        )
+
+        vote_counts = {
+            (row['position_id'], row['candidate_id']): row['count']
+            for row in Vote.objects.values('position_id', 'candidate_id').annotate(count=Count('id'))
+        }
+        tallies = {key: total for key, total in VoteTally.totals().items() if total}
+        self.assertEqual(tallies, vote_counts)
+        self.assertEqual(ElectionStats.get_stats().total_voted, len(votes_per_voter))
+
+        rollups = {
+            (row['position_id'], row['candidate_id']): row['total']
+            for row in VoteRollup.objects.values('position_id', 'candidate_id').annotate(
+                total=Sum('votes')
+            )
+        }
+        self.assertEqual({key: total for key, total in rollups.items() if total}, vote_counts)
+        self.assertEqual(
+            TurnoutRollup.objects.aggregate(total=Sum('ballots'))['total'] or 0, len(votes_per_voter)
+        )
+
+    def test_parallel_submissions_for_one_voter(self):
+        """Test that one of N racing requests for the same voter wins."""
+        session_key = self.login(self.voters[0])
+
+        results = self.submit_in_parallel([session_key] * self.SAME_VOTER_REQUESTS)
+
+        outcomes = [outcome for outcome, _ in results]
+        self.assertTrue(all(isinstance(outcome, dict) for outcome in outcomes), outcomes)
+        self.assertEqual(sum(outcome['success'] for outcome in outcomes), 1)
+        self.assertEqual(Vote.objects.filter(voter=self.voters[0]).count(), len(self.ballot))
+        self.assert_consistent()
+        self.report_latency("Same voter", [latency for _, latency in results])
+
+    def test_parallel_submissions_mixed(self):
+        """Test racing duplicate requests alongside many different voters."""
+        session_keys = [self.login(voter) for voter in self.voters]
+        # The first voter submits N times, everyone else once
+        requests = [session_keys[0]] * self.SAME_VOTER_REQUESTS + session_keys[1:]
+
+        results = self.submit_in_parallel(requests)
+
+        outcomes = [outcome for outcome, _ in results]
+        self.assertTrue(all(isinstance(outcome, dict) for outcome in outcomes), outcomes)
+        duplicates = outcomes[:self.SAME_VOTER_REQUESTS]
+        self.assertEqual(sum(outcome['success'] for outcome in duplicates), 1)
+        self.assertTrue(all(outcome['success'] for outcome in outcomes[self.SAME_VOTER_REQUESTS:]))
+        self.assertEqual(Voter.objects.filter(has_voted=True).count(), len(self.voters))
+        self.assert_consistent()
+        self.report_latency("Mixed voters", [latency for _, latency in results])
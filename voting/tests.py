@@ -10,7 +10,7 @@ This test suite covers:
 - Administrative features
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
@@ -23,11 +23,44 @@ import uuid
 import json
 
 from .models import (
-    ElectionSettings, Position, Candidate, Voter, Vote
+    ElectionSettings, ElectionStats, Position, Candidate, Voter, Vote, VoteTally
 )
+from .ballot import invalidate_ballot_schema
+from .query_budget import QueryBudgetMixin
+from .query_plans import QueryPlanMixin
+from .results import results_history
 
 
-class ElectionSettingsModelTest(TestCase):
+class ElectionCachesMixin:
+    """Start every test with empty per-process caches."""
+    
+    @classmethod
+    def _pre_setup(cls):
+        super()._pre_setup()
+        ElectionSettings.invalidate_cache()
+        invalidate_ballot_schema()
+        results_history.clear()
+    
+    def open_election(self, **fields):
+        """Open voting from an hour ago until a day later; ``fields`` set other settings."""
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = timezone.now() - timedelta(hours=1)
+        settings.voting_end_time = timezone.now() + timedelta(hours=23)
+        for name, value in fields.items():
+            setattr(settings, name, value)
+        settings.save()
+        return settings
+
+
+class ElectionTestCase(ElectionCachesMixin, TestCase):
+    """TestCase that starts every test with empty per-process caches."""
+
+
+class ElectionTransactionTestCase(ElectionCachesMixin, TransactionTestCase):
+    """TransactionTestCase (real commits, for threaded tests) with empty caches."""
+
+
+class ElectionSettingsModelTest(ElectionTestCase):
     """Test the ElectionSettings model functionality."""
     
     def test_singleton_pattern(self):
@@ -47,7 +80,104 @@ class ElectionSettingsModelTest(TestCase):
         self.assertEqual(settings.results_refresh_interval, 30)
 
 
-class PositionModelTest(TestCase):
+class ElectionSettingsCacheTest(ElectionTestCase):
+    """Test the per-process election settings cache."""
+    
+    def test_cached_settings_load_once(self):
+        """Test that repeated access does not query the settings table."""
+        ElectionSettings.get_settings()
+        ElectionSettings.get_cached_settings()
+        
+        with self.assertNumQueries(0):
+            for i in range(5):
+                position = Position(title=f"Position {i}")
+                position.get_status()
+                ElectionSettings.get_cached_settings()
+    
+    def test_save_invalidates_cache(self):
+        """Test that saving the settings is seen by the next cached read."""
+        settings = ElectionSettings.get_settings()
+        ElectionSettings.get_cached_settings()
+        
+        settings.election_title = "Updated Election"
+        settings.save()
+        
+        self.assertEqual(ElectionSettings.get_cached_settings().election_title, "Updated Election")
+    
+    def test_version_stamp_change_reloads(self):
+        """Test that a save in another process (a new stamp) forces a reload."""
+        from django.core.cache import cache
+        
+        ElectionSettings.get_settings()
+        ElectionSettings.get_cached_settings()
+        ElectionSettings.objects.filter(id=1).update(election_title="Changed Elsewhere")
+        cache.set(ElectionSettings.CACHE_VERSION_KEY, 'another-worker')
+        
+        with self.assertNumQueries(1):
+            settings = ElectionSettings.get_cached_settings()
+        self.assertEqual(settings.election_title, "Changed Elsewhere")
+    
+    def test_ttl_expiry_reloads(self):
+        """Test that the cached settings are reloaded once the TTL passes."""
+        ElectionSettings.get_settings()
+        
+        with self.settings(ELECTION_SETTINGS_CACHE_TTL=0):
+            ElectionSettings.get_cached_settings()
+            with self.assertNumQueries(1):
+                ElectionSettings.get_cached_settings()
+    
+    def test_cached_settings_are_copies(self):
+        """Test that changing a returned instance does not change the cache."""
+        ElectionSettings.get_cached_settings().election_title = "Scribbled"
+        
+        self.assertEqual(ElectionSettings.get_cached_settings().election_title, "Class Election 2025")
+
+
+class ElectionClockTest(ElectionTestCase):
+    """Test the request-scoped election clock."""
+    
+    def setUp(self):
+        """Set up an election whose voting period has just ended."""
+        self.end = timezone.now() - timedelta(seconds=1)
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = self.end - timedelta(hours=8)
+        settings.voting_end_time = self.end
+        settings.save()
+        self.positions = [Position.objects.create(title=f"Position {i}") for i in range(3)]
+    
+    def test_clock_freezes_phase(self):
+        """Test that positions use the clock's instant, not the current time."""
+        from .clock import ElectionClock, use_clock
+        
+        with use_clock(ElectionClock(now=self.end - timedelta(seconds=1))):
+            self.assertEqual({p.get_status() for p in self.positions}, {"Active"})
+            self.assertTrue(self.positions[0].is_voting_open())
+        
+        self.assertEqual(ElectionSettings.get_settings().get_voting_status(), "Ended")
+        self.assertEqual(self.positions[0].get_status(), "Ended")
+    
+    def test_position_status_costs_no_queries(self):
+        """Test that status checks in a loop reuse the request's clock."""
+        from .clock import use_clock
+        
+        with use_clock() as get_clock:
+            get_clock()
+            with self.assertNumQueries(0):
+                for position in self.positions:
+                    position.get_status()
+                    position.is_voting_ended()
+    
+    def test_middleware_attaches_clock(self):
+        """Test that each request gets a clock shared with its templates."""
+        response = self.client.get(reverse('index'))
+        
+        clock = response.wsgi_request.election_clock
+        self.assertEqual(clock.status, "Ended")
+        self.assertIs(response.context['election_clock'], clock)
+        self.assertEqual(response.context['current_time'], clock.now)
+
+
+class PositionModelTest(ElectionTestCase):
     """Test the Position model functionality."""
     
     def setUp(self):
@@ -157,7 +287,7 @@ class PositionModelTest(TestCase):
             position.clean()
 
 
-class CandidateModelTest(TestCase):
+class CandidateModelTest(ElectionTestCase):
     """Test the Candidate model functionality."""
     
     def setUp(self):
@@ -212,7 +342,7 @@ class CandidateModelTest(TestCase):
         self.assertEqual(count, 1)
 
 
-class VoterModelTest(TestCase):
+class VoterModelTest(ElectionTestCase):
     """Test the Voter model functionality."""
     
     def setUp(self):
@@ -274,9 +404,38 @@ class VoterModelTest(TestCase):
         # Now has voted
         voted = Vote.objects.filter(voter=self.voter, position=position).exists()
         self.assertTrue(voted)
+    
+    def test_claim_ballot_succeeds_once(self):
+        """Test that only the first claim of a voter's ballot succeeds."""
+        self.assertTrue(self.voter.claim_ballot())
+        self.assertTrue(self.voter.has_voted)
+        self.assertIsNotNone(self.voter.voted_at)
+        self.assertFalse(self.voter.claim_ballot())
+    
+    def test_claim_ballot_checks_database_state(self):
+        """Test that a stale copy of the voter cannot claim a second ballot."""
+        stale = Voter.objects.get(pk=self.voter.pk)
+        self.voter.claim_ballot()
+        
+        self.assertFalse(stale.has_voted)
+        self.assertFalse(stale.claim_ballot())
+    
+    def test_claim_ballot_updates_only_voting_columns(self):
+        """Test that claiming is one conditional UPDATE of the voting columns."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.voter.claim_ballot()
+        
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertTrue(sql.startswith('UPDATE "voting_voter"'))
+        self.assertIn('"has_voted"', sql.split('WHERE')[1])
+        self.assertNotIn('"name"', sql)
 
 
-class VoteModelTest(TestCase):
+class VoteModelTest(ElectionTestCase):
     """Test the Vote model functionality."""
     
     def setUp(self):
@@ -330,7 +489,7 @@ class VoteModelTest(TestCase):
             )
 
 
-class AuthenticationTest(TestCase):
+class AuthenticationTest(ElectionTestCase):
     """Test authentication and authorization functionality."""
     
     def setUp(self):
@@ -406,7 +565,7 @@ class AuthenticationTest(TestCase):
         self.assertEqual(response.status_code, 200)  # Should be allowed
 
 
-class VotingLogicTest(TestCase):
+class VotingLogicTest(ElectionTestCase):
     """Test core voting logic and business rules."""
     
     def setUp(self):
@@ -414,10 +573,7 @@ class VotingLogicTest(TestCase):
         self.client = Client()
         
         # Create election settings with active voting
-        self.settings = ElectionSettings.get_settings()
-        self.settings.voting_start_time = timezone.now() - timedelta(hours=1)
-        self.settings.voting_end_time = timezone.now() + timedelta(hours=23)
-        self.settings.save()
+        self.settings = self.open_election()
         
         # Create positions
         self.president_position = Position.objects.create(
@@ -455,10 +611,7 @@ class VotingLogicTest(TestCase):
     def test_successful_vote_submission(self):
         """Test successful vote submission."""
         # Set up proper voting conditions
-        settings = ElectionSettings.get_settings()
-        settings.voting_start_time = timezone.now() - timedelta(hours=1)
-        settings.voting_end_time = timezone.now() + timedelta(hours=23)
-        settings.save()
+        self.open_election()
         
         # Simulate login by setting session
         session = self.client.session
@@ -531,7 +684,650 @@ class VotingLogicTest(TestCase):
         self.assertTrue(data.get('voting_ended', False))
 
 
-class ResultsCalculationTest(TestCase):
+class BallotValidationTest(ElectionTestCase):
+    """Test ballot validation against the compiled ballot schema."""
+    
+    def setUp(self):
+        """Set up an open election with ten positions of two candidates each."""
+        self.open_election()
+        
+        self.ballot = {}
+        for i in range(10):
+            position = Position.objects.create(title=f"Position {i}")
+            for j in range(2):
+                candidate = Candidate.objects.create(name=f"Candidate {i}-{j}", reg_no=f"C{i}{j}")
+                candidate.positions.add(position)
+            self.ballot[position.id] = candidate.id
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+    
+    def test_validation_runs_no_queries(self):
+        """Test that validation with a compiled schema runs no queries."""
+        from .ballot import get_ballot_schema, validate_ballot
+        from .clock import use_clock
+        
+        with use_clock() as get_clock:
+            get_clock()
+            get_ballot_schema()
+            with self.assertNumQueries(0):
+                votes = validate_ballot(self.voter, self.ballot)
+        self.assertEqual(len(votes), 10)
+    
+    def test_schema_is_compiled_once(self):
+        """Test that the schema is reused until positions or candidates change."""
+        from .ballot import get_ballot_schema
+        
+        schema = get_ballot_schema()
+        with self.assertNumQueries(0):
+            self.assertIs(get_ballot_schema(), schema)
+        self.assertEqual(len(schema.positions), 10)
+        self.assertEqual(len(schema.positions[0].candidates), 2)
+    
+    def test_schema_recompiles_after_candidate_changes(self):
+        """Test that candidate edits and membership changes bump the schema."""
+        from .ballot import get_ballot_schema
+        
+        position = Position.objects.get(title="Position 0")
+        get_ballot_schema()
+        carol = Candidate.objects.create(name="Carol White", reg_no="C99")
+        carol.positions.add(position)
+        
+        schema = get_ballot_schema()
+        self.assertIn(carol.id, schema.positions_by_id[position.id].candidate_ids)
+        
+        carol.is_active = False
+        carol.save()
+        self.assertNotIn(carol.id, get_ballot_schema().positions_by_id[position.id].candidate_ids)
+    
+    def test_vote_page_renders_from_schema(self):
+        """Test that the voting page lists every position from the schema."""
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        
+        response = self.client.get(reverse('vote'))
+        
+        self.assertEqual(len(response.context['positions_data']), 10)
+        self.assertContains(response, "Candidate 9-1")
+    
+    def test_rejects_candidate_from_other_position(self):
+        """Test that a candidate cannot be chosen for a position they don't contest."""
+        from .ballot import BallotError, validate_ballot
+        
+        position_ids = list(self.ballot)
+        ballot = {position_ids[0]: self.ballot[position_ids[1]]}
+        
+        with self.assertRaisesMessage(BallotError, "is not contesting for Position 0"):
+            validate_ballot(self.voter, ballot)
+    
+    def test_rejects_position_already_voted(self):
+        """Test that positions the voter already voted for are rejected."""
+        position_id, candidate_id = next(iter(self.ballot.items()))
+        Vote.objects.create(voter=self.voter, position_id=position_id, candidate_id=candidate_id)
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        
+        response = self.client.post(
+            reverse('submit_vote'), {f'position_{p}': c for p, c in self.ballot.items()}
+        )
+        
+        self.assertEqual(response.json()['error'], 'You have already voted')
+        self.assertEqual(Vote.objects.count(), 1)
+    
+    def test_rejected_ballot_saves_nothing(self):
+        """Test that an invalid ballot leaves no votes and the voter unmarked."""
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        data = {f'position_{p}': c for p, c in self.ballot.items()}
+        data[f'position_{max(self.ballot) + 100}'] = next(iter(self.ballot.values()))
+        
+        response = self.client.post(reverse('submit_vote'), data)
+        
+        self.assertEqual(response.json()['error'], 'Invalid position or candidate')
+        self.assertFalse(Vote.objects.exists())
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.has_voted)
+
+
+class GroupCommitTest(ElectionTestCase):
+    """Test group-commit ballot ingestion."""
+    
+    def setUp(self):
+        """Set up an open election with two positions and three voters."""
+        self.open_election()
+        
+        self.ballot = {}
+        for i in range(2):
+            position = Position.objects.create(title=f"Position {i}")
+            candidate = Candidate.objects.create(name=f"Candidate {i}", reg_no=f"C{i}")
+            candidate.positions.add(position)
+            self.ballot[position.id] = candidate.id
+        self.voters = [
+            Voter.objects.create(name=f"Voter {i}", reg_no=f"VOTER00{i}") for i in range(3)
+        ]
+    
+    def pending(self, voter):
+        """Build a validated ballot for ``voter`` as the coordinator queues it."""
+        from .ballot import validate_ballot
+        from .group_commit import _PendingBallot
+        return _PendingBallot(voter, validate_ballot(voter, self.ballot), timezone.now())
+    
+    def test_batch_is_written_in_one_transaction(self):
+        """Test that a batch is claimed, saved and tallied with bulk queries."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .group_commit import GroupCommitCoordinator
+        from .rollups import turnout_series
+        
+        batch = [self.pending(voter) for voter in self.voters]
+        version = ElectionStats.get_results_version()
+        
+        with CaptureQueriesContext(connection) as queries:
+            GroupCommitCoordinator().commit_batch(batch)
+        
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith('UPDATE "voting_voter"') for sql in statements), 1)
+        self.assertEqual(sum(sql.startswith('INSERT INTO "voting_vote"') for sql in statements), 1)
+        self.assertTrue(all(entry.error is None for entry in batch))
+        self.assertEqual(Voter.objects.filter(has_voted=True).count(), 3)
+        self.assertEqual(Vote.objects.count(), 6)
+        position_id, candidate_id = next(iter(self.ballot.items()))
+        self.assertEqual(VoteTally.totals()[(position_id, candidate_id)], 3)
+        self.assertEqual(ElectionStats.get_results_version(), version + 1)
+        self.assertEqual(ElectionStats.get_stats().total_voted, 3)
+        self.assertEqual(turnout_series().total, 3)
+        self.assertEqual(turnout_series(position_id=position_id).total, 3)
+    
+    def test_duplicate_ballot_in_batch_is_rejected(self):
+        """Test that a second ballot from the same voter in one batch fails alone."""
+        from .group_commit import GroupCommitCoordinator
+        
+        first, duplicate = self.pending(self.voters[0]), self.pending(self.voters[0])
+        GroupCommitCoordinator().commit_batch([first, duplicate])
+        
+        self.assertIsNone(first.error)
+        self.assertEqual(str(duplicate.error), 'You have already voted')
+        self.assertEqual(Vote.objects.count(), 2)
+    
+    def test_conflict_falls_back_to_single_ballots(self):
+        """Test that a voter who already voted does not fail the rest of the batch."""
+        from .group_commit import GroupCommitCoordinator
+        from .rollups import turnout_series
+        
+        batch = [self.pending(voter) for voter in self.voters]
+        Voter.objects.filter(pk=self.voters[1].pk).update(has_voted=True)
+        
+        GroupCommitCoordinator().commit_batch(batch)
+        
+        self.assertIsNone(batch[0].error)
+        self.assertEqual(str(batch[1].error), 'You have already voted')
+        self.assertIsNone(batch[2].error)
+        self.assertEqual(Vote.objects.count(), 4)
+        self.assertFalse(Vote.objects.filter(voter=self.voters[1]).exists())
+    
+    def test_submit_vote_with_group_commit(self):
+        """Test that the voting view records ballots through the coordinator."""
+        session = self.client.session
+        session['voter_token'] = str(self.voters[0].token)
+        session.save()
+        data = {f'position_{p}': c for p, c in self.ballot.items()}
+        
+        with self.settings(BALLOT_GROUP_COMMIT=True):
+            response = self.client.post(reverse('submit_vote'), data)
+            repeat = self.client.post(reverse('submit_vote'), data)
+        
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(repeat.json()['success'])
+        self.assertEqual(Vote.objects.count(), 2)
+        self.voters[0].refresh_from_db()
+        self.assertTrue(self.voters[0].has_voted)
+
+
+class IdempotentSubmissionTest(ElectionTestCase):
+    """Test that retried vote submissions replay the original response."""
+    
+    def setUp(self):
+        """Set up an open election and a logged-in voter."""
+        from django.core.cache import cache
+        
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidate = Candidate.objects.create(name="John Doe", reg_no="C001")
+        self.candidate.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        self.addCleanup(cache.clear)
+        
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        self.ballot = {
+            f'position_{self.position.id}': self.candidate.id,
+            'idempotency_key': uuid.uuid4().hex,
+        }
+    
+    def test_vote_page_renders_key(self):
+        """Test that the voting form carries a fresh idempotency key."""
+        response = self.client.get(reverse('vote'))
+        
+        self.assertContains(response, 'name="idempotency_key"')
+        self.assertEqual(len(response.context['idempotency_key']), 32)
+    
+    def test_retry_replays_success(self):
+        """Test that a retry gets the original success without touching votes."""
+        first = self.client.post(reverse('submit_vote'), self.ballot)
+        
+        # Only the session is loaded; the voter and ballot are never read again
+        with self.assertNumQueries(1):
+            retry = self.client.post(reverse('submit_vote'), self.ballot)
+        
+        self.assertTrue(first.json()['success'])
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Vote.objects.count(), 1)
+    
+    def test_new_key_is_not_replayed(self):
+        """Test that a submission with a different key is processed normally."""
+        self.client.post(reverse('submit_vote'), self.ballot)
+        self.ballot['idempotency_key'] = uuid.uuid4().hex
+        
+        response = self.client.post(reverse('submit_vote'), self.ballot)
+        
+        self.assertEqual(response.json()['error'], 'You have already voted')
+    
+    def test_failed_submission_is_not_kept(self):
+        """Test that a rejected ballot can be corrected and resubmitted with the same key."""
+        rejected = self.client.post(
+            reverse('submit_vote'), {'idempotency_key': self.ballot['idempotency_key']}
+        )
+        accepted = self.client.post(reverse('submit_vote'), self.ballot)
+        
+        self.assertEqual(rejected.json()['error'], 'No votes selected')
+        self.assertTrue(accepted.json()['success'])
+    
+    def test_retry_during_first_attempt_waits(self):
+        """Test that a retry while the first attempt is running is told to wait."""
+        from django.core.cache import cache
+        from .views import SUBMISSION_IN_PROGRESS
+        
+        cache.set(
+            f'voting:submit_vote:{self.voter.token}:{self.ballot["idempotency_key"]}',
+            SUBMISSION_IN_PROGRESS
+        )
+        response = self.client.post(reverse('submit_vote'), self.ballot)
+        
+        self.assertTrue(response.json()['in_progress'])
+        self.assertFalse(Vote.objects.exists())
+
+
+class BallotJournalTest(ElectionTestCase):
+    """Test the write-ahead ballot journal and its applier."""
+    
+    def setUp(self):
+        """Set up an open election and a journal in a temporary directory."""
+        import tempfile
+        
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidate = Candidate.objects.create(name="John Doe", reg_no="C001")
+        self.candidate.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        journal_settings = self.settings(
+            BALLOT_JOURNAL=True, BALLOT_JOURNAL_PATH=f'{temp_dir.name}/ballots.sqlite3'
+        )
+        journal_settings.enable()
+        self.addCleanup(journal_settings.disable)
+        
+        from .journal import get_journal
+        self.journal = get_journal()
+        self.addCleanup(self.journal.close)
+        
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+    
+    def submit(self):
+        """Submit the voter's ballot through the voting view."""
+        return self.client.post(
+            reverse('submit_vote'), {f'position_{self.position.id}': self.candidate.id}
+        )
+    
+    def test_submit_writes_only_the_journal(self):
+        """Test that a journaled ballot counts as voted before it is applied."""
+        self.assertTrue(self.submit().json()['success'])
+        
+        self.assertFalse(Vote.objects.exists())
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.has_voted)
+        self.assertEqual(self.journal.pending_count(), 1)
+        
+        self.assertEqual(self.submit().json()['error'], 'You have already voted')
+        self.assertRedirects(self.client.get(reverse('vote')), reverse('voting_complete'))
+    
+    def test_second_append_is_rejected(self):
+        """Test that the journal's voter index allows one ballot per voter."""
+        from .journal import AlreadyJournaled
+        
+        self.journal.append(self.voter, [])
+        with self.assertRaises(AlreadyJournaled):
+            self.journal.append(self.voter, [])
+    
+    def test_applier_moves_ballots_to_main_tables(self):
+        """Test that applying marks the voter, saves the votes and tallies them."""
+        from .journal import apply_journal
+        from .models import truncate_to_minute
+        from .rollups import turnout_series
+        
+        self.submit()
+        
+        self.assertEqual(apply_journal(self.journal), (1, 0))
+        
+        self.voter.refresh_from_db()
+        self.assertTrue(self.voter.has_voted)
+        self.assertIsNotNone(self.voter.voted_at)
+        self.assertEqual(Vote.objects.get().candidate, self.candidate)
+        self.assertEqual(VoteTally.totals()[(self.position.id, self.candidate.id)], 1)
+        # Rolled up in the minute the ballot was journaled, not applied
+        bucket, = turnout_series(position_id=self.position.id).buckets
+        self.assertEqual(bucket.minute, truncate_to_minute(self.voter.voted_at))
+        self.assertEqual(self.journal.pending_count(), 0)
+        self.assertEqual(apply_journal(self.journal), (0, 0))
+    
+    def test_replay_after_crash_applies_nothing_twice(self):
+        """Test that replaying already-applied ballots skips them."""
+        from .journal import apply_journal
+        
+        self.submit()
+        apply_journal(self.journal)
+        # Simulate a crash after the main commit but before the offset was saved
+        self.journal.db.execute('UPDATE applier_state SET applied_seq = 0')
+        
+        self.assertEqual(apply_journal(self.journal), (0, 1))
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(VoteTally.totals()[(self.position.id, self.candidate.id)], 1)
+        self.assertEqual(ElectionStats.get_stats().total_voted, 1)
+
+
+class TransientErrorRetryTest(ElectionTestCase):
+    """Test retrying ballot transactions on transient database errors."""
+    
+    def setUp(self):
+        from .retry import retry_counters
+        retry_counters.reset()
+        self.addCleanup(retry_counters.reset)
+    
+    def failing(self, error, times):
+        """A function that raises ``error`` ``times`` times, then returns 'ok'."""
+        calls = []
+        
+        def func():
+            calls.append(1)
+            if len(calls) <= times:
+                raise error
+            return 'ok'
+        return func, calls
+    
+    def test_retries_until_success(self):
+        """Test that a locked database is retried and the result returned."""
+        from django.db import OperationalError
+        from .retry import retry_counters, retry_transient
+        
+        func, calls = self.failing(OperationalError('database is locked'), 2)
+        with self.settings(DB_RETRY_BASE_DELAY=0):
+            self.assertEqual(retry_transient(func), 'ok')
+        
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(retry_counters.snapshot(), {'retries': 2, 'give_ups': 0})
+    
+    def test_gives_up_after_last_attempt(self):
+        """Test that the error is raised once the attempts are used up."""
+        from django.db import OperationalError
+        from .retry import retry_counters, retry_transient
+        
+        func, calls = self.failing(OperationalError('database is locked'), 10)
+        with self.settings(DB_RETRY_ATTEMPTS=3, DB_RETRY_BASE_DELAY=0):
+            with self.assertRaises(OperationalError):
+                retry_transient(func)
+        
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(retry_counters.snapshot(), {'retries': 2, 'give_ups': 1})
+    
+    def test_permanent_errors_are_not_retried(self):
+        """Test that constraint violations and other errors fail immediately."""
+        from django.db import IntegrityError, OperationalError
+        from .retry import retry_counters, retry_transient
+        
+        for error in (IntegrityError('UNIQUE constraint failed'), OperationalError('no such table')):
+            func, calls = self.failing(error, 1)
+            with self.assertRaises(type(error)):
+                retry_transient(func)
+            self.assertEqual(len(calls), 1)
+        self.assertEqual(retry_counters.snapshot(), {'retries': 0, 'give_ups': 0})
+    
+    def test_postgres_serialization_failure_is_transient(self):
+        """Test that Postgres serialization failures and deadlocks are recognised."""
+        from django.db import DatabaseError, OperationalError
+        from .retry import is_transient_error
+        
+        class DriverError(Exception):
+            def __init__(self, sqlstate):
+                self.sqlstate = sqlstate
+        
+        for sqlstate, transient in (('40001', True), ('40P01', True), ('23505', False)):
+            error = OperationalError('could not serialize access')
+            error.__cause__ = DriverError(sqlstate)
+            self.assertEqual(is_transient_error(error), transient)
+        self.assertFalse(is_transient_error(DatabaseError('database is locked')))
+    
+    def test_busy_database_returns_error_to_voter(self):
+        """Test that giving up gives the voter a retryable error instead of a 500."""
+        from django.db import OperationalError
+        
+        self.open_election()
+        position = Position.objects.create(title="President")
+        candidate = Candidate.objects.create(name="John Doe", reg_no="C001")
+        candidate.positions.add(position)
+        voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        session = self.client.session
+        session['voter_token'] = str(voter.token)
+        session.save()
+        
+        with self.settings(DB_RETRY_BASE_DELAY=0), patch(
+            'voting.ballot.record_ballot', side_effect=OperationalError('database is locked')
+        ):
+            response = self.client.post(reverse('submit_vote'), {f'position_{position.id}': candidate.id})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('busy', response.json()['error'])
+        voter.refresh_from_db()
+        self.assertFalse(voter.has_voted)
+    
+    def open_ballot(self):
+        """Open voting for one position with one candidate; returns the selections."""
+        self.open_election()
+        position = Position.objects.create(title="President")
+        candidate = Candidate.objects.create(name="John Doe", reg_no="C001")
+        candidate.positions.add(position)
+        return {position.id: candidate.id}
+    
+    def test_retry_after_insert_saves_fresh_votes(self):
+        """Test that a retried ballot does not reuse ids taken by a ballot committed meanwhile."""
+        from django.db import OperationalError
+        from .ballot import record_ballot, validate_ballot
+        from .retry import retry_transient
+        
+        selections = self.open_ballot()
+        first = Voter.objects.create(name="First Voter", reg_no="VOTER001")
+        second = Voter.objects.create(name="Second Voter", reg_no="VOTER002")
+        first_votes = validate_ballot(first, selections)
+        
+        # The first ballot fails after its votes were inserted; while it backs
+        # off, the second ballot commits and gets the rolled back vote ids
+        record_votes = VoteTally.record_votes
+        calls = []
+        
+        def flaky_record_votes(votes):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return record_votes(votes)
+        
+        def record_second_ballot(delay):
+            record_ballot(second, validate_ballot(second, selections))
+        
+        with patch.object(VoteTally, 'record_votes', side_effect=flaky_record_votes), \
+                patch('voting.retry.time.sleep', side_effect=record_second_ballot):
+            retry_transient(record_ballot, first, first_votes)
+        
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(Voter.objects.filter(has_voted=True).count(), 2)
+        self.assertEqual(set(Vote.objects.values_list('voter_id', flat=True)), {first.id, second.id})
+        self.assertEqual(sum(VoteTally.totals().values()), 2)
+    
+    def test_other_integrity_errors_are_not_already_voted(self):
+        """Test that only a duplicate vote is reported as having voted already."""
+        from django.db import IntegrityError
+        from .ballot import BallotError, record_ballot, validate_ballot
+        
+        selections = self.open_ballot()
+        voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        
+        with patch.object(VoteTally, 'record_votes', side_effect=IntegrityError('CHECK constraint failed')):
+            with self.assertRaises(IntegrityError):
+                record_ballot(voter, validate_ballot(voter, selections))
+        voter.refresh_from_db()
+        self.assertFalse(voter.has_voted)
+        
+        record_ballot(voter, validate_ballot(voter, selections))
+        with self.assertRaises(BallotError):
+            record_ballot(voter, validate_ballot(voter, selections))
+        # The voter claim passes for a stale voter; the unique vote constraint does not
+        Voter.objects.filter(pk=voter.pk).update(has_voted=False)
+        with self.assertRaises(BallotError):
+            record_ballot(voter, validate_ballot(voter, selections))
+
+
+class RetryStressTest(ElectionTransactionTestCase):
+    """Threaded stress test: contended ballots are neither lost nor duplicated."""
+    
+    VOTERS = 40
+    THREADS = 8
+    
+    def setUp(self):
+        """Set up an open election with three positions."""
+        from .retry import retry_counters
+        retry_counters.reset()
+        self.addCleanup(retry_counters.reset)
+        
+        self.open_election()
+        
+        self.ballot = {}
+        for i in range(3):
+            position = Position.objects.create(title=f"Position {i}")
+            candidate = Candidate.objects.create(name=f"Candidate {i}", reg_no=f"C{i}")
+            candidate.positions.add(position)
+            self.ballot[position.id] = candidate.id
+        for i in range(self.VOTERS):
+            Voter.objects.create(name=f"Voter {i}", reg_no=f"VOTER{i:03d}")
+    
+    def submit_concurrently(self):
+        """
+        Submit every voter's ballot twice, from different threads, on a busy database.
+
+        Returns the ids of the voters whose submissions were accepted and
+        rejected, and any other errors raised.
+        """
+        import threading
+        from django.db import connection
+        from .ballot import BallotError, get_ballot_schema, submit_ballot
+        
+        # The threads only write, so all contention is on the ballot transactions
+        get_ballot_schema()
+        ElectionSettings.get_cached_settings()
+        voter_ids = list(Voter.objects.values_list('id', flat=True))
+        submissions = [
+            (voter_id, Voter(pk=voter_id)) for voter_id in voter_ids for _ in range(2)
+        ]
+        accepted, rejected, errors = [], [], []
+        lock = threading.Lock()
+        
+        def submit_ballots(batch):
+            try:
+                for voter_id, voter in batch:
+                    try:
+                        submit_ballot(voter, self.ballot)
+                        result = accepted
+                    except BallotError:
+                        result = rejected
+                    except Exception as e:
+                        result, voter_id = errors, e
+                    with lock:
+                        result.append(voter_id)
+            finally:
+                connection.close()
+        
+        threads = [
+            threading.Thread(target=submit_ballots, args=(submissions[i::self.THREADS],))
+            for i in range(self.THREADS)
+        ]
+        # Without a busy timeout SQLite reports a lock at once, instead of
+        # waiting for it, so the ballot transactions have to be retried
+        with patch.dict(connection.settings_dict['OPTIONS'], timeout=0), \
+                self.settings(DB_RETRY_ATTEMPTS=100, DB_RETRY_BASE_DELAY=0.001, DB_RETRY_MAX_DELAY=0.02):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return accepted, rejected, errors
+    
+    def assert_recorded_exactly_once(self, accepted, rejected, errors):
+        """Assert that every voter got exactly one ballot accepted and counted."""
+        from .retry import retry_counters
+        
+        voter_ids = list(Voter.objects.values_list('id', flat=True))
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(accepted), sorted(voter_ids))
+        self.assertEqual(sorted(rejected), sorted(voter_ids))
+        counters = retry_counters.snapshot()
+        self.assertGreater(counters['retries'], 0)
+        self.assertEqual(counters['give_ups'], 0)
+        
+        self.assertEqual(Voter.objects.filter(has_voted=True).count(), self.VOTERS)
+        self.assertEqual(Vote.objects.count(), self.VOTERS * len(self.ballot))
+        self.assertEqual(sum(VoteTally.totals().values()), Vote.objects.count())
+        self.assertEqual(ElectionStats.get_stats().total_voted, self.VOTERS)
+    
+    def test_concurrent_ballots_are_recorded_exactly_once(self):
+        """Test that every voter, submitting twice from racing threads, is counted once."""
+        self.assert_recorded_exactly_once(*self.submit_concurrently())
+    
+    def test_ballots_failing_after_insert_are_retried(self):
+        """Test that ballots rolled back after their votes were inserted are retried cleanly."""
+        import threading
+        from django.db import OperationalError
+        
+        # Every third tally update fails, after the ballot's votes were inserted
+        record_votes = VoteTally.record_votes
+        calls = []
+        lock = threading.Lock()
+        
+        def flaky_record_votes(votes):
+            with lock:
+                calls.append(1)
+                fail = len(calls) % 3 == 0
+            if fail:
+                raise OperationalError('database is locked')
+            return record_votes(votes)
+        
+        with patch.object(VoteTally, 'record_votes', side_effect=flaky_record_votes):
+            self.assert_recorded_exactly_once(*self.submit_concurrently())
+
+
+class ResultsCalculationTest(ElectionTestCase):
     """Test results calculation and display."""
     
     def setUp(self):
@@ -614,100 +1410,1084 @@ class ResultsCalculationTest(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
-class SecurityTest(TestCase):
-    """Test security measures and edge cases."""
+class VoteTallyTest(ElectionTestCase):
+    """Test the materialized vote tally maintained by submit_vote."""
     
     def setUp(self):
-        """Set up test data."""
+        """Set up an open election with one position and two candidates."""
         self.client = Client()
-        self.voter = Voter.objects.create(
-            name="Test Voter",
-            reg_no="VOTER001",
-            token=str(uuid.uuid4())
-        )
         
-        self.position = Position.objects.create(
-            title="President",
-            start_time=timezone.now() - timedelta(hours=1),
-            end_time=timezone.now() + timedelta(hours=23)
-        )
+        self.open_election()
         
-        self.candidate = Candidate.objects.create(
-            name="Test Candidate",
-            reg_no="CAND001"
-        )
-        self.candidate.positions.add(self.position)
+        self.position = Position.objects.create(title="President")
+        self.candidate1 = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        self.candidate1.positions.add(self.position)
+        self.candidate2 = Candidate.objects.create(name="Bob Johnson", reg_no="CAND002")
+        self.candidate2.positions.add(self.position)
     
-    def test_csrf_protection(self):
-        """Test CSRF protection on forms."""
-        # Try to submit without CSRF token
-        response = self.client.post(reverse('index'), {
-            'token': self.voter.token
+    def cast_vote(self, voter, candidate):
+        """Log in as the voter and submit a ballot for the candidate."""
+        session = self.client.session
+        session['voter_token'] = str(voter.token)
+        session.save()
+        return self.client.post(reverse('submit_vote'), {
+            f'position_{self.position.id}': candidate.id,
         })
-        
-        # Django should handle CSRF protection
-        self.assertIn(response.status_code, [200, 403])
     
-    def test_sql_injection_prevention(self):
-        """Test SQL injection prevention in search fields."""
-        # Try to inject SQL in voter search
-        malicious_input = "'; DROP TABLE voting_voter; --"
+    def test_submit_vote_updates_tally(self):
+        """Test that each committed ballot increments the candidate's tally."""
+        for i in range(5):
+            voter = Voter.objects.create(name=f"Voter {i}", reg_no=f"V{i:03d}")
+            candidate = self.candidate1 if i < 3 else self.candidate2
+            self.assertTrue(json.loads(self.cast_vote(voter, candidate).content)['success'])
+        
+        totals = VoteTally.totals()
+        self.assertEqual(totals[(self.position.id, self.candidate1.id)], 3)
+        self.assertEqual(totals[(self.position.id, self.candidate2.id)], 2)
+    
+    def test_rejected_ballot_leaves_tally_unchanged(self):
+        """Test that a ballot that fails validation does not touch the tally."""
+        voter = Voter.objects.create(name="Voter", reg_no="V001")
+        other_position = Position.objects.create(title="Secretary")
         
-        response = self.client.post(reverse('index'), {
-            'token': malicious_input
+        session = self.client.session
+        session['voter_token'] = str(voter.token)
+        session.save()
+        response = self.client.post(reverse('submit_vote'), {
+            f'position_{other_position.id}': self.candidate1.id,
         })
         
-        # Should not cause server error
-        self.assertNotEqual(response.status_code, 500)
+        self.assertFalse(json.loads(response.content)['success'])
+        self.assertEqual(VoteTally.totals(), {})
+    
+    def test_deleting_voter_removes_votes_from_tally(self):
+        """Test that cascading vote deletes are taken back out of the tally."""
+        voter = Voter.objects.create(name="Voter", reg_no="V001")
+        self.cast_vote(voter, self.candidate1)
         
-        # Voter table should still exist
-        self.assertTrue(Voter.objects.exists())
+        voter.delete()
+        
+        self.assertEqual(VoteTally.totals()[(self.position.id, self.candidate1.id)], 0)
     
-    def test_session_security(self):
-        """Test session security measures."""
-        # Try to access voting page without login
-        response = self.client.get(reverse('vote'))
+    def test_results_api_reads_tally(self):
+        """Test that the live results API reports the tallied counts."""
+        voter = Voter.objects.create(name="Voter", reg_no="V001")
+        self.cast_vote(voter, self.candidate2)
         
-        # Should redirect to login or show error
-        self.assertIn(response.status_code, [302, 403])
+        data = json.loads(self.client.get(reverse('live_results_api')).content)
+        
+        candidates = data['results'][0]['candidates']
+        self.assertEqual(candidates[0]['name'], "Bob Johnson")
+        self.assertEqual(candidates[0]['votes'], 1)
+        self.assertEqual(candidates[0]['percentage'], 100.0)
 
 
-class APITest(TestCase):
-    """Test API endpoints functionality."""
+class ResultsEngineTest(ElectionTestCase):
+    """Test the shared results engine in voting.results."""
     
     def setUp(self):
-        """Set up test data."""
-        self.client = Client()
+        """Set up positions, candidates and tallied votes."""
+        self.president = Position.objects.create(title="President")
+        self.secretary = Position.objects.create(title="Secretary")
+        self.alice = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        self.bob = Candidate.objects.create(name="Bob Johnson", reg_no="CAND002")
+        self.carol = Candidate.objects.create(name="Carol White", reg_no="CAND003")
+        for candidate in (self.alice, self.bob, self.carol):
+            candidate.positions.add(self.president)
+        self.alice.positions.add(self.secretary)
+        
+        VoteTally.objects.create(position=self.president, candidate=self.alice, votes=2)
+        VoteTally.objects.create(position=self.president, candidate=self.bob, votes=2)
+        VoteTally.objects.create(position=self.president, candidate=self.carol, votes=1)
+        VoteTally.objects.create(position=self.secretary, candidate=self.alice, shard=1, votes=3)
+        
+        Voter.objects.create(name="Voter 1", reg_no="V001", has_voted=True)
+        Voter.objects.create(name="Voter 2", reg_no="V002")
+    
+    def test_tallies_percentages_and_ranking(self):
+        """Test totals, percentages and competition ranking with a tie."""
+        from .results import compute_results
         
-        self.position = Position.objects.create(
-            title="President",
-            start_time=timezone.now() - timedelta(hours=1),
-            end_time=timezone.now() + timedelta(hours=23)
-        )
+        results = compute_results()
+        president = results.position(self.president.id)
         
-        self.candidate = Candidate.objects.create(
-            name="Test Candidate",
-            reg_no="CAND001"
+        self.assertEqual(president.total_votes, 5)
+        self.assertEqual(
+            [(c.name, c.votes, c.rank) for c in president.candidates],
+            [("Alice Smith", 2, 1), ("Bob Johnson", 2, 1), ("Carol White", 1, 3)]
         )
-        self.candidate.positions.add(self.position)
+        self.assertEqual(president.candidates[0].percentage, 40.0)
+        self.assertTrue(president.is_tie)
+        self.assertEqual(results.position(self.secretary.id).winner.name, "Alice Smith")
+        self.assertEqual((results.total_voters, results.total_voted), (2, 1))
     
-    def test_live_results_api(self):
-        """Test live results API endpoint."""
-        response = self.client.get(reverse('live_results_api'))
+    def test_query_count_is_constant(self):
+        """Test that adding positions and candidates does not add queries."""
+        from .clock import ElectionClock
+        from .results import compute_results
+        
+        clock = ElectionClock()
+        # Three reads plus the savepoint pair of the consistent read block
+        with self.assertNumQueries(5):
+            compute_results(clock)
+        
+        for i in range(5):
+            position = Position.objects.create(title=f"Extra {i}")
+            candidate = Candidate.objects.create(name=f"Extra {i}", reg_no=f"X{i}")
+            candidate.positions.add(position)
+            VoteTally.objects.create(position=position, candidate=candidate, votes=i)
+        
+        with self.assertNumQueries(5):
+            compute_results(clock)
+    
+    def test_standings_rank_and_total_in_one_query(self):
+        """Test that ranks, ties and position totals come from one windowed query."""
+        from .results import _standings
+        
+        # A second shard and a deactivated candidate must not change the ranking
+        VoteTally.objects.create(position=self.president, candidate=self.carol, shard=1, votes=2)
+        dave = Candidate.objects.create(name="Dave Brown", reg_no="CAND004", is_active=False)
+        dave.positions.add(self.president)
+        VoteTally.objects.create(position=self.president, candidate=dave, votes=9)
+        
+        with self.assertNumQueries(1):
+            standings = [
+                (s.candidate.name, s.votes, s.rank, s.position_total)
+                for s in _standings().select_related('candidate').filter(position=self.president)
+            ]
+        
+        self.assertEqual(standings, [
+            ("Carol White", 3, 1, 7), ("Alice Smith", 2, 2, 7), ("Bob Johnson", 2, 2, 7),
+        ])
+    
+    def test_runners_up_follow_shared_rank(self):
+        """Test that runners-up are the candidates at the next rank after the winners."""
+        from .results import compute_results
         
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response['Content-Type'], 'application/json')
+        president = compute_results().position(self.president.id)
         
-        # Parse JSON response
-        import json
-        data = json.loads(response.content)
+        self.assertEqual([c.name for c in president.winners], ["Alice Smith", "Bob Johnson"])
+        self.assertEqual([c.name for c in president.runners_up], ["Carol White"])
+        self.assertEqual(compute_results().position(self.secretary.id).runners_up, ())
+    
+    def test_results_are_immutable(self):
+        """Test that the results snapshot cannot be modified."""
+        from dataclasses import FrozenInstanceError
+        from .results import compute_results
+        
+        results = compute_results()
+        with self.assertRaises(FrozenInstanceError):
+            results.total_voters = 10
+    
+    def test_final_results_render_from_engine(self):
+        """Test that final results show each position's winner once voting ends."""
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = timezone.now() - timedelta(hours=2)
+        settings.voting_end_time = timezone.now() - timedelta(hours=1)
+        settings.save()
+        
+        response = self.client.get(reverse('final_results'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [p.title for p in response.context['winners_data']],
+            ["President", "Secretary"]
+        )
+        self.assertContains(response, "Carol White")
+    
+    def test_final_results_show_ties_and_runners_up(self):
+        """Test that every tied winner and the runners-up are in the final page and JSON."""
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = timezone.now() - timedelta(hours=2)
+        settings.voting_end_time = timezone.now() - timedelta(hours=1)
+        settings.save()
+        
+        page = self.client.get(reverse('final_results')).content.decode()
+        data = self.client.get(reverse('final_results_api')).json()
+        
+        self.assertEqual(page.count('• Tied'), 2)
+        self.assertIn('Runner-up:</strong>', page)
+        president = data['results'][0]
+        self.assertEqual(president['position'], "President")
+        self.assertEqual(president['winners'], [self.alice.id, self.bob.id])
+        self.assertTrue(president['tie'])
+        self.assertEqual(president['runners_up'], [self.carol.id])
+    
+    def test_admin_vote_counts_use_tally(self):
+        """Test that the admin changelists display tallied vote totals."""
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+        
+        response = self.client.get(reverse('admin:voting_position_changelist'))
+        self.assertEqual(response.status_code, 200)
+        position = response.context['cl'].result_list.get(pk=self.president.pk)
+        self.assertEqual(position.vote_total, 5)
+        
+        response = self.client.get(reverse('admin:voting_candidate_changelist'))
+        self.assertEqual(response.status_code, 200)
+        candidate = response.context['cl'].result_list.get(pk=self.alice.pk)
+        self.assertEqual(candidate.vote_total, 5)
+
+
+class TurnoutCountersTest(ElectionTestCase):
+    """Test the turnout counters kept on ElectionStats."""
+    
+    def setUp(self):
+        """Set up an open election and two voters."""
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidate = Candidate.objects.create(name="John Doe", reg_no="C001")
+        self.candidate.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        self.other = Voter.objects.create(name="Other Voter", reg_no="VOTER002")
+    
+    def assertTurnout(self, total_voters, total_voted):
+        """Assert the counters, and that they match an exact count."""
+        from .results import get_turnout
+        
+        self.assertEqual(get_turnout(), (total_voters, total_voted))
+        self.assertEqual(ElectionStats.count_turnout(), (total_voters, total_voted))
+    
+    def test_ballot_and_voter_changes_adjust_counters(self):
+        """Test that voting, status edits and deletes keep the counters exact."""
+        self.assertTurnout(2, 0)
+        
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        self.client.post(reverse('submit_vote'), {f'position_{self.position.id}': self.candidate.id})
+        self.assertTurnout(2, 1)
+        
+        other = Voter.objects.get(pk=self.other.pk)
+        other.has_voted = True
+        other.save()
+        other.save()
+        self.assertTurnout(2, 2)
+        
+        Voter.objects.filter(pk=self.voter.pk).delete()
+        self.assertTurnout(1, 1)
+        Voter.objects.create(name="Late Voter", reg_no="VOTER003")
+        self.assertTurnout(2, 1)
+    
+    def test_admin_reset_adjusts_counters(self):
+        """Test that resetting voting status takes only voters who voted off the count."""
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+        self.voter.mark_as_voted()
+        
+        self.client.post(reverse('admin:voting_voter_changelist'), {
+            'action': 'reset_voting_status',
+            '_selected_action': [self.voter.pk, self.other.pk],
+        })
+        
+        self.assertTurnout(2, 0)
+    
+    def test_turnout_reads_no_voter_rows(self):
+        """Test that the turnout is one lookup of the statistics row."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .results import get_turnout
+        
+        with CaptureQueriesContext(connection) as queries:
+            get_turnout()
+        
+        self.assertEqual(len(queries), 1)
+        self.assertIn('voting_election_stats', queries[0]['sql'])
+        self.assertNotIn('voting_voter', queries[0]['sql'])
+    
+    def test_recount_command_repairs_drift(self):
+        """Test that recount_turnout reports and repairs drifted counters."""
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from io import StringIO
+        
+        # Bulk updates bypass the counters
+        Voter.objects.update(has_voted=True)
+        version = ElectionStats.get_results_version()
+        
+        with self.assertRaises(CommandError):
+            call_command('recount_turnout', '--check', stdout=StringIO())
+        self.assertEqual(ElectionStats.get_stats().total_voted, 0)
+        
+        out = StringIO()
+        call_command('recount_turnout', stdout=out)
+        self.assertIn('0 -> 2', out.getvalue())
+        self.assertTurnout(2, 2)
+        self.assertEqual(ElectionStats.get_results_version(), version + 1)
+        
+        call_command('recount_turnout', '--check', stdout=out)
+
+
+class TurnoutRollupTest(ElectionTestCase):
+    """Test the per-minute turnout rollups and the queries answered from them."""
+    
+    def setUp(self):
+        """Set up an open election with two candidates and three voters."""
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = timezone.now() - timedelta(hours=2)
+        settings.voting_end_time = timezone.now() + timedelta(hours=22)
+        settings.save()
+        
+        self.position = Position.objects.create(title="President")
+        self.alice = Candidate.objects.create(name="Alice", reg_no="C001")
+        self.bob = Candidate.objects.create(name="Bob", reg_no="C002")
+        self.alice.positions.add(self.position)
+        self.bob.positions.add(self.position)
+        self.voters = [
+            Voter.objects.create(name=f"Voter {i}", reg_no=f"VOTER00{i}") for i in range(3)
+        ]
+        self.start = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+    
+    def cast(self, voter, candidate, minutes, seconds=0):
+        """Record a ballot cast ``minutes`` after the start."""
+        from .ballot import record_ballot, validate_ballot
+        
+        votes = validate_ballot(voter, {self.position.id: candidate.id})
+        record_ballot(voter, votes, self.start + timedelta(minutes=minutes, seconds=seconds))
+    
+    def series(self, series):
+        """Reduce a turnout series to ``(minutes after start, ballots, total)`` rows."""
+        return [
+            ((bucket.minute - self.start) // timedelta(minutes=1), bucket.ballots, bucket.total)
+            for bucket in series.buckets
+        ]
+    
+    def test_ballots_are_bucketed_by_minute(self):
+        """Test that ballots add to their minute and totals run cumulatively."""
+        from .rollups import turnout_series
+        
+        self.cast(self.voters[0], self.alice, 0, seconds=10)
+        self.cast(self.voters[1], self.bob, 0, seconds=50)
+        self.cast(self.voters[2], self.bob, 3, seconds=30)
+        
+        self.assertEqual(self.series(turnout_series()), [(0, 2, 2), (3, 1, 3)])
+        since = turnout_series(since=self.start + timedelta(minutes=1))
+        self.assertEqual(since.total_before, 2)
+        self.assertEqual(self.series(since), [(3, 1, 3)])
+        # A time within a minute includes that minute's whole bucket
+        since = turnout_series(since=self.start + timedelta(minutes=3, seconds=45))
+        self.assertEqual(since.total_before, 2)
+        self.assertEqual(self.series(since), [(3, 1, 3)])
+        self.assertEqual(since.since, self.start + timedelta(minutes=3))
+        self.assertEqual(
+            self.series(turnout_series(position_id=self.position.id)), [(0, 2, 2), (3, 1, 3)]
+        )
+    
+    def test_turnout_api(self):
+        """Test the turnout API's incremental and per-position series and its errors."""
+        self.cast(self.voters[0], self.alice, 0)
+        self.cast(self.voters[1], self.bob, 5)
+        url = reverse('turnout_api')
+        
+        data = self.client.get(url).json()
+        self.assertEqual(data['bucket_seconds'], 60)
+        self.assertEqual([b['total'] for b in data['buckets']], [1, 2])
+        
+        since = (self.start + timedelta(minutes=5)).isoformat()
+        data = self.client.get(url, {'since': since, 'position': self.position.id}).json()
+        self.assertEqual(data['total_before'], 1)
+        self.assertEqual(len(data['buckets']), 1)
+        self.assertEqual(data['total'], 2)
+        
+        self.assertEqual(self.client.get(url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'position': 'x'}).status_code, 400)
+        
+        settings = ElectionSettings.get_settings()
+        settings.show_live_results = False
+        settings.save()
+        self.assertIn('error', self.client.get(url).json())
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+        self.assertEqual(self.client.get(url).json()['total'], 2)
+    
+    def test_results_as_of_are_read_from_rollups(self):
+        """Test that historical results sum the rollups and never scan the votes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .results import compute_results
+        
+        self.cast(self.voters[0], self.alice, 0)
+        self.cast(self.voters[1], self.bob, 2)
+        self.cast(self.voters[2], self.bob, 4)
+        
+        with CaptureQueriesContext(connection) as queries:
+            results = compute_results(as_of=self.start + timedelta(minutes=2, seconds=30))
+        
+        self.assertFalse(any('"voting_vote"' in q['sql'] for q in queries.captured_queries))
+        self.assertFalse(any('"voting_vote_tally"' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(results.total_voted, 2)
+        position = results.position(self.position.id)
+        self.assertEqual({c.name: c.votes for c in position.candidates}, {'Alice': 1, 'Bob': 1})
+        self.assertTrue(position.is_tie)
+        self.assertEqual(results.generated_at, self.start + timedelta(minutes=2, seconds=30))
+        
+        response = self.client.get(
+            reverse('live_results_api'), {'as_of': (self.start - timedelta(minutes=1)).isoformat()}
+        )
+        self.assertEqual(response.json()['total_voted'], 0)
+        self.assertEqual(
+            self.client.get(reverse('live_results_api'), {'as_of': 'soon'}).status_code, 400
+        )
+        # The current results are unchanged
+        current = compute_results().position(self.position.id)
+        self.assertEqual(current.winner.name, 'Bob')
+    
+    def test_deletes_and_resets_take_ballots_out(self):
+        """Test that removed ballots leave the rollups, matching a full rebuild."""
+        from .rollups import rebuild_rollups, turnout_series
+        
+        self.cast(self.voters[0], self.alice, 0)
+        self.cast(self.voters[1], self.bob, 1)
+        self.cast(self.voters[2], self.bob, 1)
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+        
+        self.voters[0].delete()
+        maintained = [self.series(turnout_series(position_id=p)) for p in (None, self.position.id)]
+        self.assertEqual(maintained, [[(1, 2, 2)], [(1, 2, 2)]])
+        rebuild_rollups()
+        self.assertEqual(
+            [self.series(turnout_series(position_id=p)) for p in (None, self.position.id)], maintained
+        )
+        
+        self.client.post(reverse('admin:voting_voter_changelist'), {
+            'action': 'reset_voting_status',
+            '_selected_action': [self.voters[1].pk],
+        })
+        # The voter no longer counts as having voted; their vote stays, as in the tally
+        self.assertEqual(self.series(turnout_series()), [(1, 1, 1)])
+        self.assertEqual(self.series(turnout_series(position_id=self.position.id)), [(1, 2, 2)])
+    
+    def test_rebuild_command(self):
+        """Test that rebuild_rollups fills the buckets for bulk-loaded ballots."""
+        from django.core.management import call_command
+        from io import StringIO
+        from .rollups import turnout_series
+        
+        Voter.objects.filter(pk=self.voters[0].pk).update(has_voted=True, voted_at=self.start)
+        Vote.objects.create(voter=self.voters[0], position=self.position, candidate=self.alice)
+        out = StringIO()
+        
+        call_command('rebuild_rollups', stdout=out)
+        
+        self.assertIn('Rebuilt 1 turnout buckets and 1 vote buckets', out.getvalue())
+        self.assertEqual(self.series(turnout_series()), [(0, 1, 1)])
+
+
+class SecurityTest(ElectionTestCase):
+    """Test security measures and edge cases."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.voter = Voter.objects.create(
+            name="Test Voter",
+            reg_no="VOTER001",
+            token=str(uuid.uuid4())
+        )
+        
+        self.position = Position.objects.create(
+            title="President",
+            start_time=timezone.now() - timedelta(hours=1),
+            end_time=timezone.now() + timedelta(hours=23)
+        )
+        
+        self.candidate = Candidate.objects.create(
+            name="Test Candidate",
+            reg_no="CAND001"
+        )
+        self.candidate.positions.add(self.position)
+    
+    def test_csrf_protection(self):
+        """Test CSRF protection on forms."""
+        # Try to submit without CSRF token
+        response = self.client.post(reverse('index'), {
+            'token': self.voter.token
+        })
+        
+        # Django should handle CSRF protection
+        self.assertIn(response.status_code, [200, 403])
+    
+    def test_sql_injection_prevention(self):
+        """Test SQL injection prevention in search fields."""
+        # Try to inject SQL in voter search
+        malicious_input = "'; DROP TABLE voting_voter; --"
+        
+        response = self.client.post(reverse('index'), {
+            'token': malicious_input
+        })
+        
+        # Should not cause server error
+        self.assertNotEqual(response.status_code, 500)
+        
+        # Voter table should still exist
+        self.assertTrue(Voter.objects.exists())
+    
+    def test_session_security(self):
+        """Test session security measures."""
+        # Try to access voting page without login
+        response = self.client.get(reverse('vote'))
+        
+        # Should redirect to login or show error
+        self.assertIn(response.status_code, [302, 403])
+
+
+class APITest(ElectionTestCase):
+    """Test API endpoints functionality."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        
+        self.position = Position.objects.create(
+            title="President",
+            start_time=timezone.now() - timedelta(hours=1),
+            end_time=timezone.now() + timedelta(hours=23)
+        )
+        
+        self.candidate = Candidate.objects.create(
+            name="Test Candidate",
+            reg_no="CAND001"
+        )
+        self.candidate.positions.add(self.position)
+    
+    def test_live_results_api(self):
+        """Test live results API endpoint."""
+        response = self.client.get(reverse('live_results_api'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        
+        # Parse JSON response
+        import json
+        data = json.loads(response.content)
         
         self.assertIn('total_voters', data)
         self.assertIn('total_voted', data)
         self.assertIn('results', data)
 
 
-class AdminFunctionalityTest(TestCase):
+class ResultsVersionTest(ElectionTestCase):
+    """Test the results version and ETag handling of the live results API."""
+    
+    def setUp(self):
+        """Set up an open election with one candidate and a logged-in voter."""
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidate = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        self.candidate.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+    
+    def submit_ballot(self):
+        """Submit a ballot for the test voter."""
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        self.client.post(reverse('submit_vote'), {
+            f'position_{self.position.id}': self.candidate.id,
+        })
+    
+    def test_ballot_commit_bumps_version(self):
+        """Test that committing a ballot increases the results version."""
+        before = ElectionStats.get_results_version()
+        self.submit_ballot()
+        self.assertEqual(ElectionStats.get_results_version(), before + 1)
+    
+    def test_api_returns_strong_etag(self):
+        """Test that the API response carries a strong ETag."""
+        response = self.client.get(reverse('live_results_api'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"r'))
+    
+    def test_matching_etag_returns_304_without_vote_queries(self):
+        """Test that a current ETag is answered with 304 without reading votes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        etag = self.client.get(reverse('live_results_api'))['ETag']
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('live_results_api'), HTTP_IF_NONE_MATCH=etag
+            )
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(
+            [q for q in queries if 'voting_vote' in q['sql']]
+        )
+    
+    def test_new_ballot_invalidates_etag(self):
+        """Test that a committed ballot makes the old ETag stale."""
+        etag = self.client.get(reverse('live_results_api'))['ETag']
+        self.submit_ballot()
+        
+        response = self.client.get(reverse('live_results_api'), HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LiveResultsDeltaTest(ElectionTestCase):
+    """Test delta-encoded live results (``?since=<version>``)."""
+    
+    def setUp(self):
+        """Set up an open election with two candidates and two voters."""
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.alice = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        self.bob = Candidate.objects.create(name="Bob Jones", reg_no="CAND002")
+        self.alice.positions.add(self.position)
+        self.bob.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        Voter.objects.create(name="Other Voter", reg_no="VOTER002")
+    
+    def get_results(self, since=None):
+        """Fetch the live results API, optionally as a delta."""
+        url = reverse('live_results_api')
+        if since is not None:
+            url += f'?since={since}'
+        return self.client.get(url).json()
+    
+    def submit_ballot(self):
+        """Vote for Alice as the test voter."""
+        session = self.client.session
+        session['voter_token'] = str(self.voter.token)
+        session.save()
+        self.client.post(reverse('submit_vote'), {
+            f'position_{self.position.id}': self.alice.id,
+        })
+    
+    def test_delta_contains_only_changed_candidates(self):
+        """Test that a delta lists changed candidates and the new turnout."""
+        version = self.get_results()['version']
+        self.submit_ballot()
+        
+        data = self.get_results(since=version)
+        
+        self.assertTrue(data['delta'])
+        self.assertEqual(data['since'], version)
+        self.assertEqual(data['version'], version + 1)
+        self.assertEqual(data['changes'], [{
+            'id': self.position.id,
+            'total_votes': 1,
+            'candidates': [{'id': self.alice.id, 'votes': 1}],
+        }])
+        self.assertEqual((data['total_voters'], data['total_voted']), (2, 1))
+        self.assertNotIn('results', data)
+    
+    def test_unchanged_delta_is_empty(self):
+        """Test that a delta against the current version has no changes."""
+        version = self.get_results()['version']
+        
+        data = self.get_results(since=version)
+        
+        self.assertTrue(data['delta'])
+        self.assertEqual(data['changes'], [])
+    
+    def test_unknown_version_gets_full_snapshot(self):
+        """Test that a version this process never saw gets a full snapshot."""
+        data = self.get_results(since=999)
+        
+        self.assertNotIn('delta', data)
+        self.assertEqual(len(data['results'][0]['candidates']), 2)
+    
+    def test_large_gap_gets_full_snapshot(self):
+        """Test that falling too far behind gets a full snapshot."""
+        version = self.get_results()['version']
+        self.submit_ballot()
+        
+        with self.settings(LIVE_RESULTS_DELTA_MAX_GAP=0):
+            data = self.get_results(since=version)
+        
+        self.assertNotIn('delta', data)
+        self.assertEqual(data['version'], version + 1)
+    
+    def test_new_candidate_gets_full_snapshot(self):
+        """Test that ballot layout changes cannot be sent as a delta."""
+        version = self.get_results()['version']
+        carol = Candidate.objects.create(name="Carol White", reg_no="CAND003")
+        carol.positions.add(self.position)
+        
+        data = self.get_results(since=version)
+        
+        self.assertNotIn('delta', data)
+        self.assertIn(carol.id, [c['id'] for c in data['results'][0]['candidates']])
+
+
+class PublishResultsTest(ElectionTestCase):
+    """Test publishing results as static snapshots."""
+    
+    def setUp(self):
+        """Set up a finished election and a temporary publish directory."""
+        import shutil
+        import tempfile
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        
+        settings = ElectionSettings.get_settings()
+        settings.voting_start_time = timezone.now() - timedelta(hours=2)
+        settings.voting_end_time = timezone.now() - timedelta(hours=1)
+        settings.save()
+        
+        position = Position.objects.create(title="President")
+        candidate = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        candidate.positions.add(position)
+        VoteTally.objects.create(position=position, candidate=candidate, votes=3)
+    
+    def test_command_publishes_json_and_html(self):
+        """Test that the command writes the results JSON and final results page."""
+        import os
+        from django.core.management import call_command
+        from io import StringIO
+        
+        call_command('publish_results', output=self.output, stdout=StringIO())
+        
+        with open(os.path.join(self.output, 'results.json')) as f:
+            data = json.load(f)
+        self.assertEqual(data['results'][0]['candidates'][0]['votes'], 3)
+        self.assertEqual(data['version'], ElectionStats.get_results_version())
+        with open(os.path.join(self.output, 'final_results.html')) as f:
+            self.assertIn("Alice Smith", f.read())
+        self.assertEqual(
+            sorted(os.listdir(self.output)), ['final_results.html', 'results.json']
+        )
+    
+    def test_write_atomic_replaces_file(self):
+        """Test that an atomic write replaces the file and leaves no temp files."""
+        import os
+        from .publish import write_atomic
+        
+        path = os.path.join(self.output, 'results.json')
+        write_atomic(path, b'old')
+        write_atomic(path, b'new')
+        
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+        self.assertEqual(os.listdir(self.output), ['results.json'])
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+    
+    def test_live_results_page_can_poll_snapshot(self):
+        """Test that the live results page points at the snapshot when enabled."""
+        with self.settings(RESULTS_SNAPSHOT_POLLING=True):
+            response = self.client.get(reverse('live_results'))
+        self.assertEqual(response.context['results_snapshot_url'], '/snapshots/results.json')
+        
+        response = self.client.get(reverse('live_results'))
+        self.assertIsNone(response.context['results_snapshot_url'])
+
+
+class FinalResultArtifactTest(ElectionTestCase):
+    """Test freezing the final results once the election closes."""
+    
+    def setUp(self):
+        """Set up a running election with one vote tallied."""
+        self.settings = ElectionSettings.get_settings()
+        self.settings.voting_start_time = timezone.now() - timedelta(hours=2)
+        self.settings.voting_end_time = timezone.now() + timedelta(hours=1)
+        self.settings.save()
+        
+        position = Position.objects.create(title="President")
+        candidate = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        candidate.positions.add(position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        Voter.objects.create(name="Other Voter", reg_no="VOTER002")
+        VoteTally.objects.create(position=position, candidate=candidate, votes=1)
+    
+    def end_voting(self):
+        """Move the end of voting into the past."""
+        self.settings.voting_end_time = timezone.now() - timedelta(minutes=1)
+        self.settings.save()
+    
+    def test_running_election_is_not_finalized(self):
+        """Test that the restricted page is rendered while voting is open."""
+        from .models import FinalResult
+        
+        response = self.client.get(reverse('final_results'))
+        
+        self.assertTemplateUsed(response, 'voting/final_results_restricted.html')
+        self.assertNotIn('immutable', response.get('Cache-Control', ''))
+        self.assertFalse(FinalResult.objects.exists())
+        self.assertIn('error', self.client.get(reverse('final_results_api')).json())
+    
+    def test_first_request_after_close_freezes_results(self):
+        """Test that later requests serve the artifact without reading the votes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import FinalResult
+        
+        self.end_voting()
+        first = self.client.get(reverse('final_results'))
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse('final_results'))
+        
+        final = FinalResult.objects.get()
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.content.decode(), final.html)
+        self.assertContains(second, "Alice Smith")
+        self.assertEqual(second['ETag'], f'"{final.content_hash}"')
+        self.assertEqual(second['Cache-Control'], 'public, max-age=5')
+        self.assertEqual(
+            second['Content-Location'], reverse('final_results_version', args=[final.content_hash])
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('voting_vote', queries[0]['sql'])
+        self.assertNotIn('voting_voter', queries[0]['sql'])
+    
+    def test_conditional_request_not_modified(self):
+        """Test that a matching If-None-Match gets a 304 response."""
+        self.end_voting()
+        etag = self.client.get(reverse('final_results'))['ETag']
+        
+        response = self.client.get(reverse('final_results'), HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('immutable', response['Cache-Control'])
+    
+    def test_api_serves_frozen_json(self):
+        """Test that the final results API serves the same frozen results."""
+        from .models import FinalResult
+        
+        self.end_voting()
+        response = self.client.get(reverse('final_results_api'))
+        
+        self.assertEqual(response.json()['results'][0]['candidates'][0]['votes'], 1)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.content.decode(), FinalResult.objects.get().payload)
+        
+        versioned = self.client.get(response['Content-Location'])
+        self.assertEqual(versioned.content, response.content)
+        self.assertIn('immutable', versioned['Cache-Control'])
+    
+    def test_versioned_url_is_immutable(self):
+        """Test that only the URL naming the content hash is cached as immutable."""
+        from .finalize import finalize_results
+        
+        self.end_voting()
+        final = finalize_results()
+        response = self.client.get(reverse('final_results_version', args=[final.content_hash]))
+        
+        self.assertEqual(response.content.decode(), final.html)
+        self.assertEqual(response['ETag'], f'"{final.content_hash}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('Content-Location', response)
+    
+    def test_superseded_version_redirects_to_current_results(self):
+        """Test that the URL of a replaced artifact is not served anymore."""
+        from .finalize import finalize_results
+        
+        self.end_voting()
+        first = finalize_results()
+        self.voter.delete()
+        
+        response = self.client.get(reverse('final_results_version', args=[first.content_hash]))
+        self.assertRedirects(response, reverse('final_results'), fetch_redirect_response=False)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.client.get(reverse('final_results_api_version', args=['unknown']))
+        self.assertRedirects(response, reverse('final_results_api'), fetch_redirect_response=False)
+    
+    def test_pending_journal_ballots_block_finalizing(self):
+        """Test that results are not frozen while journaled ballots are unapplied."""
+        import tempfile
+        from django.test import override_settings
+        from .finalize import finalize_results
+        from .journal import apply_journal, get_journal
+        
+        self.end_voting()
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        with override_settings(BALLOT_JOURNAL=True, BALLOT_JOURNAL_PATH=f'{temp_dir.name}/ballots.sqlite3'):
+            journal = get_journal()
+            self.addCleanup(journal.close)
+            journal.append(self.voter, [])
+            
+            self.assertIsNone(finalize_results())
+            apply_journal(journal)
+            self.assertEqual(finalize_results().total_voted, 1)
+    
+    def test_all_voters_voted_finalizes(self):
+        """Test that results freeze once every voter has voted, before the end time."""
+        from .finalize import finalize_results
+        
+        self.assertIsNone(finalize_results())
+        for voter in Voter.objects.all():
+            voter.mark_as_voted()
+        
+        self.assertIsNotNone(finalize_results())
+    
+    def test_command_finalizes_once(self):
+        """Test that the command freezes the results and is safe to rerun."""
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import FinalResult
+        
+        out = StringIO()
+        call_command('finalize_results', stdout=out)
+        self.assertIn('still running', out.getvalue())
+        
+        self.end_voting()
+        call_command('finalize_results', stdout=StringIO())
+        call_command('finalize_results', stdout=out)
+        
+        final = FinalResult.objects.get()
+        self.assertIn(final.content_hash, out.getvalue())
+    
+    def test_results_change_makes_artifact_stale(self):
+        """Test that a change to the results after the close is finalized anew."""
+        from .finalize import finalize_results
+        
+        self.end_voting()
+        first = finalize_results()
+        self.voter.delete()
+        second = finalize_results()
+        
+        self.assertNotEqual(first.results_version, second.results_version)
+        self.assertEqual(second.total_voters, 1)
+
+
+class LiveResultsStreamTest(ElectionTransactionTestCase):
+    """Test the Server-Sent Events live results stream under a local ASGI server."""
+    
+    CLIENTS = 150
+    
+    def setUp(self):
+        """Set up an open election with one candidate."""
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidate = Candidate.objects.create(name="Alice Smith", reg_no="CAND001")
+        self.candidate.positions.add(self.position)
+        self.voter = Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+    
+    def start_server(self):
+        """Serve the ASGI application with uvicorn on an ephemeral port; returns the port."""
+        import socket
+        import threading
+        import time
+        import uvicorn
+        from election_system.asgi import application
+        
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        server = uvicorn.Server(uvicorn.Config(
+            application, lifespan='off', log_level='warning', timeout_graceful_shutdown=5
+        ))
+        thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+        thread.start()
+        
+        def stop_server():
+            server.should_exit = True
+            thread.join(10)
+            sock.close()
+        self.addCleanup(stop_server)
+        
+        for _ in range(1000):
+            if server.started:
+                return sock.getsockname()[1]
+            time.sleep(0.01)
+        self.fail('The ASGI server did not start')
+    
+    async def sse_client(self, port, frames, connected, disconnect):
+        """Connect one SSE client over HTTP and collect the results frames it receives."""
+        import asyncio
+        
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(
+                f'GET {reverse("live_results_stream")} HTTP/1.1\r\n'
+                'Host: testserver\r\nAccept: text/event-stream\r\n\r\n'.encode()
+            )
+            head = await reader.readuntil(b'\r\n\r\n')
+            self.assertTrue(head.startswith(b'HTTP/1.1 200'), head)
+            self.assertIn(b'text/event-stream', head)
+            connected.append(True)
+            
+            # The body is chunked; each chunk is one event
+            async def read_events():
+                while True:
+                    size = int(await reader.readline(), 16)
+                    chunk = await reader.readexactly(size + 2)
+                    if chunk.startswith(b'id: '):
+                        data = chunk.decode().split('data: ', 1)[1]
+                        frames.append(json.loads(data))
+            
+            events = asyncio.ensure_future(read_events())
+            await disconnect.wait()
+            events.cancel()
+        finally:
+            writer.close()
+    
+    async def wait_for(self, condition, timeout=10):
+        """Wait until the condition holds or fail after the timeout."""
+        import asyncio
+        for _ in range(int(timeout / 0.01)):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail('Timed out waiting for SSE clients')
+    
+    async def test_many_clients_share_one_change_detector(self):
+        """Test that many SSE clients of one server are served by a single change detector."""
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from django.test import override_settings
+        from .streams import _broadcasters
+        
+        with override_settings(LIVE_RESULTS_STREAM_TICK=0.05):
+            port = await sync_to_async(self.start_server)()
+            frames = [[] for _ in range(self.CLIENTS)]
+            connected = []
+            disconnect = asyncio.Event()
+            clients = [
+                asyncio.ensure_future(self.sse_client(port, f, connected, disconnect))
+                for f in frames
+            ]
+            
+            # Every client receives the initial snapshot
+            await self.wait_for(lambda: all(len(f) >= 1 for f in frames))
+            self.assertEqual(len(connected), self.CLIENTS)
+            self.assertEqual(frames[0][0]['results'][0]['total_votes'], 0)
+            # Only the server's event loop has a broadcaster
+            [broadcaster] = list(_broadcasters.values())
+            self.assertEqual(len(broadcaster.subscribers), self.CLIENTS)
+            
+            # A committed ballot is pushed to everyone as one new frame
+            checks_before = broadcaster.checks
+            
+            def cast_ballot():
+                vote = Vote.objects.create(
+                    voter=self.voter, position=self.position, candidate=self.candidate
+                )
+                VoteTally.record_votes([vote])
+                ElectionStats.bump_results_version()
+            
+            await sync_to_async(cast_ballot)()
+            await self.wait_for(lambda: all(len(f) >= 2 for f in frames))
+            self.assertTrue(all(f[1]['results'][0]['total_votes'] == 1 for f in frames))
+            
+            # The detector ran once per tick, not once per client
+            self.assertLess(broadcaster.checks - checks_before, self.CLIENTS)
+            
+            # Unchanged results are not re-sent
+            await asyncio.sleep(0.2)
+            self.assertTrue(all(len(f) == 2 for f in frames))
+            
+            disconnect.set()
+            await asyncio.wait_for(asyncio.gather(*clients), timeout=10)
+            await self.wait_for(lambda: not broadcaster.subscribers)
+    
+    def test_stream_requires_asgi(self):
+        """Test that the stream endpoint refuses to run under WSGI."""
+        response = self.client.get(reverse('live_results_stream'))
+        self.assertEqual(response.status_code, 501)
+
+
+class AdminFunctionalityTest(ElectionTestCase):
     """Test administrative functionality."""
     
     def setUp(self):
@@ -906,11 +2686,374 @@ Web Test Candidate,WTC001,Test bio through web interface,President"""
             
         finally:
             os.unlink(csv_file_path)
+    
+    def test_changelist_uses_row_estimate_for_large_tables(self):
+        """Test that the vote changelist shows the estimate instead of counting."""
+        from .admin import EstimatedCountPaginator
+        
+        with patch.object(EstimatedCountPaginator, 'estimated_count', return_value=250000):
+            response = self.client.get(reverse('admin:voting_vote_changelist'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 250000)
+    
+    def test_estimated_count_falls_back_to_exact(self):
+        """Test that small, filtered or non-PostgreSQL counts are exact."""
+        from .admin import EstimatedCountPaginator
+        
+        Voter.objects.create(name="Test Voter", reg_no="VOTER001")
+        
+        paginator = EstimatedCountPaginator(Voter.objects.filter(has_voted=False), 100)
+        self.assertIsNone(paginator.estimated_count())
+        self.assertEqual(paginator.count, 1)
+        with patch.object(EstimatedCountPaginator, 'estimated_count', return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Voter.objects.all(), 100).count, 1)
 
     # ...existing test methods...
 
 
-class EdgeCaseTest(TestCase):
+class QueryBudgetTest(QueryBudgetMixin, ElectionTestCase):
+    """Test that no page's query count grows with the size of the election."""
+    
+    def setUp(self):
+        """Set up an open election, a staff client and a small electorate."""
+        self.open_election(show_live_results=True)
+        
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.staff = Client()
+        self.staff.login(username='admin', password='testpass123')
+        
+        self.added = 0
+        self.grow_election(positions=2, candidates=2, voters=4)
+        self.ballot = {
+            f'position_{position.id}': position.candidates.first().id
+            for position in Position.objects.all()
+        }
+    
+    def grow_election(self, positions=3, candidates=3, voters=20):
+        """Add positions with candidates, and voters of whom half vote on every position."""
+        start = self.added
+        self.added += 1
+        new_positions = [
+            Position.objects.create(title=f'Position {start}.{p}') for p in range(positions)
+        ]
+        for position in new_positions:
+            for c in range(candidates):
+                candidate = Candidate.objects.create(
+                    name=f'Candidate {position.title}.{c}',
+                    reg_no=f'C{start}-{position.id}-{c}'
+                )
+                candidate.positions.add(position)
+        
+        new_voters = [
+            Voter.objects.create(name=f'Voter {start}.{v}', reg_no=f'V{start}-{v}')
+            for v in range(voters)
+        ]
+        votes = [
+            Vote(voter=voter, position=position, candidate=position.candidates.first())
+            for voter in new_voters[::2]
+            for position in Position.objects.all()
+        ]
+        Vote.objects.bulk_create(votes)
+        VoteTally.record_votes(votes)
+        Voter.objects.filter(pk__in=[voter.pk for voter in new_voters[::2]]).update(
+            has_voted=True, voted_at=timezone.now()
+        )
+        ElectionStats.bump_results_version()
+    
+    def voter_client(self, has_voted=False):
+        """A client logged in as a voter who has (or has not) voted."""
+        voter = Voter.objects.filter(has_voted=has_voted).first()
+        client = Client()
+        client.post(reverse('login_voter'), {'token': str(voter.token)})
+        return client
+    
+    def assertPageQueriesConstant(self, client, url_name, **kwargs):
+        """Assert that a GET of ``url_name`` runs as many queries after the election grows."""
+        url = reverse(url_name)
+        self.assertConstantQueries(lambda: client.get(url, **kwargs), self.grow_election)
+    
+    def test_index(self):
+        """Test the home page."""
+        self.assertPageQueriesConstant(Client(), 'index')
+    
+    def test_login_voter(self):
+        """Test logging in with a token."""
+        token = str(Voter.objects.filter(has_voted=False).first().token)
+        self.assertConstantQueries(
+            lambda: Client().post(reverse('login_voter'), {'token': token}),
+            self.grow_election
+        )
+    
+    def test_vote(self):
+        """Test the ballot page."""
+        self.assertPageQueriesConstant(self.voter_client(), 'vote')
+    
+    def test_submit_vote(self):
+        """Test submitting a ballot while the electorate and vote count grow."""
+        def submit():
+            voter = Voter.objects.create(name='Late Voter', reg_no=f'L{uuid.uuid4().hex[:8]}')
+            client = Client()
+            client.post(reverse('login_voter'), {'token': str(voter.token)})
+            response = client.post(
+                reverse('submit_vote'), {**self.ballot, 'idempotency_key': uuid.uuid4().hex}
+            )
+            self.assertTrue(response.json()['success'])
+            return response
+        
+        # The ballot keeps its width: each selection costs a tally update by design
+        self.assertConstantQueries(submit, self.grow_election)
+    
+    def test_voting_complete(self):
+        """Test the page shown after voting."""
+        self.assertPageQueriesConstant(self.voter_client(has_voted=True), 'voting_complete')
+    
+    def test_live_results(self):
+        """Test the live results page."""
+        self.assertPageQueriesConstant(Client(), 'live_results')
+    
+    def test_live_results_api(self):
+        """Test the live results API."""
+        self.assertPageQueriesConstant(Client(), 'live_results_api')
+    
+    def test_turnout_api(self):
+        """Test the turnout API."""
+        self.assertPageQueriesConstant(Client(), 'turnout_api')
+    
+    def test_final_results(self):
+        """Test the final results page once voting has ended."""
+        settings = ElectionSettings.get_settings()
+        settings.voting_end_time = timezone.now() - timedelta(minutes=1)
+        settings.save()
+        
+        self.assertPageQueriesConstant(Client(), 'final_results')
+    
+    def test_audit_trail(self):
+        """Test the audit trail."""
+        self.assertPageQueriesConstant(self.staff, 'audit_trail')
+    
+    def test_export_voters_csv(self):
+        """Test the voter export."""
+        self.assertPageQueriesConstant(self.staff, 'export_voters_csv')
+    
+    def test_import_voters_page(self):
+        """Test the voter import page."""
+        self.assertPageQueriesConstant(self.staff, 'import_voters_csv')
+    
+    def test_import_candidates_page(self):
+        """Test the candidate import page."""
+        self.assertPageQueriesConstant(self.staff, 'import_candidates_csv')
+    
+    def test_admin_election_settings_changelist(self):
+        """Test the election settings changelist."""
+        self.assertPageQueriesConstant(self.staff, 'admin:voting_electionsettings_changelist')
+    
+    def test_admin_voter_changelist(self):
+        """Test the voter changelist."""
+        self.assertPageQueriesConstant(self.staff, 'admin:voting_voter_changelist')
+    
+    def test_admin_position_changelist(self):
+        """Test the position changelist."""
+        self.assertPageQueriesConstant(self.staff, 'admin:voting_position_changelist')
+    
+    def test_admin_candidate_changelist(self):
+        """Test the candidate changelist."""
+        self.assertPageQueriesConstant(self.staff, 'admin:voting_candidate_changelist')
+    
+    def test_admin_vote_changelist(self):
+        """Test the vote changelist."""
+        self.assertPageQueriesConstant(self.staff, 'admin:voting_vote_changelist')
+    
+    def test_budget_reports_repeated_statements(self):
+        """Test that an exceeded budget fails and names the repeated statement."""
+        from .query_budget import QueryBudgetExceeded, query_budget
+        
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget(2):
+                for voter in Voter.objects.all():
+                    Vote.objects.filter(voter=voter).count()
+        
+        self.assertIn(f'{Voter.objects.count()}x SELECT COUNT(*)', str(raised.exception))
+        
+        @query_budget(1)
+        def within_budget():
+            return Voter.objects.count()
+        
+        self.assertEqual(within_budget(), Voter.objects.count())
+
+
+class QueryPlanTest(QueryPlanMixin, ElectionTestCase):
+    """Test that the hot queries are planned with the indexes meant for them."""
+    
+    def setUp(self):
+        """Set up an open election with a few ballots and a staff client."""
+        from .ballot import record_ballot, validate_ballot
+        
+        self.open_election()
+        
+        self.position = Position.objects.create(title="President")
+        self.candidates = [
+            Candidate.objects.create(name=f"Candidate {i}", reg_no=f"C00{i}") for i in range(2)
+        ]
+        for candidate in self.candidates:
+            candidate.positions.add(self.position)
+        for i in range(4):
+            voter = Voter.objects.create(name=f"Voter {i}", reg_no=f"VOTER00{i}")
+            choice = {self.position.id: self.candidates[i % 2].id}
+            record_ballot(voter, validate_ballot(voter, choice))
+        Voter.objects.create(name="Pending Voter", reg_no="VOTER009")
+        
+        User.objects.create_superuser('admin', 'admin@test.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+    
+    def captured_sql(self, url, table):
+        """Get the SELECTs reading ``table`` while requesting ``url``."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+        ]
+        self.assertTrue(statements, f'No query read {table}')
+        return statements
+    
+    def test_candidate_votes_use_position_candidate_index(self):
+        """Test that a candidate's votes in a position are an index lookup."""
+        votes = Vote.objects.filter(position=self.position, candidate=self.candidates[0])
+        
+        self.assertUsesIndex(votes, 'vote_position_candidate_idx')
+        self.assertNoFullScan(votes, 'voting_vote')
+    
+    def test_newest_votes_use_voted_at_index(self):
+        """Test that the audit trail and the vote admin list votes in index order."""
+        statements = (
+            self.captured_sql(reverse('audit_trail'), 'voting_vote')
+            + self.captured_sql(reverse('admin:voting_vote_changelist'), 'voting_vote')
+        )
+        
+        ordered = [sql for sql in statements if 'ORDER BY' in sql]
+        self.assertGreaterEqual(len(ordered), 2)
+        for sql in ordered:
+            self.assertUsesIndex(sql, 'vote_voted_at_idx')
+    
+    def test_voted_voters_use_partial_index(self):
+        """Test that filtering voters who have voted reads only the partial index."""
+        voted = Voter.objects.filter(has_voted=True)
+        
+        self.assertUsesIndex(voted.order_by('voted_at'), 'voter_voted_idx')
+        self.assertNoFullScan(voted.values('voted_at'), 'voting_voter')
+    
+    def test_results_as_of_use_rollup_index(self):
+        """Test that historical results look up each candidacy's rollup buckets."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .results import compute_results
+        
+        with CaptureQueriesContext(connection) as queries:
+            compute_results(as_of=timezone.now())
+        standings, = [q['sql'] for q in queries.captured_queries if 'voting_vote_rollup' in q['sql']]
+        
+        self.assertUsesIndex(standings, 'vote_rollup_candidate_idx')
+    
+    def test_full_scan_is_reported(self):
+        """Test that a query without a usable index fails the plan assertions."""
+        # Unordered, so the voted_at index is no use either
+        unindexed = Vote.objects.filter(ip_address='10.0.0.1').order_by()
+        
+        with self.assertRaises(AssertionError):
+            self.assertNoFullScan(unindexed, 'voting_vote')
+        with self.assertRaises(AssertionError):
+            self.assertUsesIndex(unindexed, 'vote_position_candidate_idx')
+
+
+class SyntheticElectionTest(ElectionTestCase):
+    """Test the synthetic elections used by simulate_election and the benchmarks."""
+    
+    def test_creates_open_election(self):
+        """Test that the bulk-created election is complete and open for voting."""
+        from .ballot import get_ballot_schema
+        from .clock import ElectionClock
+        from .synthetic import create_synthetic_election
+        
+        election = create_synthetic_election(voters=25, positions=3, candidates_per_position=4)
+        
+        self.assertEqual(election.voters().count(), 25)
+        self.assertEqual(len(election.candidates_by_position), 3)
+        self.assertTrue(ElectionClock().is_voting_open)
+        schema = get_ballot_schema()
+        for position_id, candidate_ids in election.candidates_by_position.items():
+            self.assertEqual(schema.positions_by_id[position_id].candidate_ids, set(candidate_ids))
+    
+    def test_scratch_database_restores_test_settings(self):
+        """Test that the scratch database never clobbers by default and leaves the settings as found."""
+        from django.db import connection
+        from .synthetic import scratch_database
+        
+        test_settings = dict(connection.settings_dict['TEST'])
+        with patch.object(connection.creation, 'create_test_db', return_value='old') as create, \
+                patch.object(connection.creation, 'destroy_test_db'), \
+                patch('voting.synthetic.connections'):
+            with scratch_database():
+                self.assertNotEqual(connection.settings_dict['TEST'], test_settings)
+            self.assertFalse(create.call_args.kwargs['autoclobber'])
+            
+            with self.assertRaises(RuntimeError):
+                with scratch_database(clobber=True):
+                    raise RuntimeError
+            self.assertTrue(create.call_args.kwargs['autoclobber'])
+        
+        self.assertEqual(connection.settings_dict['TEST'], test_settings)
+
+
+class BenchmarkSuiteTest(ElectionTestCase):
+    """Test the results benchmark fixtures and report comparison."""
+    
+    def test_fixture_tallies_match_votes(self):
+        """Test that the bulk-built fixture has consistent votes, voters and tallies."""
+        from .benchmarks.fixtures import build_results_fixture
+        
+        build_results_fixture(votes=200, positions=4, candidates_per_position=3)
+        
+        self.assertEqual(Vote.objects.count(), 200)
+        self.assertEqual(Voter.objects.filter(has_voted=True).count(), 50)
+        self.assertEqual(sum(VoteTally.totals().values()), 200)
+    
+    def test_run_scale_times_endpoints(self):
+        """Test that endpoints are timed with their status and query count."""
+        from .benchmarks.fixtures import build_results_fixture
+        from .benchmarks.suite import run_scale
+        
+        build_results_fixture(votes=100, positions=2, candidates_per_position=2)
+        results = run_scale(repeat=2, endpoints=['live_results_api', 'admin_votes'])
+        
+        for timing in results.values():
+            self.assertEqual(timing['status'], 200)
+            self.assertEqual(timing['runs'], 2)
+            self.assertGreater(timing['queries'], 0)
+    
+    def test_compare_flags_slowdowns_over_threshold(self):
+        """Test that only slowdowns beyond the threshold and noise floor are flagged."""
+        from .benchmarks.suite import compare_reports
+        
+        def report(**timings):
+            return {'scales': {'10k': {'endpoints': {
+                name: {'median_ms': ms} for name, ms in timings.items()
+            }}}}
+        
+        rows, regressions = compare_reports(
+            report(live_results=100, audit_trail=100, admin_votes=2),
+            report(live_results=110, audit_trail=150, admin_votes=4, final_results=50),
+            threshold=0.2
+        )
+        
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row[1] for row in regressions], ['audit_trail'])
+
+
+class EdgeCaseTest(ElectionTestCase):
     """Test edge cases and error handling."""
     
     def test_no_candidates_for_position(self):
@@ -955,7 +3098,7 @@ class EdgeCaseTest(TestCase):
         self.assertContains(response, "token", msg_prefix="Should show login form for invalid token")
 
 
-class PerformanceTest(TestCase):
+class PerformanceTest(ElectionTestCase):
     """Test performance-related aspects."""
     
     def test_large_voter_count_handling(self):
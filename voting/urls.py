@@ -17,7 +17,15 @@ urlpatterns = [
     # Results pages
     path('live-results/', views.live_results, name='live_results'),
     path('api/live-results/', views.live_results_api, name='live_results_api'),
+    path('api/live-results/stream/', views.live_results_stream, name='live_results_stream'),
+    path('api/turnout/', views.turnout_api, name='turnout_api'),
     path('final-results/', views.final_results, name='final_results'),
+    path('api/final-results/', views.final_results_api, name='final_results_api'),
+    path('final-results/<str:content_hash>/', views.final_results_version, name='final_results_version'),
+    path(
+        'api/final-results/<str:content_hash>/', views.final_results_version,
+        {'as_json': True}, name='final_results_api_version'
+    ),
     
     # Admin and audit
     path('audit/', views.audit_trail, name='audit_trail'),
@@ -7,18 +7,35 @@ voting process, results display, and admin functionality.
 
 import csv
 import json
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from django.views.decorators.cache import never_cache
-from django.db import transaction
-from django.db.models import Count, Q
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.urls import reverse
 
-from .models import Voter, Position, Candidate, Vote, ElectionSettings
+from .ballot import BallotError, get_ballot_schema, has_cast_ballot, parse_selections, submit_ballot
+from .clock import get_clock
+from .finalize import finalize_results
+from .models import Voter, Position, Candidate, Vote, ElectionSettings, FinalResult
+from .publish import get_snapshot_url
+from .results import compute_results, compute_results_delta, get_turnout, results_etag
+from .rollups import turnout_series
+from .streams import stream_results
+
+# Cache value marking a submission that is still being processed
+SUBMISSION_IN_PROGRESS = 'in-progress'
 
 
 def get_client_ip(request):
@@ -31,20 +48,83 @@ def get_client_ip(request):
     return ip
 
 
+def parse_query_time(value):
+    """
+    Parse an ISO 8601 time from a query parameter (None if empty).
+
+    A time without an offset is in the current time zone. Raises
+    ValueError if the value is not a valid time.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f'Invalid time: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
 def with_election_settings(view_func):
     """Decorator to add election settings to view context."""
     def wrapper(request, *args, **kwargs):
         if not hasattr(request, '_cached_election_settings'):
-            request._cached_election_settings = ElectionSettings.get_settings()
+            request._cached_election_settings = get_clock().settings
         return view_func(request, *args, **kwargs)
     return wrapper
 
 
+def idempotent_submission(view_func):
+    """
+    Decorator to replay the original response to a retried vote submission.
+
+    The voting form posts an ``idempotency_key`` generated when the page was
+    rendered. A successful response is cached per (voter, key) for
+    ``SUBMIT_IDEMPOTENCY_TTL`` seconds, and a retry with the same key gets it
+    back from the cache without validation, locks or database writes. A retry
+    that arrives while the first request is still running is told to wait.
+    Failed submissions are not kept, so the voter can correct and resubmit.
+    """
+    def wrapper(request, *args, **kwargs):
+        voter_token = request.session.get('voter_token')
+        key = request.POST.get('idempotency_key', '')
+        if not voter_token or not key or len(key) > 64:
+            return view_func(request, *args, **kwargs)
+        
+        cache_key = f'voting:submit_vote:{voter_token}:{key}'
+        if not cache.add(cache_key, SUBMISSION_IN_PROGRESS, 60):
+            outcome = cache.get(cache_key)
+            if outcome == SUBMISSION_IN_PROGRESS:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Your vote is still being processed',
+                    'in_progress': True
+                })
+            if outcome is not None:
+                return JsonResponse(outcome)
+        
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        
+        outcome = json.loads(response.content)
+        if outcome.get('success'):
+            ttl = getattr(django_settings, 'SUBMIT_IDEMPOTENCY_TTL', 600)
+            cache.set(cache_key, outcome, ttl)
+        else:
+            cache.delete(cache_key)
+        return response
+    return wrapper
+
+
 @with_election_settings
 def index(request):
     """
     Home page showing election information and login form.
     """
+    clock = get_clock()
     settings = request._cached_election_settings
     
     # Check if voter is already authenticated
@@ -52,7 +132,7 @@ def index(request):
     if voter_token:
         try:
             voter = Voter.objects.get(token=voter_token)
-            if voter.has_voted:
+            if has_cast_ballot(voter):
                 return redirect('voting_complete')
             else:
                 return redirect('vote')
@@ -61,15 +141,14 @@ def index(request):
             request.session.pop('voter_token', None)
     
     # Get active positions for display
-    now = timezone.now()
+    now = clock.now
     active_positions = Position.objects.filter(is_active=True)
     
     # Check if voting is globally open
-    is_voting_open = settings.is_voting_open()
+    is_voting_open = clock.is_voting_open
     
     # Get voter statistics
-    total_voters = Voter.objects.count()
-    total_voted = Voter.objects.filter(has_voted=True).count()
+    total_voters, total_voted = get_turnout()
     turnout_percentage = 0
     if total_voters > 0:
         turnout_percentage = round((total_voted / total_voters) * 100, 1)
@@ -102,7 +181,7 @@ def login_voter(request):
         try:
             voter = Voter.objects.get(token=token)
             
-            if voter.has_voted:
+            if has_cast_ballot(voter):
                 messages.info(request, 'You have already cast your vote. Thank you!')
                 request.session['voter_token'] = str(voter.token)
                 return redirect('voting_complete')
@@ -146,16 +225,17 @@ def vote(request):
         request.session.pop('voter_token', None)
         return redirect('index')
     
-    if voter.has_voted:
+    if has_cast_ballot(voter):
         return redirect('voting_complete')
     
     # Get active positions with their candidates
-    now = timezone.now()
-    settings = ElectionSettings.get_settings()
+    clock = get_clock()
+    now = clock.now
+    settings = clock.settings
     
     # Check if voting is globally open
-    if not settings.is_voting_open():
-        voting_status = settings.get_voting_status()
+    if not clock.is_voting_open:
+        voting_status = clock.status
         if voting_status == "Not Started":
             messages.warning(request, f'Voting has not started yet. Voting begins at {settings.voting_start_time.strftime("%B %d, %Y at %I:%M %p")}.')
         elif voting_status == "Ended":
@@ -164,20 +244,19 @@ def vote(request):
             messages.warning(request, 'Voting is not available at this time.')
         return render(request, 'voting/voting_closed.html', {'settings': settings})
     
-    positions = Position.objects.filter(is_active=True).prefetch_related('candidates')
+    schema = get_ballot_schema()
     
-    if not positions.exists():
+    if not schema.positions:
         messages.warning(request, 'No active voting positions at this time.')
         return render(request, 'voting/no_active_voting.html')
     
     # Prepare positions data for template
     positions_data = []
-    for position in positions:
-        candidates = position.candidates.filter(is_active=True)
-        if candidates.exists():
+    for position in schema.positions:
+        if position.candidates:
             positions_data.append({
                 'position': position,
-                'candidates': candidates
+                'candidates': position.candidates
             })
     
     if not positions_data:
@@ -188,6 +267,7 @@ def vote(request):
         'voter': voter,
         'positions_data': positions_data,
         'current_time': now,
+        'idempotency_key': uuid.uuid4().hex,
     }
     
     return render(request, 'voting/vote.html', context)
@@ -196,6 +276,7 @@ def vote(request):
 @csrf_protect
 @require_POST
 @never_cache
+@idempotent_submission
 def submit_vote(request):
     """
     Handle vote submission with validation and fraud prevention.
@@ -210,91 +291,26 @@ def submit_vote(request):
     except:
         return JsonResponse({'success': False, 'error': 'Invalid session'})
     
-    if voter.has_voted:
+    if has_cast_ballot(voter):
         return JsonResponse({'success': False, 'error': 'You have already voted'})
     
     # Check if voting is still globally open
-    settings = ElectionSettings.get_settings()
-    if not settings.is_voting_open():
+    clock = get_clock()
+    if not clock.is_voting_open:
         return JsonResponse({
             'success': False, 
             'error': 'Voting has ended. Your vote cannot be processed.',
             'voting_ended': True
         })
     
-    # Get current time and client IP
-    now = timezone.now()
     client_ip = get_client_ip(request)
     
-    # Parse vote selections
-    vote_data = {}
-    errors = []
-    
-    for key, value in request.POST.items():
-        if key.startswith('position_') and value:
-            try:
-                position_id = int(key.split('_')[1])
-                candidate_id = int(value)
-                vote_data[position_id] = candidate_id
-            except (ValueError, IndexError):
-                errors.append(f"Invalid vote data: {key}")
-    
-    if not vote_data:
-        return JsonResponse({'success': False, 'error': 'No votes selected'})
-    
-    if errors:
-        return JsonResponse({'success': False, 'error': '; '.join(errors)})
-    
-    # Validate votes and create vote objects
-    votes_to_create = []
-    
-    with transaction.atomic():
-        for position_id, candidate_id in vote_data.items():
-            try:
-                position = Position.objects.get(id=position_id, is_active=True)
-                candidate = Candidate.objects.get(id=candidate_id, is_active=True)
-                
-                # Check if voting is still open for this position
-                if not position.is_voting_open():
-                    return JsonResponse({
-                        'success': False, 
-                        'error': f'Voting for {position.title} is not open'
-                    })
-                
-                # Check if candidate is contesting for this position
-                if not candidate.positions.filter(id=position_id).exists():
-                    return JsonResponse({
-                        'success': False,
-                        'error': f'{candidate.name} is not contesting for {position.title}'
-                    })
-                
-                # Check if voter has already voted for this position
-                if Vote.objects.filter(voter=voter, position=position).exists():
-                    return JsonResponse({
-                        'success': False,
-                        'error': f'You have already voted for {position.title}'
-                    })
-                
-                # Create vote object
-                vote = Vote(
-                    voter=voter,
-                    position=position,
-                    candidate=candidate,
-                    ip_address=client_ip
-                )
-                votes_to_create.append(vote)
-                
-            except (Position.DoesNotExist, Candidate.DoesNotExist):
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Invalid position or candidate'
-                })
-        
-        # Save all votes
-        Vote.objects.bulk_create(votes_to_create)
-        
-        # Mark voter as voted
-        voter.mark_as_voted()
+    # Parse and validate vote selections, then record the ballot
+    try:
+        selections = parse_selections(request.POST)
+        submit_ballot(voter, selections, client_ip, clock.now)
+    except BallotError as e:
+        return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({
         'success': True,
@@ -315,192 +331,242 @@ def voting_complete(request):
     except:
         return redirect('index')
     
-    if not voter.has_voted:
+    if not has_cast_ballot(voter):
         return redirect('vote')
     
     context = {
         'voter': voter,
-        'settings': ElectionSettings.get_settings()
+        'settings': get_clock().settings
     }
     
     return render(request, 'voting/voting_complete.html', context)
 
 
+def live_results_etag(request):
+    """Strong ETag for the live results payload (see ``results_etag``)."""
+    return results_etag()
+
+
 @never_cache
 def live_results(request):
     """
     Display live voting results with auto-refresh.
     """
-    settings = ElectionSettings.get_settings()
+    clock = get_clock()
+    settings = clock.settings
     
     if not settings.show_live_results:
         return render(request, 'voting/results_disabled.html')
     
-    # Get all positions with vote counts
-    positions = Position.objects.filter(is_active=True).prefetch_related(
-        'candidates', 'candidates__vote_set'
-    )
-    
-    results_data = []
-    total_voters = Voter.objects.count()
-    total_voted = Voter.objects.filter(has_voted=True).count()
-    pending_voters = total_voters - total_voted
-    
-    # Check if election has ended
-    now = timezone.now()
-    voting_ended_by_time = settings.is_voting_ended()
-    all_voters_voted = total_voters > 0 and total_voted == total_voters
-    election_ended = voting_ended_by_time or all_voters_voted
-    
-    # Determine end reason
-    end_reason = None
-    if election_ended:
-        if all_voters_voted:
-            end_reason = "All eligible voters have cast their votes"
-        elif voting_ended_by_time:
-            end_reason = "Voting time period has ended"
-    
-    for position in positions:
-        candidates_data = []
-        total_votes_for_position = Vote.objects.filter(position=position).count()
-        
-        for candidate in position.candidates.filter(is_active=True):
-            vote_count = Vote.objects.filter(
-                position=position, 
-                candidate=candidate
-            ).count()
-            
-            percentage = 0
-            if total_votes_for_position > 0:
-                percentage = (vote_count / total_votes_for_position) * 100
-            
-            candidates_data.append({
-                'candidate': candidate,
-                'votes': vote_count,
-                'percentage': round(percentage, 1)
-            })
-        
-        # Sort by vote count (descending)
-        candidates_data.sort(key=lambda x: x['votes'], reverse=True)
-        
-        results_data.append({
-            'position': position,
-            'candidates': candidates_data,
-            'total_votes': total_votes_for_position,
-            'status': position.get_status()
-        })
+    results_etag = live_results_etag(request)
+    results = compute_results(clock)
     
     context = {
-        'results_data': results_data,
-        'total_voters': total_voters,
-        'total_voted': total_voted,
-        'pending_voters': pending_voters,
-        'election_ended': election_ended,
-        'end_reason': end_reason,
-        'voting_ended_by_time': voting_ended_by_time,
-        'all_voters_voted': all_voters_voted,
+        'results_etag': results_etag,
+        'results_version': results.version,
+        'results_snapshot_url': get_snapshot_url() if django_settings.RESULTS_SNAPSHOT_POLLING else None,
+        'results_data': results.positions,
+        'total_voters': results.total_voters,
+        'total_voted': results.total_voted,
+        'pending_voters': results.pending_voters,
+        'election_ended': results.election_ended,
+        'end_reason': results.end_reason,
+        'voting_ended_by_time': results.voting_ended_by_time,
+        'all_voters_voted': results.all_voters_voted,
         'settings': settings,
-        'current_time': timezone.now()
+        'current_time': results.generated_at
     }
     
     return render(request, 'voting/live_results.html', context)
 
 
 @never_cache
+@condition(etag_func=live_results_etag)
 def live_results_api(request):
     """
     API endpoint for live results data (JSON).
+    
+    Clients that send the last ETag in If-None-Match get a 304 response
+    until the results change. Clients that pass ``?since=<version>`` get
+    only the counts that changed since that version, or a full snapshot
+    if the change cannot be expressed as a delta. ``?as_of=<ISO 8601 time>``
+    returns the results as they stood at the end of that minute.
     """
-    settings = ElectionSettings.get_settings()
+    clock = get_clock()
     
-    if not settings.show_live_results:
+    if not clock.settings.show_live_results:
         return JsonResponse({'error': 'Live results are disabled'})
     
-    # Get results data
-    positions = Position.objects.filter(is_active=True)
-    results = []
+    try:
+        as_of = parse_query_time(request.GET.get('as_of'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if as_of is not None:
+        return JsonResponse(compute_results(clock, as_of=as_of).to_dict())
     
-    total_voters = Voter.objects.count()
-    total_voted = Voter.objects.filter(has_voted=True).count()
+    since = request.GET.get('since', '')
+    if since.isdigit():
+        delta = compute_results_delta(int(since), clock)
+        if delta is not None:
+            return JsonResponse(delta)
     
-    # Check if election has ended
-    now = timezone.now()
-    voting_ended_by_time = settings.is_voting_ended()
-    all_voters_voted = total_voters > 0 and total_voted == total_voters
-    election_ended = voting_ended_by_time or all_voters_voted
+    return JsonResponse(compute_results(clock).to_dict())
+
+
+@never_cache
+@condition(etag_func=live_results_etag)
+def turnout_api(request):
+    """
+    API endpoint for turnout over time (JSON), in one-minute buckets.
     
-    # Determine end reason
-    end_reason = None
-    if election_ended:
-        if all_voters_voted:
-            end_reason = "All eligible voters have cast their votes"
-        elif voting_ended_by_time:
-            end_reason = "Voting time period has ended"
+    ``?since=<ISO 8601 time>`` returns only the buckets from that minute on,
+    with the total before it, so charts can poll incrementally.
+    ``?position=<id>`` counts the votes for one position instead of
+    ballots. Staff can read it while live results are hidden.
+    """
+    clock = get_clock()
     
-    for position in positions:
-        candidates_data = []
-        total_votes = Vote.objects.filter(position=position).count()
-        
-        for candidate in position.candidates.filter(is_active=True):
-            vote_count = Vote.objects.filter(
-                position=position, 
-                candidate=candidate
-            ).count()
-            
-            percentage = 0
-            if total_votes > 0:
-                percentage = (vote_count / total_votes) * 100
-            
-            candidates_data.append({
-                'name': candidate.name,
-                'votes': vote_count,
-                'percentage': round(percentage, 1)
-            })
-        
-        candidates_data.sort(key=lambda x: x['votes'], reverse=True)
-        
-        results.append({
-            'position': position.title,
-            'candidates': candidates_data,
-            'total_votes': total_votes,
-            'status': position.get_status()
-        })
+    if not clock.settings.show_live_results and not request.user.is_staff:
+        return JsonResponse({'error': 'Live results are disabled'})
     
-    return JsonResponse({
-        'results': results,
-        'total_voters': total_voters,
-        'total_voted': total_voted,
-        'election_ended': election_ended,
-        'end_reason': end_reason,
-        'voting_ended_by_time': voting_ended_by_time,
-        'all_voters_voted': all_voters_voted,
-        'timestamp': timezone.now().isoformat()
-    })
+    try:
+        since = parse_query_time(request.GET.get('since'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    position_id = request.GET.get('position', '')
+    if position_id and not position_id.isdigit():
+        return JsonResponse({'error': f'Invalid position: {position_id}'}, status=400)
+    
+    series = turnout_series(since, int(position_id) if position_id else None)
+    return JsonResponse(series.to_dict())
+
+
+async def live_results_stream(request):
+    """
+    Server-Sent Events stream of live results (ASGI only).
+    
+    Pushes a results frame whenever the results change. All clients of a
+    worker share one change detector (see ``voting.streams``).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live results streaming requires the ASGI server'}, status=501
+        )
+    
+    settings = await sync_to_async(ElectionSettings.get_cached_settings)()
+    if not settings.show_live_results:
+        return JsonResponse({'error': 'Live results are disabled'})
+    
+    response = StreamingHttpResponse(
+        stream_results(request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream'
+    )
+    add_never_cache_headers(response)
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
 
 
 def final_results(request):
     """
     Display final election results (winners only).
     Only show results if voting has ended or all voters have voted.
+    
+    Once the election has closed the page is rendered only once (see
+    ``voting.finalize``) and served as a frozen artifact.
+    """
+    clock = get_clock()
+    artifact = FinalResult.current()
+    if artifact is None:
+        turnout = get_turnout()
+        artifact = finalize_results(clock, turnout)
+        if artifact is None:
+            template_name, context = final_results_page(clock, turnout=turnout)
+            return render(request, template_name, context)
+    
+    return final_artifact_response(request, artifact)
+
+
+def final_results_api(request):
+    """
+    API endpoint for the final results (JSON), once the election has closed.
     """
-    # Check if final results should be visible
-    total_voters = Voter.objects.count()
-    total_voted = Voter.objects.filter(has_voted=True).count()
+    artifact = FinalResult.current() or finalize_results(get_clock())
+    if artifact is None:
+        response = JsonResponse({'error': 'Final results are not available until voting ends'})
+        add_never_cache_headers(response)
+        return response
     
-    # Get global voting status
-    settings = ElectionSettings.get_settings()
-    now = timezone.now()
+    return final_artifact_response(request, artifact, as_json=True)
+
+
+def final_results_version(request, content_hash, as_json=False):
+    """
+    Serve the final results artifact with the given content hash.
+    
+    Only the current artifact is served; a superseded or unknown hash is
+    redirected to the canonical final results URL.
+    """
+    artifact = FinalResult.current()
+    if artifact is None or artifact.content_hash != content_hash:
+        response = redirect('final_results_api' if as_json else 'final_results')
+        add_never_cache_headers(response)
+        return response
     
-    # Check if voting has ended globally
-    voting_ended = settings.is_voting_ended()
+    return final_artifact_response(request, artifact, as_json=as_json, versioned=True)
+
+
+def final_artifact_response(request, artifact, as_json=False, versioned=False):
+    """
+    Serve a frozen final results artifact with its content hash as the ETag.
     
-    # Check if all voters have voted
+    The URL naming the content hash always has the same content, so it is
+    cached as immutable. The canonical URLs serve whichever artifact is
+    current, which an admin change can replace, so they are cached only
+    briefly and point at the versioned URL with Content-Location.
+    """
+    if as_json:
+        content, content_type, etag = artifact.payload, 'application/json', f'{artifact.content_hash}-json'
+        url_name = 'final_results_api_version'
+    else:
+        content, content_type, etag = artifact.html, 'text/html; charset=utf-8', artifact.content_hash
+        url_name = 'final_results_version'
+    
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = f'"{etag}"'
+    if versioned:
+        patch_cache_control(
+            response, public=True, immutable=True,
+            max_age=django_settings.FINAL_RESULTS_MAX_AGE
+        )
+    else:
+        response['Content-Location'] = reverse(url_name, args=[artifact.content_hash])
+        patch_cache_control(
+            response, public=True,
+            max_age=django_settings.FINAL_RESULTS_CANONICAL_MAX_AGE
+        )
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+def final_results_page(clock, results=None, turnout=None):
+    """
+    Get the template and context of the final results page.
+    
+    Also used to publish the page as a static snapshot (``voting.publish``)
+    and to freeze it at the close (``voting.finalize``). ``turnout`` is an
+    already read ``(total_voters, total_voted)``.
+    """
+    settings = clock.settings
+    if results is not None:
+        total_voters, total_voted = results.total_voters, results.total_voted
+    elif turnout is not None:
+        total_voters, total_voted = turnout
+    else:
+        total_voters, total_voted = get_turnout()
+    voting_ended = clock.is_voting_ended
     all_voters_voted = total_voters > 0 and total_voted == total_voters
     
     # Show results only if voting has ended OR all voters have voted
-    can_show_results = voting_ended or all_voters_voted
-    
-    if not can_show_results:
+    if not (voting_ended or all_voters_voted):
         context = {
             'can_show_results': False,
             'voting_ended': voting_ended,
@@ -508,46 +574,24 @@ def final_results(request):
             'total_voters': total_voters,
             'total_voted': total_voted,
             'voting_end_time': settings.voting_end_time,
-            'current_time': now,
+            'current_time': clock.now,
             'settings': settings
         }
-        return render(request, 'voting/final_results_restricted.html', context)
-    
-    # Generate results data
-    positions = Position.objects.filter(is_active=True)
-    winners_data = []
-    
-    for position in positions:
-        # Get candidate with most votes for this position
-        votes_by_candidate = Vote.objects.filter(position=position).values(
-            'candidate__name', 'candidate__reg_no', 'candidate__photo'
-        ).annotate(vote_count=Count('id')).order_by('-vote_count')
-        
-        if votes_by_candidate:
-            winner = votes_by_candidate[0]
-            total_votes = Vote.objects.filter(position=position).count()
-            
-            winners_data.append({
-                'position': position,
-                'winner_name': winner['candidate__name'],
-                'winner_reg_no': winner['candidate__reg_no'],
-                'winner_photo': winner['candidate__photo'],
-                'votes': winner['vote_count'],
-                'total_votes': total_votes,
-                'all_candidates': list(votes_by_candidate)
-            })
+        return 'voting/final_results_restricted.html', context
     
+    if results is None:
+        results = compute_results(clock)
     context = {
         'can_show_results': True,
-        'winners_data': winners_data,
-        'total_voters': total_voters,
-        'total_voted': total_voted,
-        'voting_ended': voting_ended,
-        'all_voters_voted': all_voters_voted,
-        'settings': settings
+        'winners_data': [p for p in results.positions if p.total_votes > 0],
+        'total_voters': results.total_voters,
+        'total_voted': results.total_voted,
+        'voting_ended': results.voting_ended_by_time,
+        'all_voters_voted': results.all_voters_voted,
+        'settings': settings,
+        'current_time': results.generated_at
     }
-    
-    return render(request, 'voting/final_results.html', context)
+    return 'voting/final_results.html', context
 
 
 def is_technical_head(user):
@@ -557,7 +601,7 @@ def is_technical_head(user):
     if not user.is_authenticated:
         return False
     
-    settings = ElectionSettings.get_settings()
+    settings = get_clock().settings
     return (
         user.is_superuser or 
         user.is_staff or
@@ -573,7 +617,7 @@ def audit_trail(request):
     """
     votes = Vote.objects.select_related(
         'voter', 'position', 'candidate'
-    ).order_by('-voted_at')
+    ).order_by('-voted_at', 'id')
     
     # Apply filters if provided
     position_filter = request.GET.get('position')
@@ -674,8 +718,7 @@ def import_voters_csv(request):
             messages.error(request, f'Error importing CSV: {str(e)}')
     
     # Get current voter statistics
-    total_voters = Voter.objects.count()
-    voted_count = Voter.objects.filter(has_voted=True).count()
+    total_voters, voted_count = get_turnout()
     remaining_count = total_voters - voted_count
     
     context = {